@@ -0,0 +1,95 @@
+"""比较完整读取数据文件和通过索引延迟读取两种方式的启动耗时与内存占用
+
+    python benchmarks/bench_lazy_load.py [--records 50000] [--files 10]
+
+在临时目录中生成一个旧版格式的数据文件，先按旧做法整体 json.load，
+再用 RecordStore 重写一次快照生成索引，之后只读取索引。
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from launcher.storage import RecordStore  # noqa: E402
+
+
+def make_fixture(path, records, files):
+    data = {'history_records': [
+        {
+            'name': f"记录 {i}",
+            'files': [{'path': f"C:/Program Files/App{j}/bin/app{j}.exe", 'delay': j % 5, 'order': j + 1}
+                      for j in range(files)],
+            'close_after_run': False,
+            'create_time': "2024-01-01 08:00:00"
+        }
+        for i in range(records)
+    ]}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def load_full(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['history_records']
+
+
+def load_indexed(path):
+    store = RecordStore(path)
+    store.load()
+    return store.records
+
+
+def measure(load, path):
+    """返回 (耗时秒, 加载后仍占用的内存字节, 峰值内存字节)"""
+    gc.collect()
+    begin = time.perf_counter()
+    result = load(path)
+    elapsed = time.perf_counter() - begin
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = load(path)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, retained, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=50000)
+    parser.add_argument('--files', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'launcher_data.json')
+        make_fixture(path, args.records, args.files)
+        print(f"{args.records} 条记录，每条 {args.files} 个文件，数据文件 {os.path.getsize(path) / 1e6:.1f} MB")
+
+        full = measure(load_full, path)
+
+        store = RecordStore(path)
+        store.load()
+        store.close()  # 没有索引时退出会重写快照并生成索引
+        indexed = measure(load_indexed, path)
+
+        store = RecordStore(path)
+        store.load()
+        begin = time.perf_counter()
+        store.records[args.records // 2]['files']
+        first_files = time.perf_counter() - begin
+
+    print(f"{'':8}{'耗时':>12}{'常驻内存':>14}{'峰值内存':>14}")
+    for label, (elapsed, retained, peak) in (("完整读取", full), ("索引读取", indexed)):
+        print(f"{label:8}{elapsed * 1000:10.1f} ms{retained / 1e6:11.1f} MB{peak / 1e6:11.1f} MB")
+    print(f"选中一条记录时读取其文件列表: {first_files * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
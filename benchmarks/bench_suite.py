@@ -0,0 +1,347 @@
+"""启动器热点路径的基准测试，结果可以保存为基线并在之后比较
+
+    python benchmarks/bench_suite.py                          运行全部基准并输出结果
+    python benchmarks/bench_suite.py --quick                  只用较小的规模，几十秒内完成
+    python benchmarks/bench_suite.py --only storage,runloop   只运行指定的几组
+    python benchmarks/bench_suite.py --output baseline.json   把结果保存为基线
+    python benchmarks/bench_suite.py --compare baseline.json  与基线比较，有指标变慢超过阈值时退出码为 1
+
+基准分为四组：
+
+- storage   数据文件在 1k/10k/100k 条记录时的首次读取（旧版格式）、重写快照、按索引读取和保存一条记录
+- search    搜索索引的建立和查询
+- rows      文件列表整体重建（refresh_file_list）、上移/下移和搜索过滤在大量行时的耗时，需要 Tk
+- runloop   用立即退出的小脚本测量每次启动的额外开销和调度偏差
+
+不需要显示器：没有 DISPLAY 时如果装有 Xvfb 会临时启动一个，否则跳过 rows 组。
+所有指标的单位都是毫秒，越小越好；每个指标取 --repeat 次的中位数。
+基线与机器相关，请在同一台机器上生成和比较。
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from launcher.engine import LaunchEngine  # noqa: E402
+from launcher.metrics import percentile  # noqa: E402
+from launcher.search import SearchIndex, matching_positions  # noqa: E402
+from launcher.storage import RecordStore  # noqa: E402
+
+BASELINE_VERSION = 1
+GROUPS = ('storage', 'search', 'rows', 'runloop')
+RECORD_SIZES = (1000, 10000, 100000)
+QUICK_RECORD_SIZES = (1000, 10000)
+ROW_SIZES = (1000, 10000)
+QUICK_ROW_SIZES = (1000,)
+FILES_PER_RECORD = 5
+# 比较时变慢超过这个比例，并且绝对值超过 MIN_DELTA 毫秒，视为退化
+THRESHOLD = 0.25
+MIN_DELTA = 0.5
+
+
+def median_ms(func, repeat):
+    """运行 func repeat 次，返回耗时中位数（毫秒）"""
+    samples = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - begin) * 1000)
+    return statistics.median(samples)
+
+
+def make_record(i):
+    return {
+        'name': f"记录 {i}",
+        'files': [{'path': f"C:/Program Files/App{(i + j) % 500}/bin/app{(i + j) % 500}.exe", 'delay': j % 5}
+                  for j in range(FILES_PER_RECORD)],
+        'close_after_run': False,
+        'create_time': "2024-01-01 08:00:00"
+    }
+
+
+def make_fixture(path, count):
+    """生成旧版格式（没有索引）的数据文件"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'history_records': [make_record(i) for i in range(count)]}, f, ensure_ascii=False)
+
+
+# ---- storage ----
+
+def bench_storage(sizes, repeat):
+    results = {}
+    for count in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'launcher_data.json')
+            make_fixture(path, count)
+
+            # 旧版数据文件每次都完整读取；重写快照会生成索引，所以只在最后一次读取后重写
+            stores = []
+            results[f'storage.load_legacy.{count}'] = median_ms(
+                lambda: stores.append(RecordStore(path)) or stores[-1].load(), repeat)
+            results[f'storage.compact.{count}'] = median_ms(stores[-1].close, 1)
+
+            results[f'storage.load_indexed.{count}'] = median_ms(lambda: RecordStore(path).load(), repeat)
+
+            # 保存一条记录：追加到日志并 fsync（界面上的保存由后台线程执行同样的写入）
+            store = RecordStore(path, compact_after=10 ** 9)
+            store.load()
+            numbers = iter(range(count, count + repeat * 10))
+            results[f'storage.save.{count}'] = median_ms(
+                lambda: (store.append(make_record(next(numbers))), store.flush()), repeat * 10)
+            store.close()
+    return results
+
+
+# ---- search ----
+
+def bench_search(sizes, repeat):
+    results = {}
+    queries = ('记录 12', 'app42', 'path:c:/program files/app7/', 'bin app1')
+    for count in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'launcher_data.json')
+            make_fixture(path, count)
+            store = RecordStore(path)
+            store.load()
+            store.close()
+            store = RecordStore(path)
+            store.load()
+            records = store.records
+
+            def build():
+                # 与界面相同：先按名称建立索引，再从快照中读取路径补上
+                index = SearchIndex(records)
+                index.set_paths([(record, [file_item['path'] for file_item in store.peek_files(record)])
+                                 for record in index.pending()])
+                return index
+
+            results[f'search.build.{count}'] = median_ms(build, repeat)
+            index = build()
+            for query in queries:
+                matching_positions(records, index.search(query))
+            results[f'search.query.{count}'] = median_ms(
+                lambda: [matching_positions(records, index.search(query)) for query in queries], repeat * 5
+            ) / len(queries)
+    return results
+
+
+# ---- rows ----
+
+def start_display():
+    """Tk 需要显示器：没有 DISPLAY 时尝试启动 Xvfb，返回 (是否可用, 需要在结束时终止的进程)"""
+    if sys.platform in ('win32', 'darwin') or os.environ.get('DISPLAY'):
+        return True, None
+    xvfb = shutil.which('Xvfb')
+    if xvfb is None:
+        return False, None
+    for number in range(90, 100):
+        if os.path.exists(f'/tmp/.X11-unix/X{number}'):
+            continue
+        process = subprocess.Popen([xvfb, f':{number}', '-nolisten', 'tcp'],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and process.poll() is None:
+            if os.path.exists(f'/tmp/.X11-unix/X{number}'):
+                os.environ['DISPLAY'] = f':{number}'
+                return True, process
+            time.sleep(0.05)
+        process.terminate()
+    return False, None
+
+
+def bench_rows(sizes, repeat):
+    import tkinter as tk
+    from tkinter import ttk
+
+    from launcher.gui import file_row_values
+    from launcher.search import matching_files
+    from launcher.treerows import TreeRows
+
+    results = {}
+    root = tk.Tk()
+    root.withdraw()
+    try:
+        for count in sizes:
+            files = [{'path': f"C:/Program Files/App{i}/app{i}.exe", 'delay': i % 10} for i in range(count)]
+            tree = ttk.Treeview(root, columns=('序号', '文件路径', '延迟时间', '资源', '状态'), show='headings')
+            tree.pack()
+            rows = TreeRows(tree, file_row_values, prefix='file', position_columns=True)
+
+            def refresh():
+                rows.reset(files)
+                root.update_idletasks()
+
+            results[f'rows.refresh.{count}'] = median_ms(refresh, repeat)
+
+            def move():
+                index = count // 2
+                files[index], files[index + 1] = files[index + 1], files[index]
+                rows.swap(index, index + 1, files)
+                rows.select(index + 1)
+                root.update_idletasks()
+
+            results[f'rows.move.{count}'] = median_ms(move, repeat * 10)
+
+            def search():
+                # 输入一个关键字后再清空，大约一半的行被摘下又放回
+                rows.filter(matching_files(files, 'app1'))
+                rows.filter(None)
+                root.update_idletasks()
+
+            results[f'rows.filter.{count}'] = median_ms(search, repeat)
+            tree.destroy()
+    finally:
+        root.destroy()
+    return results
+
+
+# ---- runloop ----
+
+def make_stub(directory):
+    """立即退出的小程序"""
+    if sys.platform == 'win32':
+        path = os.path.join(directory, 'stub.bat')
+        with open(path, 'w') as f:
+            f.write('@exit /b 0\n')
+    else:
+        path = os.path.join(directory, 'stub.sh')
+        with open(path, 'w') as f:
+            f.write('#!/bin/sh\nexit 0\n')
+        os.chmod(path, 0o755)
+    return path
+
+
+def bench_runloop(repeat, launches=50, delay=0.02):
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        stub = make_stub(directory)
+        engine = LaunchEngine()
+        overhead = []
+        jitters = []
+        for _ in range(repeat):
+            # 不带延迟：总耗时全部是启动器本身和创建进程的开销
+            result = engine.run([{'path': stub, 'delay': 0}] * launches)
+            overhead.append(result.duration * 1000 / launches)
+            # 带延迟：实际启动时间与计划时间之差
+            result = engine.run([{'path': stub, 'delay': delay}] * launches)
+            jitters.extend(item.jitter * 1000 for item in result.items if item.jitter is not None)
+            for info in engine.processes:
+                if info.popen is not None:
+                    info.popen.wait()
+        results['runloop.launch_overhead'] = statistics.median(overhead)
+        results['runloop.jitter_mean'] = statistics.mean(jitters)
+        results['runloop.jitter_p95'] = percentile(jitters, 95)
+        results['runloop.jitter_max'] = max(jitters)
+    return results
+
+
+# ---- 基线 ----
+
+def run_groups(groups, quick, repeat):
+    record_sizes = QUICK_RECORD_SIZES if quick else RECORD_SIZES
+    row_sizes = QUICK_ROW_SIZES if quick else ROW_SIZES
+    metrics = {}
+    skipped = []
+    for group in groups:
+        print(f"运行 {group} ...", file=sys.stderr)
+        if group == 'storage':
+            metrics.update(bench_storage(record_sizes, repeat))
+        elif group == 'search':
+            metrics.update(bench_search(record_sizes, repeat))
+        elif group == 'rows':
+            available, display = start_display()
+            if not available:
+                print("没有显示器也没有 Xvfb，跳过 rows", file=sys.stderr)
+                skipped.append(group)
+                continue
+            try:
+                metrics.update(bench_rows(row_sizes, repeat))
+            finally:
+                if display is not None:
+                    display.terminate()
+                    display.wait()
+        elif group == 'runloop':
+            metrics.update(bench_runloop(repeat))
+    return metrics, skipped
+
+
+def compare(baseline, metrics, threshold, min_delta):
+    """打印与基线的对比，返回变慢超过阈值的指标名称"""
+    regressions = []
+    print(f"{'指标':32}{'基线':>12}{'本次':>12}{'变化':>10}")
+    for name in sorted(set(baseline) | set(metrics)):
+        old, new = baseline.get(name), metrics.get(name)
+        if old is None or new is None:
+            print(f"{name:32}{'-' if old is None else f'{old:.3f}':>12}{'-' if new is None else f'{new:.3f}':>12}")
+            continue
+        change = (new - old) / old if old else 0.0
+        regressed = change > threshold and new - old > min_delta
+        if regressed:
+            regressions.append(name)
+        print(f"{name:32}{old:12.3f}{new:12.3f}{change:+10.0%}{'  退化' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--only', metavar='GROUPS', help=f"只运行这些组，逗号分隔（{', '.join(GROUPS)}）")
+    parser.add_argument('--quick', action='store_true', help="只用较小的规模")
+    parser.add_argument('--repeat', type=int, default=3, help="每个指标重复的次数 (默认: %(default)s)")
+    parser.add_argument('--output', metavar='FILE', help="把结果写入 JSON 文件，可以作为之后比较的基线")
+    parser.add_argument('--compare', metavar='FILE', help="与基线文件比较")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help="变慢超过这个比例视为退化 (默认: %(default)s)")
+    parser.add_argument('--min-delta', type=float, default=MIN_DELTA,
+                        help="变慢的绝对值不超过这么多毫秒时不算退化 (默认: %(default)s)")
+    args = parser.parse_args()
+
+    groups = GROUPS
+    if args.only:
+        groups = [group.strip() for group in args.only.split(',') if group.strip()]
+        unknown = set(groups) - set(GROUPS)
+        if unknown:
+            parser.error(f"未知的基准组: {', '.join(sorted(unknown))}")
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('version') != BASELINE_VERSION:
+            parser.error(f"基线文件版本不符: {args.compare}")
+
+    metrics, skipped = run_groups(groups, args.quick, max(1, args.repeat))
+    report = {
+        'version': BASELINE_VERSION,
+        'created': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'quick': args.quick,
+        'skipped': skipped,
+        'metrics': {name: round(value, 4) for name, value in sorted(metrics.items())},
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+
+    if baseline is None:
+        for name, value in report['metrics'].items():
+            print(f"{name:32}{value:12.3f} ms")
+        return 0
+    regressions = compare(baseline['metrics'], report['metrics'], args.threshold, args.min_delta)
+    if regressions:
+        print(f"{len(regressions)} 个指标变慢超过 {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print("没有指标退化")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
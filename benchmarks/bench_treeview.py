@@ -0,0 +1,126 @@
+"""比较整体重建和增量更新两种方式下 Treeview 上移/下移的耗时和 Tk 命令数
+
+    python benchmarks/bench_treeview.py [--rows 10000] [--moves 20]
+
+需要图形显示；没有显示器的环境可以用 xvfb-run 运行。
+耗时与机器和显示方式有关，每次下移发出的 Tk 命令数与环境无关，可以直接比较。
+"""
+import argparse
+import os
+import sys
+import time
+import tkinter as tk
+from tkinter import ttk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from launcher.gui import file_row_values  # noqa: E402
+from launcher.treerows import TreeRows  # noqa: E402
+
+
+# 与界面中的文件列表相同，对应 file_row_values 返回的各列
+COLUMNS = ('序号', '文件路径', '延迟时间', '资源', '状态')
+
+
+def make_files(count):
+    return [{'path': f"C:/Program Files/App{i}/app{i}.exe", 'delay': i % 10, 'order': i + 1}
+            for i in range(count)]
+
+
+# 会向 Tk 发出命令的 Treeview 方法，每次调用算一条命令
+TK_METHODS = ('insert', 'delete', 'detach', 'move', 'item', 'see', 'focus',
+              'selection', 'selection_set', 'get_children', 'index')
+
+
+class CountingTreeview(ttk.Treeview):
+    """记录发出的 Tk 命令数"""
+
+    commands = 0
+
+
+def _counted(name):
+    method = getattr(ttk.Treeview, name)
+
+    def counted(self, *args, **kwargs):
+        self.commands += 1
+        return method(self, *args, **kwargs)
+
+    return counted
+
+
+for _name in TK_METHODS:
+    setattr(CountingTreeview, _name, _counted(_name))
+
+
+def make_tree(root):
+    tree = CountingTreeview(root, columns=COLUMNS, show='headings')
+    tree.pack()
+    return tree
+
+
+def bench_full_refresh(root, files, moves):
+    """旧做法：按 get_children().index 查找位置，交换后清空重建"""
+    tree = make_tree(root)
+
+    def refresh():
+        for item in tree.get_children():
+            tree.delete(item)
+        for position, file_item in enumerate(files):
+            tree.insert('', 'end', values=file_row_values(file_item, position))
+
+    refresh()
+    tree.selection_set(tree.get_children()[len(files) // 2])
+    tree.commands = 0
+    begin = time.perf_counter()
+    for _ in range(moves):
+        item = tree.selection()[0]
+        index = tree.get_children().index(item)
+        files[index], files[index + 1] = files[index + 1], files[index]
+        for i, file_item in enumerate(files):
+            file_item['order'] = i + 1
+        refresh()
+        tree.selection_set(tree.get_children()[index + 1])
+        root.update_idletasks()
+    elapsed = time.perf_counter() - begin
+    tree.destroy()
+    return elapsed / moves, tree.commands / moves
+
+
+def bench_incremental(root, files, moves):
+    """新做法：固定 iid，只移动和更新两行（序号由位置得出，不再维护 order）"""
+    tree = make_tree(root)
+    rows = TreeRows(tree, file_row_values, prefix='file', position_columns=True)
+    rows.reset(files)
+    rows.select(len(files) // 2)
+    tree.commands = 0
+    begin = time.perf_counter()
+    for _ in range(moves):
+        index = rows.position_of(tree.selection()[0])
+        files[index], files[index + 1] = files[index + 1], files[index]
+        rows.swap(index, index + 1, files)
+        rows.select(index + 1)
+        root.update_idletasks()
+    elapsed = time.perf_counter() - begin
+    tree.destroy()
+    return elapsed / moves, tree.commands / moves
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--moves', type=int, default=20)
+    args = parser.parse_args()
+
+    root = tk.Tk()
+    root.withdraw()
+    before, before_commands = bench_full_refresh(root, make_files(args.rows), args.moves)
+    after, after_commands = bench_incremental(root, make_files(args.rows), args.moves)
+    root.destroy()
+
+    print(f"{args.rows} 行，每次下移平均：")
+    print(f"  整体重建: {before * 1000:10.2f} ms  {before_commands:8.0f} 条 Tk 命令")
+    print(f"  增量更新: {after * 1000:10.2f} ms  {after_commands:8.0f} 条 Tk 命令  ({before / after:.0f} 倍)")
+
+
+if __name__ == '__main__':
+    main()
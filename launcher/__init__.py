@@ -0,0 +1 @@
+"""桌面启动器的非界面部分（调度、启动等）"""
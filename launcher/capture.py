@@ -0,0 +1,245 @@
+"""捕获程序输出
+
+文件项可以用 capture 字段记录程序的标准输出和标准错误，脚本启动失败时也能看到原因：
+
+    "capture": true
+    "capture": {"max_bytes": 1048576, "keep": 3}    每个日志文件的大小上限和保留的轮转文件数
+
+输出写入日志目录（数据文件旁的 <数据文件名>.logs/）中按程序命名的文件，超过 max_bytes 后轮转。
+最近的 RING_LINES 行同时保存在内存中的环形缓冲区里，供界面的日志窗口显示，
+程序一次输出几十兆也只占用固定大小的内存。
+
+所有管道都设为非阻塞，在启动引擎的事件循环（launcher/supervisor.py）中读取，有数据就立即读走，
+子进程不会因为管道写满而卡住。Windows 上的管道不支持 select，每个管道用一个线程读取。
+由系统默认程序打开的文件（没有子进程）无法捕获输出。管道只有启动器在读，启动器退出后
+程序再写输出会收到 SIGPIPE，因此 --run 会留在前台直到这些程序退出，图形界面在这些程序退出前
+不会因"运行后关闭软件"自动关闭，关闭窗口时也会先询问是否结束它们。
+"""
+import collections
+import hashlib
+import itertools
+import os
+import threading
+import time
+
+MAX_BYTES = 1024 * 1024
+KEEP = 3
+RING_LINES = 2000
+# 单行超过这个长度时截断显示（日志文件中保留完整内容）
+MAX_LINE = 2000
+READ_SIZE = 65536
+# 一次可读事件中最多读取几块，输出很多的程序不会拖慢其他管道
+READS_PER_EVENT = 4
+
+
+class CaptureError(ValueError):
+    """输出捕获配置错误"""
+
+
+def capture_options(spec):
+    """根据文件项中的 capture 字段返回 {max_bytes, keep}，没有设置时返回 None"""
+    if not spec:
+        return None
+    if spec is True:
+        spec = {}
+    if not isinstance(spec, dict):
+        raise CaptureError("capture 必须是 true 或对象")
+    unknown = set(spec) - {'max_bytes', 'keep'}
+    if unknown:
+        raise CaptureError(f"未知的输出捕获设置: {', '.join(sorted(unknown))}")
+    try:
+        options = {'max_bytes': int(spec.get('max_bytes', MAX_BYTES)), 'keep': int(spec.get('keep', KEEP))}
+    except (TypeError, ValueError):
+        raise CaptureError("capture 的 max_bytes 和 keep 必须是整数")
+    if options['max_bytes'] <= 0 or options['keep'] < 0:
+        raise CaptureError("capture 的 max_bytes 必须大于 0，keep 不能小于 0")
+    return options
+
+
+def log_dir(data_file):
+    """数据文件对应的日志目录"""
+    return os.path.splitext(data_file)[0] + '.logs'
+
+
+def log_name(path):
+    """程序对应的日志文件名：文件名加路径的短哈希，不同目录下的同名程序不会混在一起"""
+    digest = hashlib.sha1(path.encode('utf-8')).hexdigest()[:8]
+    name = os.path.basename(path.rstrip('/\\')) or 'output'
+    return f"{name}-{digest}.log"
+
+
+class RotatingLog:
+    """追加写入、按大小轮转的日志文件，同一路径的多个进程共用一个实例"""
+
+    def __init__(self, path, max_bytes=MAX_BYTES, keep=KEEP):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.users = 0
+        self._file = None
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _rotated(self, number):
+        return f"{self.path}.{number}"
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, 'ab')
+        self._size = self._file.tell()
+
+    def write(self, data):
+        with self._lock:
+            if self._file is None:
+                self._open()
+            if self._size and self._size + len(data) > self.max_bytes:
+                self._file.close()
+                self._rotate()
+                self._open()
+            self._file.write(data)
+            self._size += len(data)
+            # 不缓冲：程序崩溃前的最后几行也要落盘
+            self._file.flush()
+
+    def _rotate(self):
+        if self.keep <= 0:
+            os.remove(self.path)
+            return
+        for number in range(self.keep - 1, 0, -1):
+            if os.path.exists(self._rotated(number)):
+                os.replace(self._rotated(number), self._rotated(number + 1))
+        os.replace(self.path, self._rotated(1))
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class RingBuffer:
+    """最近 capacity 行输出，界面按序号取新增的行"""
+
+    def __init__(self, capacity=RING_LINES):
+        self.lines = collections.deque(maxlen=capacity)  # (序号, 时刻, 名称, 流, 文本)
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def append(self, name, stream, text):
+        if len(text) > MAX_LINE:
+            text = text[:MAX_LINE] + f" …（截断 {len(text) - MAX_LINE} 个字符）"
+        with self._lock:
+            self.lines.append((next(self._counter), time.time(), name, stream, text))
+
+    def since(self, seq):
+        """序号大于 seq 的行（已被挤出缓冲区的行不再返回）"""
+        with self._lock:
+            if not self.lines or self.lines[-1][0] <= seq:
+                return []
+            return [line for line in self.lines if line[0] > seq]
+
+
+class _Stream:
+    """一个管道的读取状态"""
+
+    def __init__(self, output, name, stream, fd, log):
+        self.output = output
+        self.name = name
+        self.stream = stream
+        self.fd = fd
+        self.log = log
+        self.partial = b''
+
+    def feed(self, data):
+        """写入日志，按行放入环形缓冲区；data 为空表示管道已关闭"""
+        if data:
+            try:
+                self.log.write(data)
+            except OSError:
+                # 日志写不进去也要继续读，不能让子进程卡在写满的管道上
+                pass
+            self.partial += data
+            *lines, self.partial = self.partial.split(b'\n')
+            if len(self.partial) > MAX_LINE * 4:
+                lines.append(self.partial)
+                self.partial = b''
+        else:
+            lines = [self.partial] if self.partial else []
+            self.partial = b''
+        for line in lines:
+            self.output.ring.append(self.name, self.stream, line.rstrip(b'\r').decode('utf-8', 'replace'))
+
+
+class OutputCapture:
+    """读取所有被捕获进程的输出"""
+
+    def __init__(self, loop, directory, ring=None):
+        self.loop = loop
+        self.directory = directory
+        self.ring = ring or RingBuffer()
+        self.logs = {}  # 日志路径 -> RotatingLog
+        self._lock = threading.Lock()
+
+    def _log(self, path, options, users):
+        log_path = os.path.join(self.directory, log_name(path))
+        with self._lock:
+            log = self.logs.get(log_path)
+            if log is None:
+                log = self.logs[log_path] = RotatingLog(log_path, options['max_bytes'], options['keep'])
+            log.users += users
+        return log
+
+    def _release(self, log):
+        with self._lock:
+            log.users -= 1
+            if log.users == 0:
+                log.close()
+                del self.logs[log.path]
+
+    def attach(self, info, options):
+        """开始读取 info.popen 的 stdout 和 stderr，返回日志文件路径"""
+        name = os.path.basename(info.path)
+        pipes = [('stdout', info.popen.stdout), ('stderr', info.popen.stderr)]
+        log = self._log(info.path, options, len(pipes))
+        header = f"=== {time.strftime('%Y-%m-%d %H:%M:%S')} 启动 {info.path} (pid {info.popen.pid}) ===\n"
+        try:
+            log.write(header.encode('utf-8'))
+        except OSError:
+            pass
+        for stream, pipe in pipes:
+            fd = pipe.fileno()
+            reader = _Stream(self, name, stream, fd, log)
+            if os.name == 'posix':
+                os.set_blocking(fd, False)
+                self.loop.watch_read(fd, lambda reader=reader, pipe=pipe: self._readable(reader, pipe))
+            else:
+                threading.Thread(target=self._read_blocking, args=(reader, pipe), daemon=True).start()
+        return log.path
+
+    def _readable(self, reader, pipe):
+        """管道可读（在事件循环线程中调用）"""
+        for _ in range(READS_PER_EVENT):
+            try:
+                data = os.read(reader.fd, READ_SIZE)
+            except BlockingIOError:
+                return
+            except OSError:
+                data = b''
+            reader.feed(data)
+            if not data:
+                self.loop.unwatch(reader.fd)
+                pipe.close()
+                self._release(reader.log)
+                return
+
+    def _read_blocking(self, reader, pipe):
+        while True:
+            try:
+                data = os.read(reader.fd, READ_SIZE)
+            except OSError:
+                data = b''
+            reader.feed(data)
+            if not data:
+                pipe.close()
+                self._release(reader.log)
+                return
@@ -0,0 +1,406 @@
+"""命令行入口
+
+    桌面启动器.py                       打开图形界面
+    桌面启动器.py --list                列出历史记录
+    桌面启动器.py --run "记录名称"       不打开窗口直接运行一条记录（适合开机自启）
+    桌面启动器.py --run "记录名称" --dry-run   只检查并显示启动计划
+    桌面启动器.py --run "记录名称" --suggest-delays   根据实测就绪时间建议延迟并模拟总用时
+    桌面启动器.py --export-metrics 文件.csv    导出启动耗时统计（.csv 或 .json）
+    桌面启动器.py --daemon              启动常驻后台服务
+    桌面启动器.py --ctl run "记录名称"   通过后台服务运行一条记录（还有 status、children、cancel 等）
+
+命令行模式不会导入 tkinter，也可以在没有图形显示的环境中使用。
+"""
+import argparse
+import os
+import sys
+import time
+
+from launcher.storage import DEFAULT_DATA_FILE, file_count, find_record, load_records
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]), description="自动打开桌面软件")
+    parser.add_argument('--data', default=DEFAULT_DATA_FILE, help="数据文件路径 (默认: %(default)s)")
+    parser.add_argument('--list', action='store_true', help="列出所有历史记录")
+    parser.add_argument('--search', metavar='QUERY',
+                        help="列出名称或文件路径包含关键字的历史记录，path:路径 只按文件路径查找")
+    parser.add_argument('--run', metavar='NAME', help="不打开窗口，直接运行指定名称的历史记录")
+    parser.add_argument('--dry-run', action='store_true', help="配合 --run 使用，只显示启动计划，不启动文件")
+    parser.add_argument('--max-concurrent', type=int, metavar='N',
+                        help="同时启动的程序数量上限，覆盖记录中的设置，0 为不限制")
+    parser.add_argument('--prefetch', type=int, metavar='N',
+                        help="等待延迟期间预读接下来 N 项的程序文件，覆盖记录中的设置，0 为不预读")
+    parser.add_argument('--prefetch-budget', type=float, default=256, metavar='MB',
+                        help="一次运行最多预读的数据量 (默认: %(default)g MB)")
+    parser.add_argument('--adaptive', action='store_true',
+                        help="配合 --run 使用，按实测就绪时间自动调整延迟")
+    parser.add_argument('--suggest-delays', action='store_true',
+                        help="配合 --run 使用，只显示建议的延迟和模拟的总用时，不启动文件")
+    parser.add_argument('--percentile', type=float, metavar='Q',
+                        help="自适应延迟使用的就绪时间百分位数，覆盖记录中的设置 (默认 95)")
+    parser.add_argument('--throttle', action='store_true',
+                        help="配合 --run 使用，按系统负载调节启动节奏，delay 作为等待上限")
+    parser.add_argument('--export-metrics', metavar='FILE',
+                        help="导出启动耗时统计，扩展名为 .csv 时导出 CSV，否则导出 JSON")
+    parser.add_argument('--daemon', action='store_true', help="启动常驻后台服务，通过 --ctl 发送命令")
+    parser.add_argument('--socket', metavar='PATH',
+                        help="后台服务的套接字路径 (默认: $XDG_RUNTIME_DIR/desktop-launcher.sock)")
+    parser.add_argument('--ctl', nargs='+', metavar=('COMMAND', 'ARG'),
+                        help="向后台服务发送命令: run 名称 | status [编号] | pause | resume | skip | cancel | stop [编号]"
+                             " | children | records | shutdown")
+    parser.add_argument('--timing', action='store_true',
+                        help="显示导入耗时、加载数据耗时，以及第一个文件从到期到创建出进程的耗时")
+    return parser
+
+
+class ConsoleListener:
+    """把运行过程输出到终端"""
+
+    def __init__(self, observe=False):
+        self.observe = observe
+        self.observer = None  # observe 为 True 时第一个进程启动后才创建 metrics.Observer，不拖慢首次启动
+        self.first_process = None  # 第一个启动的 ProcessInfo，--timing 用
+        self.throttled = set()
+
+    def on_status(self, text):
+        print(text)
+
+    def on_wait(self, item, remaining):
+        print(f"等待 {remaining:.1f} 秒后运行第 {item.index} 个文件: {os.path.basename(item.path)}")
+
+    def on_throttle(self, item, reasons):
+        # 每一项只提示一次，避免每次重新检查都输出
+        if item not in self.throttled:
+            self.throttled.add(item)
+            print(f"系统繁忙（{'，'.join(reasons)}），暂缓运行第 {item.index} 个文件: {os.path.basename(item.path)}")
+
+    def on_launch(self, info):
+        if self.first_process is None:
+            self.first_process = info
+        if self.observe:
+            if self.observer is None:
+                from launcher.metrics import Observer
+                self.observer = Observer()
+            self.observer.add(info)
+        if info.log_path:
+            print(f"第 {info.item.index} 个文件的输出记录在 {info.log_path}")
+
+    def on_ready(self, item, ok):
+        if not ok:
+            print(f"第 {item.index} 个文件就绪探测超时，继续启动后续文件: {os.path.basename(item.path)}")
+
+    def on_error(self, item, message):
+        print(f"错误: {message}", file=sys.stderr)
+
+    def on_exit(self, info):
+        pass
+
+    def on_supervise(self, supervised):
+        print(f"[{time.strftime('%H:%M:%S')}] 第 {supervised.item.index} 个文件 "
+              f"{os.path.basename(supervised.path)}: {supervised.describe()}")
+
+
+def list_records(records):
+    for record in records:
+        print(f"{record['name']}\t{file_count(record)} 个文件\t{record.get('create_time', '')}")
+    return 0
+
+
+def search_records(records, query):
+    """列出符合查询的历史记录（--search），没有符合的记录时返回 1"""
+    from launcher.search import SearchIndex, matching_positions
+    index = SearchIndex(records)
+    # 命令行只查询一次，直接读取所有文件列表
+    index.set_paths([(record, [file_item['path'] for file_item in record['files']]) for record in index.pending()])
+    positions = matching_positions(records, index.search(query))
+    if positions is None:
+        return list_records(records)
+    if not positions:
+        print(f"没有符合的历史记录: {query}", file=sys.stderr)
+        return 1
+    return list_records([record for position, record in enumerate(records) if position in positions])
+
+
+def show_plan(plan):
+    """显示启动计划（--dry-run）"""
+    for item in plan.items:
+        deps = plan.deps[item]
+        if item.entry.get('after') is not None:
+            if deps:
+                limit = f"，最多等待 {item.delay:g} 秒" if item.delay > 0 else ""
+                names = ', '.join(dep.name for dep in deps)
+                print(f"{item.index:>3}. {item.path}  依赖 {names} 就绪后启动{limit}{_describe(plan, item)}")
+                continue
+            trigger = "运行开始"
+        elif deps:
+            trigger = f"第 {deps[0].index} 项计划启动"
+        else:
+            trigger = "运行开始"
+        print(f"{item.index:>3}. {item.path}  {trigger}后 {item.delay:g} 秒{_describe(plan, item)}")
+
+
+def _describe(plan, item):
+    probe = plan.probes[item]
+    ready = f"，就绪条件: {probe.describe()}" if probe else ""
+    resources = plan.resources[item]
+    if resources is not None:
+        ready += f"，资源: {resources.describe()}"
+    policy = plan.supervision[item]
+    if policy is not None:
+        ready += f"，守护: {policy.describe()}"
+    if plan.capture[item] is not None:
+        ready += "，记录输出"
+    status = item.check.describe() if item.check is not None else ""
+    return ready + (f"  [{status}]" if status else "")
+
+
+def record_metrics(result, record_name, data_file, observer):
+    """等待刚启动的程序就绪或退出，把本次运行的耗时写入统计文件"""
+    from launcher.metrics import MetricsStore, metrics_file, run_events
+    if observer is not None:
+        observer.finish()
+    try:
+        MetricsStore(metrics_file(data_file)).append(run_events(result, record_name))
+    except OSError as e:
+        print(f"保存启动耗时统计失败: {e}", file=sys.stderr)
+
+
+def export_metrics(args):
+    from launcher.metrics import MetricsStore, export, metrics_file
+    events = MetricsStore(metrics_file(args.data)).read()
+    try:
+        export(events, args.export_metrics)
+    except OSError as e:
+        print(f"导出失败: {e}", file=sys.stderr)
+        return 2
+    print(f"已导出 {len(events)} 条启动记录到 {args.export_metrics}")
+    return 0
+
+
+def control(args):
+    """向后台服务发送一条命令并显示结果"""
+    from launcher.client import DaemonClient, DaemonError
+
+    command, params = args.ctl[0], args.ctl[1:]
+    request = {}
+    try:
+        if command == 'run':
+            if not params:
+                raise ValueError("run 命令需要记录名称")
+            request['name'] = params[0]
+        elif command in ('cancel', 'status', 'pause', 'resume', 'skip', 'stop') and params:
+            request['run'] = int(params[0])
+    except ValueError as e:
+        print(f"命令格式错误: {e}", file=sys.stderr)
+        return 2
+    try:
+        with DaemonClient(args.socket) as client:
+            response = client.request(command, **request)
+    except DaemonError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+
+    if command == 'run':
+        if response['duplicate']:
+            print(f"记录 '{request['name']}' 已在运行或排队中 (#{response['run']})")
+        else:
+            print(f"已提交运行 #{response['run']}")
+    elif command == 'cancel':
+        cancelled = ', '.join(f"#{run_id}" for run_id in response['cancelled'])
+        print(f"已取消: {cancelled}" if cancelled else "没有可取消的运行")
+    elif command in ('pause', 'resume', 'skip'):
+        runs = ', '.join(f"#{run_id}" for run_id in response['runs'])
+        action = {'pause': "已暂停", 'resume': "已继续", 'skip': "已跳过等待"}[command]
+        print(f"{action}: {runs}" if runs else "没有进行中的运行")
+    elif command == 'stop':
+        runs = ', '.join(f"#{run_id}" for run_id in response['runs'])
+        print(f"已停止 {runs}，结束 {response['terminated']} 个程序，其中 {response['killed']} 个被强制结束"
+              if runs else "没有进行中的运行")
+    elif command == 'status':
+        for run in response['runs']:
+            print(f"#{run['run']}\t{run['record']}\t{run['state']}\t{run['launched']}/{run['total']}\t{run['status']}")
+            for error in run['errors']:
+                print(f"\t错误: {error}")
+    elif command == 'children':
+        for child in response['children']:
+            print(f"{child['pid']}\t{child['record'] or ''}\t{child['path']}" + (f"\t{child['log']}" if child.get('log') else ""))
+        for entry in response.get('supervised', ()):
+            print(f"守护\t{entry['path']}\t{entry['status']}")
+    elif command == 'records':
+        for name in response['records']:
+            print(name)
+    elif command == 'shutdown':
+        print("后台服务正在退出")
+    return 0
+
+
+def run_daemon(args):
+    from launcher.daemon import LauncherDaemon
+
+    daemon = LauncherDaemon(os.path.abspath(args.data), args.socket)
+    print(f"后台服务已启动: {daemon.socket_path}")
+    try:
+        daemon.serve_forever()
+    except (OSError, RuntimeError) as e:
+        print(f"无法启动后台服务: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+def run_record(record, args):
+    # 引擎在这里才导入，--list 等不需要启动文件的命令不必付出这部分开销；
+    # 负载调节、输出捕获和耗时采样的模块只在用到时导入
+    begin = time.perf_counter()
+    from launcher.engine import LaunchEngine
+    engine_import = time.perf_counter() - begin
+
+    max_concurrent = args.max_concurrent
+    if max_concurrent is None:
+        max_concurrent = record.get('max_concurrent', 0)
+    prefetch = args.prefetch
+    if prefetch is None:
+        prefetch = record.get('prefetch', 0)
+    throttle = None
+    if record.get('throttle') or args.throttle:
+        from launcher.throttle import Throttle
+        try:
+            throttle = Throttle.from_config(record.get('throttle') or args.throttle)
+        except (TypeError, ValueError) as e:
+            print(f"负载调节配置错误: {e}", file=sys.stderr)
+            return 2
+    files = record['files']
+    logs = None
+    if any(file_item.get('capture') for file_item in files):
+        from launcher.capture import log_dir
+        logs = log_dir(args.data)
+    engine = LaunchEngine(max_concurrent=max_concurrent, prefetch=prefetch,
+                          prefetch_budget=int(args.prefetch_budget * 1024 * 1024), throttle=throttle,
+                          log_dir=logs)
+    listener = ConsoleListener(observe=True)
+    adaptive = args.adaptive or record.get('adaptive', False)
+    if adaptive or args.suggest_delays:
+        from launcher.metrics import MetricsStore, metrics_file
+        from launcher.tuning import DEFAULT_PERCENTILE, ReadinessEstimates, report, tuned_files
+        q = args.percentile or record.get('adaptive_percentile', DEFAULT_PERCENTILE)
+        estimates = ReadinessEstimates(MetricsStore(metrics_file(args.data)).read())
+        try:
+            if args.suggest_delays:
+                for line in report(files, estimates, q)[1]:
+                    print(line)
+                return 0
+            files = tuned_files(files, estimates, q)
+        except ValueError as e:
+            print(f"启动配置错误: {e}", file=sys.stderr)
+            return 2
+    try:
+        plan = engine.plan(files, listener)
+    except ValueError as e:
+        print(f"启动配置错误: {e}", file=sys.stderr)
+        return 2
+
+    if args.dry_run:
+        engine.preflight(plan)
+        show_plan(plan)
+        return 0
+
+    try:
+        result = engine.run_plan(plan, listener)
+    except KeyboardInterrupt:
+        # 程序都在自己的会话中，不会收到终端的 Ctrl+C
+        print("已取消运行，已启动的程序保持运行")
+        return 130
+    print(f"所有文件运行完成，用时 {result.duration:.1f} 秒")
+    record_metrics(result, record['name'], args.data, listener.observer)
+    throttled = sum(item.throttled for item in result.items)
+    if throttled:
+        print(f"因系统繁忙共推迟 {throttled:.1f} 秒")
+    if prefetch:
+        print(f"等待期间预读 {result.prefetched / 1024 / 1024:.1f} MB")
+    if args.timing:
+        print(f"引擎导入耗时: {engine_import * 1000:.1f} ms", file=sys.stderr)
+        info = listener.first_process
+        if info is not None and info.spawned_at is not None:
+            # 从调度到期算起，不包括启动前检查和文件项本身的延迟
+            print(f"首次启动开销: 到期后 {(info.spawned_at - info.item.deadline) * 1000:.1f} ms 创建出进程"
+                  f"（其中创建进程 {info.spawn_latency * 1000:.1f} ms）", file=sys.stderr)
+    return stay(engine) or (1 if result.errors else 0)
+
+
+def stay(engine):
+    """有被守护或正在捕获输出的程序时留在前台，直到它们都结束；Ctrl+C 退出，已启动的程序保持运行
+
+    捕获输出的管道只有启动器在读，提前退出后程序再写输出会收到 SIGPIPE。
+    """
+    from launcher.supervisor import FAILED
+
+    supervisor = engine.supervisor
+    supervised = len(supervisor.active()) if supervisor is not None else 0
+    captured = sum(1 for info in engine.running() if info.log_path)
+    if not supervised and not captured:
+        return 0
+    doing = ([f"守护 {supervised} 个程序"] if supervised else []) + ([f"记录 {captured} 个程序的输出"] if captured else [])
+    print(f"正在{'、'.join(doing)}，按 Ctrl+C 退出")
+    try:
+        while True:
+            if supervisor is not None:
+                supervisor.wait()
+            captured = [info for info in engine.running() if info.log_path]
+            if not captured:
+                break
+            for info in captured:
+                info.exited.wait()
+    except KeyboardInterrupt:
+        if supervisor is not None:
+            supervisor.stop()
+        print("已停止守护和输出记录，已启动的程序保持运行")
+    if supervisor is None:
+        return 0
+    return 1 if any(entry.state == FAILED for entry in supervisor.entries) else 0
+
+
+def main(argv=None, started=None):
+    """命令行主函数，返回进程退出码"""
+    entered = time.perf_counter()
+    started = started if started is not None else entered
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.dry_run and not args.run:
+        parser.error("--dry-run 需要与 --run 一起使用")
+
+    if args.export_metrics:
+        return export_metrics(args)
+    if args.ctl:
+        return control(args)
+    if args.daemon:
+        return run_daemon(args)
+
+    if not (args.list or args.run or args.search is not None):
+        # 没有命令行操作时打开图形界面
+        from launcher.gui import DesktopLauncher
+        DesktopLauncher(args.data, args.socket).run()
+        return 0
+
+    try:
+        records = load_records(args.data)
+    except (OSError, ValueError) as e:
+        print(f"加载数据失败: {e}", file=sys.stderr)
+        return 2
+    if records is None:
+        print(f"未找到历史数据文件: {args.data}", file=sys.stderr)
+        return 2
+
+    if args.timing:
+        print(f"导入耗时: {(entered - started) * 1000:.1f} ms，"
+              f"加载数据耗时: {(time.perf_counter() - entered) * 1000:.1f} ms", file=sys.stderr)
+
+    if args.list:
+        return list_records(records)
+    if args.search is not None:
+        return search_records(records, args.search)
+
+    record = find_record(records, args.run)
+    if record is None:
+        print(f"找不到历史记录: {args.run}", file=sys.stderr)
+        return 2
+    return run_record(record, args)
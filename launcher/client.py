@@ -0,0 +1,160 @@
+"""后台服务的客户端
+
+与后台服务（launcher/daemon.py）通过 Unix 套接字通信，每行一条 JSON：
+
+    请求  {"cmd": "run", "name": "记录名称"}
+    响应  {"ok": true, "run": 3}
+
+这个模块只依赖标准库中的 socket 和 json，快捷键或脚本调用时不会导入界面和启动引擎。
+连接后检查对方进程属于当前用户：/tmp 下的套接字路径可能被其他用户抢先占用。
+"""
+import json
+import os
+import socket
+import struct
+import tempfile
+
+CONNECT_TIMEOUT = 2.0
+REQUEST_TIMEOUT = 10.0
+
+
+class DaemonError(RuntimeError):
+    """无法连接后台服务或服务返回错误"""
+
+
+def default_socket_path():
+    """默认的套接字路径，优先放在 XDG_RUNTIME_DIR（只有当前用户可以访问）"""
+    runtime = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime and os.path.isdir(runtime):
+        return os.path.join(runtime, 'desktop-launcher.sock')
+    uid = os.getuid() if hasattr(os, 'getuid') else 0
+    return os.path.join(tempfile.gettempdir(), f'desktop-launcher-{uid}.sock')
+
+
+def check_owner(sock, socket_path):
+    """对方进程不属于当前用户时抛出 DaemonError；支持 SO_PEERCRED 时以进程为准，否则以套接字文件的所有者为准"""
+    if not hasattr(os, 'getuid'):
+        return
+    if hasattr(socket, 'SO_PEERCRED'):
+        _, uid, _ = struct.unpack('3i', sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i')))
+    else:
+        uid = os.stat(socket_path).st_uid
+    if uid != os.getuid():
+        raise DaemonError(f"{socket_path} 上的后台服务属于其他用户（uid {uid}），拒绝连接")
+
+
+class DaemonClient:
+    """保持一个连接，按顺序发送请求"""
+
+    def __init__(self, socket_path=None):
+        self.socket_path = socket_path or default_socket_path()
+        self._sock = None
+        self._reader = None
+
+    def connect(self):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise DaemonError("当前系统不支持 Unix 套接字")
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(self.socket_path)
+            check_owner(sock, self.socket_path)
+        except OSError as e:
+            sock.close()
+            raise DaemonError(f"无法连接后台服务 {self.socket_path}: {e}")
+        except DaemonError:
+            sock.close()
+            raise
+        sock.settimeout(REQUEST_TIMEOUT)
+        self._sock = sock
+        self._reader = sock.makefile('rb')
+        return self
+
+    def close(self):
+        if self._sock is not None:
+            self._reader.close()
+            self._sock.close()
+            self._sock = None
+
+    def __enter__(self):
+        return self.connect() if self._sock is None else self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def request(self, cmd, **params):
+        """发送一条命令并返回响应，服务返回错误时抛出 DaemonError"""
+        if self._sock is None:
+            self.connect()
+        message = dict(params, cmd=cmd)
+        try:
+            self._sock.sendall(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+            line = self._reader.readline()
+        except OSError as e:
+            self.close()
+            raise DaemonError(f"与后台服务通信失败: {e}")
+        if not line:
+            self.close()
+            raise DaemonError("后台服务已断开连接")
+        response = json.loads(line)
+        if not response.get('ok'):
+            raise DaemonError(response.get('error', "后台服务返回错误"))
+        return response
+
+
+def available(socket_path=None):
+    """后台服务是否在运行"""
+    try:
+        with DaemonClient(socket_path) as client:
+            client.request('ping')
+        return True
+    except DaemonError:
+        return False
+
+
+class RemoteRun:
+    """后台服务中的一次运行，控制方法与 engine.LaunchRun 相同，图形界面可以同样对待
+
+    state 由跟踪它的线程按 status 的结果更新；每个控制方法建立一个连接发送命令，失败时抛出 DaemonError。
+    """
+
+    PENDING = 'queued'
+    RUNNING = 'running'
+    PAUSED = 'paused'
+    CANCELLED = 'cancelled'
+    FINISHED = 'finished'
+    FAILED = 'failed'
+
+    def __init__(self, socket_path, run_id, name):
+        self.socket_path = socket_path
+        self.id = run_id
+        self.name = name
+        self.state = self.PENDING
+
+    @property
+    def active(self):
+        return self.state in (self.PENDING, self.RUNNING, self.PAUSED)
+
+    def _request(self, cmd):
+        with DaemonClient(self.socket_path) as client:
+            return client.request(cmd, run=self.id)
+
+    def pause(self):
+        if self._request('pause')['runs']:
+            self.state = self.PAUSED
+
+    def resume(self):
+        if self._request('resume')['runs']:
+            self.state = self.RUNNING
+
+    def skip_wait(self):
+        """返回涉及的运行编号列表，运行已经结束时返回 None"""
+        return self._request('skip')['runs'] or None
+
+    def cancel(self):
+        self._request('cancel')
+
+    def stop_processes(self):
+        """返回 (发出 SIGTERM 的数量, 强制结束的数量)"""
+        response = self._request('stop')
+        return response['terminated'], response['killed']
@@ -0,0 +1,388 @@
+"""常驻后台服务
+
+    桌面启动器.py --daemon                  启动后台服务
+    桌面启动器.py --ctl run "记录名称"       通过后台服务运行一条记录
+    桌面启动器.py --ctl status | children | records | shutdown
+    桌面启动器.py --ctl pause | resume | skip | cancel | stop [运行编号]
+
+后台服务把历史记录和启动引擎保留在内存中，通过 Unix 套接字接受命令（协议见 launcher/client.py），
+快捷键或脚本触发一条记录只需要几毫秒，不必每次启动解释器和界面。
+
+带 supervise 字段的项由后台服务一直守护，children 命令同时列出它们的守护状态。
+不同的记录可以同时运行，每次运行在自己的线程中执行；同一条记录已在运行时，重复的请求直接返回已有的运行编号。
+stop 取消运行并结束这次运行启动的所有程序（先 SIGTERM，仍未退出的再 SIGKILL）。
+数据文件被界面修改后，下一次运行前会自动重新读取。
+"""
+import collections
+import itertools
+import json
+import os
+import signal
+import socketserver
+import threading
+import time
+
+from launcher.capture import log_dir
+from launcher.client import available, default_socket_path
+from launcher.engine import LaunchEngine, RunListener
+from launcher.metrics import MetricsStore, Observer, metrics_file, run_events
+from launcher.storage import INDEX_SUFFIX, JOURNAL_SUFFIX, find_record, load_records
+from launcher.throttle import Throttle
+from launcher.tuning import DEFAULT_PERCENTILE, ReadinessEstimates, tuned_files
+
+# 保留最近多少次已结束的运行，供 status 查询
+RECENT_RUNS = 20
+
+
+class DaemonRun:
+    """后台服务中的一次运行"""
+
+    def __init__(self, run_id, name, record):
+        self.id = run_id
+        self.name = name
+        self.record = record
+        self.state = 'queued'  # queued / running / paused / finished / failed / cancelled
+        self.status = "准备中"
+        self.errors = []
+        self.total = len(record['files'])
+        self.launched = 0
+        self.cancelled = False
+        self.launch = None  # engine.LaunchRun
+        self.queued_at = time.time()
+        self.started = None
+        self.finished = None
+
+    def summary(self):
+        return {
+            'run': self.id,
+            'record': self.name,
+            'state': 'paused' if self.launch is not None and self.launch.state == self.launch.PAUSED else self.state,
+            'status': self.status,
+            'errors': list(self.errors),
+            'launched': self.launched,
+            'total': self.total,
+            'queued_at': self.queued_at,
+            'started': self.started,
+            'finished': self.finished,
+        }
+
+
+class DaemonListener(RunListener):
+    """把启动引擎的事件记录到 DaemonRun 中"""
+
+    def __init__(self, daemon, run, observer):
+        self.daemon = daemon
+        self.run = run
+        self.observer = observer
+
+    def on_status(self, text):
+        self.run.status = text
+
+    def on_wait(self, item, remaining):
+        self.run.status = f"等待 {remaining:.1f} 秒后运行第 {item.index} 个文件: {os.path.basename(item.path)}"
+
+    def on_throttle(self, item, reasons):
+        self.run.status = f"系统繁忙（{'，'.join(reasons)}），暂缓运行第 {item.index} 个文件: {os.path.basename(item.path)}"
+
+    def on_launch(self, info):
+        self.run.launched += 1
+        with self.daemon._lock:
+            self.daemon.owners[info] = self.run
+        self.observer.add(info)
+
+    def on_ready(self, item, ok):
+        if not ok:
+            self.run.errors.append(f"第 {item.index} 个文件就绪探测超时: {item.path}")
+
+    def on_error(self, item, message):
+        self.run.errors.append(f"第 {item.index} 个文件: {message}")
+
+
+class LauncherDaemon:
+    def __init__(self, data_file, socket_path=None):
+        self.data_file = data_file
+        self.socket_path = socket_path or default_socket_path()
+        self.engine = LaunchEngine(log_dir=log_dir(data_file))
+        self.metrics = MetricsStore(metrics_file(data_file))
+        self.owners = {}  # ProcessInfo -> DaemonRun
+        self.started = time.time()
+        self.server = None
+        self._records = None
+        self._signature = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._active = {}  # 运行编号 -> 进行中的 DaemonRun
+        self._recent = collections.deque(maxlen=RECENT_RUNS)
+
+    # ---- 历史记录 ----
+
+    def _data_signature(self):
+        signature = []
+        for path in (self.data_file, self.data_file + JOURNAL_SUFFIX, self.data_file + INDEX_SUFFIX):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def records(self):
+        """当前的历史记录，数据文件有变化时重新读取"""
+        signature = self._data_signature()
+        if signature != self._signature:
+            self._records = load_records(self.data_file) or []
+            self._signature = signature
+        return self._records
+
+    # ---- 命令 ----
+
+    def submit(self, name=None, record=None):
+        """加入一次运行，返回 (DaemonRun, 是否与已有的运行重复)"""
+        if record is None:
+            found = find_record(self.records(), name)
+            if found is None:
+                raise ValueError(f"找不到历史记录: {name}")
+            # 立即读取文件列表，之后数据文件再被修改也不影响这次运行（文件项只读，复制列表即可）
+            record = dict(found, files=list(found['files']))
+        name = name or record.get('name') or "未命名"
+        with self._lock:
+            for run in self._active.values():
+                if run.name == name and not run.cancelled:
+                    return run, True
+            run = DaemonRun(next(self._ids), name, record)
+            self._active[run.id] = run
+        threading.Thread(target=self._work, args=(run,), name=f'daemon-run-{run.id}', daemon=True).start()
+        return run, False
+
+    def _select(self, run_id, recent=False):
+        """run_id 对应的运行，不指定时为所有进行中的运行；recent 为 True 时也查找已结束的运行"""
+        with self._lock:
+            runs = list(self._active.values()) + (list(self._recent) if recent else [])
+        if run_id is None:
+            return [run for run in runs if run.id in self._active]
+        runs = [run for run in runs if run.id == run_id]
+        if not runs:
+            raise ValueError(f"找不到运行 #{run_id}")
+        return runs
+
+    def cancel(self, run_id=None):
+        """取消指定的运行，不指定时取消所有进行中的运行，返回被取消的编号"""
+        cancelled = []
+        for run in self._select(run_id):
+            with self._lock:
+                run.cancelled = True
+                launch = run.launch
+            if launch is not None:
+                launch.cancel()
+            cancelled.append(run.id)
+        return cancelled
+
+    def control(self, cmd, run_id=None):
+        """暂停、继续、跳过等待，返回涉及的运行编号"""
+        runs = [run for run in self._select(run_id) if run.launch is not None]
+        for run in runs:
+            if cmd == 'pause':
+                run.launch.pause()
+            elif cmd == 'resume':
+                run.launch.resume()
+            else:
+                run.launch.skip_wait()
+        return [run.id for run in runs]
+
+    def stop(self, run_id=None):
+        """取消运行并结束它启动的所有程序，可以是已经结束的运行"""
+        runs = self._select(run_id, recent=run_id is not None)
+        for run in runs:
+            with self._lock:
+                run.cancelled = True
+        terminated = killed = 0
+        for run in runs:
+            if run.launch is not None:
+                counts = run.launch.stop_processes()
+                terminated += counts[0]
+                killed += counts[1]
+        return {'runs': [run.id for run in runs], 'terminated': terminated, 'killed': killed}
+
+    def status(self, run_id=None):
+        with self._lock:
+            runs = sorted(list(self._recent) + list(self._active.values()), key=lambda run: run.id)
+        if run_id is not None:
+            for run in runs:
+                if run.id == run_id:
+                    return {'runs': [run.summary()]}
+            raise ValueError(f"找不到运行 #{run_id}")
+        return {'runs': [run.summary() for run in runs],
+                'uptime': time.time() - self.started,
+                'pid': os.getpid()}
+
+    def children(self):
+        children = []
+        for info in self.engine.running():
+            run = self.owners.get(info)
+            children.append({
+                'pid': info.pid,
+                'path': info.path,
+                'record': run.name if run else None,
+                'run': run.id if run else None,
+                'start_time': info.start_time,
+                'log': info.log_path,
+            })
+        supervised = []
+        if self.engine.supervisor is not None:
+            for entry in self.engine.supervisor.entries:
+                supervised.append({
+                    'path': entry.path,
+                    'state': entry.state,
+                    'status': entry.describe(),
+                    'restarts': entry.total_restarts,
+                    'pid': entry.process.pid if entry.process else None,
+                })
+        return {'children': children, 'supervised': supervised}
+
+    def handle(self, message):
+        """处理一条请求，返回响应"""
+        cmd = message.get('cmd')
+        if cmd == 'ping':
+            return {'pid': os.getpid()}
+        if cmd == 'run':
+            if not message.get('name') and not message.get('record'):
+                raise ValueError("run 命令需要 name 或 record")
+            run, duplicate = self.submit(message.get('name'), message.get('record'))
+            return {'run': run.id, 'duplicate': duplicate}
+        if cmd == 'cancel':
+            return {'cancelled': self.cancel(message.get('run'))}
+        if cmd in ('pause', 'resume', 'skip'):
+            return {'runs': self.control(cmd, message.get('run'))}
+        if cmd == 'stop':
+            return self.stop(message.get('run'))
+        if cmd == 'status':
+            return self.status(message.get('run'))
+        if cmd == 'children':
+            return self.children()
+        if cmd == 'records':
+            return {'records': [record['name'] for record in self.records()]}
+        if cmd == 'shutdown':
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {}
+        raise ValueError(f"未知的命令: {cmd}")
+
+    # ---- 运行 ----
+
+    def _work(self, run):
+        try:
+            self._execute(run)
+        except Exception as e:
+            run.state = 'failed'
+            run.errors.append(f"运行过程中发生错误: {e}")
+            run.status = "运行失败"
+        finally:
+            run.finished = time.time()
+            with self._lock:
+                del self._active[run.id]
+                self._recent.append(run)
+                idle = not self._active
+                if idle:
+                    # 其他运行的 on_launch 也在修改 owners，清理要在锁内进行
+                    for info in [info for info in self.owners if not info.running]:
+                        del self.owners[info]
+            if idle:
+                self.engine.prune()
+
+    def _execute(self, run):
+        record = run.record
+        run.state = 'running'
+        run.started = time.time()
+        files = record['files']
+        if record.get('adaptive'):
+            estimates = ReadinessEstimates(self.metrics.read())
+            files = tuned_files(files, estimates, record.get('adaptive_percentile', DEFAULT_PERCENTILE))
+        engine = self.engine
+        observer = Observer()
+        listener = DaemonListener(self, run, observer)
+        try:
+            launch = engine.create_run(engine.plan(files, listener), listener, run.name,
+                                       max_concurrent=record.get('max_concurrent'),
+                                       prefetch=record.get('prefetch', 0),
+                                       throttle=Throttle.from_config(record.get('throttle')))
+        except (TypeError, ValueError) as e:
+            run.state = 'failed'
+            run.status = f"启动配置错误: {e}"
+            return
+        with self._lock:
+            run.launch = launch
+            cancelled = run.cancelled
+        if cancelled:
+            # 取消请求在运行创建之前到达
+            launch.cancel()
+        result = launch.execute()
+        if run.cancelled:
+            run.state = 'cancelled'
+            run.status = f"已取消，启动了 {run.launched}/{run.total} 个文件"
+        else:
+            run.state = 'finished'
+            run.status = f"所有文件运行完成，用时 {result.duration:.1f} 秒"
+        # 观察期最长 10 秒，在单独的线程中等待
+        threading.Thread(target=self._record_metrics, args=(run, result, observer), daemon=True).start()
+
+    def _record_metrics(self, run, result, observer):
+        observer.finish()
+        try:
+            self.metrics.append(run_events(result, run.name))
+        except OSError as e:
+            run.errors.append(f"保存启动耗时统计失败: {e}")
+
+    # ---- 服务 ----
+
+    def _prepare_socket(self):
+        """清理上次异常退出留下的套接字文件，已有服务在运行时报错"""
+        if not os.path.exists(self.socket_path):
+            return
+        if available(self.socket_path):
+            raise RuntimeError(f"后台服务已在运行: {self.socket_path}")
+        os.unlink(self.socket_path)
+
+    def serve_forever(self):
+        if not hasattr(socketserver, 'ThreadingUnixStreamServer'):
+            raise RuntimeError("当前系统不支持 Unix 套接字，无法启动后台服务")
+        self._prepare_socket()
+        # 套接字只允许当前用户访问
+        old_umask = os.umask(0o077)
+        try:
+            self.server = _Server(self.socket_path, _Handler)
+        finally:
+            os.umask(old_umask)
+        self.server.launcher = self
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *args: threading.Thread(target=self.shutdown, daemon=True).start())
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+
+    def shutdown(self):
+        """停止接受命令，正在进行的运行不再启动后续文件，也不再重启被守护的程序"""
+        self.cancel()
+        if self.engine.supervisor is not None:
+            self.engine.supervisor.stop()
+        if self.server is not None:
+            self.server.shutdown()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                message = json.loads(line)
+                response = dict(self.server.launcher.handle(message), ok=True)
+            except Exception as e:
+                response = {'ok': False, 'error': str(e)}
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+
+
+if hasattr(socketserver, 'ThreadingUnixStreamServer'):
+    class _Server(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
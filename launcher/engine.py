@@ -0,0 +1,586 @@
+"""启动引擎
+
+与界面无关，图形界面和命令行都通过 LaunchEngine 运行文件列表：
+
+    engine = LaunchEngine(max_concurrent=4)
+    result = engine.run(files, listener)
+
+或者先用 engine.plan() 检查依赖关系，再用 engine.run_plan() 运行。
+run_plan() 在启动任何文件之前并行检查所有路径，缺失的文件一开始就报告出来；
+检查结果缓存在 stat_cache 中，图形界面和引擎共用同一个缓存。
+
+max_concurrent 限制同时处于"启动中"的程序数量。一个程序从创建进程开始占用名额，
+直到它就绪（有 probe 时以探测成功为准）、退出或经过 start_window 秒为止，
+避免几十个大型软件同时启动把磁盘拖垮。为 0 或 None 表示不限制。
+
+prefetch 为 N 时，每次等待延迟期间在后台预读接下来 N 项的程序文件（见 launcher/prefetch.py），
+总量不超过 prefetch_budget 字节。
+
+throttle 为 throttle.Throttle 时按系统负载调节启动节奏，delay 变为等待的上限。
+
+子进程的退出由一个事件循环统一等待（见 launcher/supervisor.py），
+带 supervise 字段的项退出后由 self.supervisor 按重启策略重新启动；
+带 capture 字段的项的输出也在这个循环中读取，写入 log_dir 中的日志文件（见 launcher/capture.py）。
+"""
+import itertools
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from launcher.graph import LaunchPlan
+from launcher.preflight import StatCache
+from launcher.prefetch import DEFAULT_BUDGET, Prefetcher, targets
+from launcher.scheduler import Scheduler
+
+DEFAULT_START_WINDOW = 3.0
+# 结束程序时先发 SIGTERM，等待多少秒后仍未退出的发 SIGKILL
+STOP_GRACE = 5.0
+# 每次运行可以单独指定的设置
+RUN_SETTINGS = ('max_concurrent', 'prefetch', 'throttle')
+
+
+class ProcessInfo:
+    """引擎启动的一个子进程"""
+
+    def __init__(self, item):
+        self.item = item
+        self.path = item.path
+        self.popen = None
+        self.pid = None
+        self.start_time = None  # 启动时刻（time.time()）
+        self.spawn_latency = None  # 创建进程耗时（秒）
+        self.spawned_at = None  # 创建进程完成的时刻（调度器的时钟，可以与 item.deadline 相减）
+        self.end_time = None
+        self.exit_code = None
+        self.ready_time = None  # 就绪探测成功的时刻（只有配置了 probe 的项才有）
+        self.peak_rss = None  # 峰值常驻内存（字节），由 metrics.Observer 采样
+        self.idle_time = None  # CPU 占用降下来的时刻，由 metrics.Observer 采样
+        self.settled = threading.Event()  # 已就绪或已退出，释放启动名额
+        self.exited = threading.Event()
+        self.supervised = None  # 被守护时对应的 supervisor.Supervised
+        self.log_path = None  # 捕获输出时的日志文件
+
+    @property
+    def running(self):
+        return self.popen is not None and self.exit_code is None
+
+    @property
+    def wall_time(self):
+        """从启动到退出（或到现在）的时长"""
+        if self.start_time is None:
+            return None
+        return (self.end_time or time.time()) - self.start_time
+
+
+class RunListener:
+    """运行过程的回调，默认什么都不做，按需覆盖"""
+
+    def on_status(self, text):
+        pass
+
+    def on_wait(self, item, remaining):
+        pass
+
+    def on_throttle(self, item, reasons):
+        pass
+
+    def on_launch(self, info):
+        pass
+
+    def on_ready(self, item, ok):
+        pass
+
+    def on_error(self, item, message):
+        pass
+
+    def on_exit(self, info):
+        pass
+
+    def on_supervise(self, supervised):
+        """被守护的项状态变化（running / restarting / stopped / failed），在事件循环线程中调用"""
+        pass
+
+
+class RunResult:
+    """一次运行的结果"""
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.items = plan.items
+        self.processes = []
+        self.errors = []  # [(item, message)]
+        self.prefetched = 0  # 等待期间预读的字节数
+        self.started = time.monotonic()
+        self.start_time = time.time()
+        self.finished = None
+
+    @property
+    def duration(self):
+        return (self.finished or time.monotonic()) - self.started
+
+
+def _group_owned(info):
+    """进程组编号是否仍属于这个程序
+
+    程序本身尚未被回收时它的 pid 不会被复用；组中还有进程时编号也不会被复用。
+    程序已经被回收后如果又有进程使用这个 pid，说明组中原来的进程都已退出、编号已被复用，
+    这时不能再向这个进程组发送信号。
+    """
+    if info.popen.returncode is None:
+        return True
+    try:
+        os.kill(info.pid, 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass
+    return False
+
+
+def signal_group(info, kill=False):
+    """向程序所在的会话发送 SIGTERM（kill 为 True 时发送 SIGKILL），返回是否发出"""
+    if info.popen is None:
+        return False
+    try:
+        if sys.platform == 'win32':
+            if not info.running:
+                return False
+            info.popen.kill() if kill else info.popen.terminate()
+        else:
+            if not _group_owned(info):
+                return False
+            os.killpg(info.pid, signal.SIGKILL if kill else signal.SIGTERM)
+        return True
+    except OSError:
+        return False
+
+
+def group_alive(info):
+    """程序或它在同一会话中的子进程是否还在运行"""
+    if sys.platform == 'win32':
+        return info.running
+    if not _group_owned(info):
+        return False
+    try:
+        os.killpg(info.pid, 0)
+        return True
+    except OSError:
+        return False
+
+
+def kill_remaining(infos, deadline):
+    """等待已经收到 SIGTERM 的程序退出，到 deadline 仍在运行的连同子进程强制结束，返回强制结束的数量"""
+    for info in infos:
+        info.exited.wait(max(0.0, deadline - time.monotonic()))
+    # 程序本身已经退出，但它的子进程可能还在处理 SIGTERM
+    remaining = [info for info in infos if group_alive(info)]
+    while remaining and time.monotonic() < deadline:
+        time.sleep(0.05)
+        remaining = [info for info in remaining if group_alive(info)]
+    return sum(signal_group(info, kill=True) for info in remaining)
+
+
+def spawn(path, resources=None, capture=False):
+    """启动文件，返回 Popen 对象；交给系统默认程序打开时可能返回 None
+
+    resources 为 resources.Resources 时按其设置启动（不支持的平台上抛出 ResourceError）。
+    capture 为 True 时 stdout 和 stderr 接到管道上，由调用方负责读取。
+    每个程序放在自己的会话（Windows 上是进程组）中，结束运行时可以连同它的子进程一起结束，
+    在终端中按 Ctrl+C 也不会影响已经启动的程序。
+    """
+    wrap = resources.command if resources is not None else list
+    options = {'stdout': subprocess.PIPE, 'stderr': subprocess.PIPE} if capture else {}
+    if sys.platform == 'win32':
+        options['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP
+        if path.lower().endswith(('.exe', '.bat', '.cmd')):
+            return subprocess.Popen(wrap([path]), **options)
+        # 交给系统默认程序打开时无法应用资源设置，有设置时这里会抛出 ResourceError
+        wrap([path])
+        # 使用系统默认程序打开
+        os.startfile(path)
+        return None
+    options['start_new_session'] = True
+    if os.access(path, os.X_OK) and not os.path.isdir(path):
+        return subprocess.Popen(wrap([path]), **options)
+    opener = 'open' if sys.platform == 'darwin' else 'xdg-open'
+    return subprocess.Popen(wrap([opener, path]), **options)
+
+
+class LaunchEngine:
+    """按计划启动文件并跟踪子进程"""
+
+    def __init__(self, max_concurrent=None, start_window=DEFAULT_START_WINDOW, stat_cache=None,
+                 prefetch=0, prefetch_budget=DEFAULT_BUDGET, throttle=None, log_dir=None):
+        self.max_concurrent = max_concurrent or None
+        self.throttle = throttle
+        self.start_window = start_window
+        self.prefetch = prefetch
+        self.prefetch_budget = prefetch_budget
+        self.stat_cache = stat_cache or StatCache()
+        self.log_dir = log_dir  # 捕获的输出写到这里，为 None 时使用临时目录
+        self.output = None
+        self.processes = []  # 所有启动过的进程
+        self.runs = []  # 进行中的运行（LaunchRun）
+        self.loop = None
+        self.supervisor = None
+        self._lock = threading.Lock()
+
+    def event_loop(self):
+        """等待子进程退出的事件循环，第一次使用时创建"""
+        with self._lock:
+            if self.loop is None:
+                from launcher.supervisor import EventLoop
+                self.loop = EventLoop()
+            return self.loop
+
+    def _output(self):
+        loop = self.event_loop()
+        with self._lock:
+            if self.output is None:
+                import tempfile
+                from launcher.capture import OutputCapture
+                directory = self.log_dir or os.path.join(tempfile.gettempdir(), 'desktop-launcher-logs')
+                self.output = OutputCapture(loop, directory)
+            return self.output
+
+    def log_tail(self, seq=0):
+        """捕获的输出中序号大于 seq 的行，见 capture.RingBuffer"""
+        return self.output.ring.since(seq) if self.output is not None else []
+
+    def _supervisor(self):
+        if self.supervisor is None:
+            from launcher.supervisor import Supervisor
+            self.supervisor = Supervisor(self)
+        return self.supervisor
+
+    def running(self):
+        """仍在运行的子进程"""
+        with self._lock:
+            return [info for info in self.processes if info.running]
+
+    def attached(self):
+        """仍在运行、并且依赖启动器进程的程序：输出由启动器读取（启动器退出后再输出会收到 SIGPIPE）
+        或由启动器守护（启动器退出后不再重启）"""
+        return [info for info in self.running() if info.log_path is not None or info.supervised is not None]
+
+    def stop_attached(self, grace=STOP_GRACE):
+        """停止守护并结束 attached() 中的程序，返回 (发出 SIGTERM 的数量, 强制结束的数量)"""
+        if self.supervisor is not None:
+            self.supervisor.stop()
+        infos = self.attached()
+        deadline = time.monotonic() + grace
+        terminated = sum(signal_group(info) for info in infos)
+        return terminated, kill_remaining(infos, deadline)
+
+    def prune(self):
+        """丢弃已经退出的进程记录（长时间运行的后台服务中使用）"""
+        with self._lock:
+            self.processes = [info for info in self.processes if info.running]
+        if self.supervisor is not None:
+            self.supervisor.prune()
+
+    def stop(self):
+        """取消所有进行中的运行，尚未启动的文件不再启动"""
+        for run in self.active_runs():
+            run.cancel()
+
+    def active_runs(self):
+        with self._lock:
+            return list(self.runs)
+
+    def plan(self, files, listener=None):
+        """检查依赖关系并生成启动计划，配置有误时抛出 ValueError"""
+        listener = listener or RunListener()
+        return LaunchPlan(files, on_ready=lambda item, ok: self._on_ready(item, ok, listener))
+
+    def run(self, files, listener=None):
+        """运行文件列表，阻塞到所有文件都已启动"""
+        listener = listener or RunListener()
+        return self.run_plan(self.plan(files, listener), listener)
+
+    def create_run(self, plan, listener=None, name=None, **settings):
+        """为计划创建一次运行，在任意线程中调用 execute() 执行，其他线程可以暂停、取消
+
+        settings 可以为这次运行指定 max_concurrent、prefetch、throttle，没有指定的使用引擎的设置。
+        """
+        unknown = set(settings) - set(RUN_SETTINGS)
+        if unknown:
+            raise TypeError(f"未知的运行设置: {', '.join(sorted(unknown))}")
+        return LaunchRun(self, plan, listener or RunListener(), name, settings)
+
+    def preflight(self, plan, listener=None):
+        """并行检查计划中的所有路径，返回无法启动的项"""
+        listener = listener or RunListener()
+        checks = self.stat_cache.check_many(item.path for item in plan.items)
+        failed = []
+        for item in plan.items:
+            item.check = checks[item.path]
+            if not item.check.ok:
+                failed.append(item)
+                listener.on_error(item, f"{item.check.problem}: {item.path}")
+        return failed
+
+    def run_plan(self, plan, listener=None):
+        """运行已经生成的启动计划，阻塞到所有文件都已启动"""
+        return self.create_run(plan, listener).execute()
+
+    def launch(self, info, run):
+        """启动一项，返回是否成功（由 LaunchRun 在调度线程或工作线程中调用）"""
+        plan, listener = run.plan, run.listener
+        item = info.item
+        item.actual = run.scheduler.clock.now()
+        if item.blocked:
+            run.fail(item, f"{item.blocked}，不再运行: {item.path}")
+            return False
+        listener.on_status(f"正在运行第 {item.index}/{len(plan.items)} 个文件: {os.path.basename(item.path)}"
+                           f" (偏差 {item.jitter * 1000:+.0f} ms)")
+
+        # 延迟期间文件可能被删除或恢复，这里再查一次（ttl 内直接使用缓存）
+        reported = item.check is not None and not item.check.ok
+        item.check = self.stat_cache.check(item.path)
+        if not item.check.ok:
+            if reported:
+                # 运行开始时已经报告过
+                plan.launched(item, ok=False)
+            else:
+                run.fail(item, f"{item.check.problem}: {item.path}")
+            return False
+
+        try:
+            info.start_time = time.time()
+            begin = time.perf_counter()
+            info.popen = spawn(item.path, plan.resources[item], capture=plan.capture[item] is not None)
+            info.spawn_latency = time.perf_counter() - begin
+            info.spawned_at = run.scheduler.clock.now()
+        except Exception as e:
+            run.fail(item, f"无法运行文件 {item.path}:\n{str(e)}")
+            return False
+
+        with self._lock:
+            self.processes.append(info)
+            run.result.processes.append(info)
+            run.spawned.append(info)
+        if info.popen is None:
+            info.settled.set()
+        else:
+            info.pid = info.popen.pid
+            if plan.capture[item] is not None:
+                info.log_path = self._output().attach(info, plan.capture[item])
+            policy = plan.supervision[item]
+            if policy is not None:
+                info.supervised = self._supervisor().add(info, policy, plan.resources[item], listener, run)
+            self._watch_exit(info, listener)
+        listener.on_launch(info)
+        plan.launched(item)
+        return True
+
+    def respawn(self, supervised):
+        """重新启动被守护的项（由 supervisor 调用），返回新的 ProcessInfo"""
+        from launcher.capture import capture_options
+
+        item = supervised.item
+        capture = capture_options(item.entry.get('capture'))
+        info = ProcessInfo(item)
+        info.start_time = time.time()
+        begin = time.perf_counter()
+        info.popen = spawn(item.path, supervised.resources, capture=capture is not None)
+        info.spawn_latency = time.perf_counter() - begin
+        if info.popen is None:
+            raise RuntimeError("由系统默认程序打开的文件无法守护")
+        info.pid = info.popen.pid
+        if capture is not None:
+            info.log_path = self._output().attach(info, capture)
+        info.supervised = supervised
+        item.process = info
+        with self._lock:
+            self.processes.append(info)
+            supervised.run.spawned.append(info)
+        self._watch_exit(info, supervised.listener)
+        return info
+
+    def _watch_exit(self, info, listener):
+        self.event_loop().watch_exit(info.popen, lambda code: self._exited(info, code, listener))
+
+    def _exited(self, info, code, listener):
+        info.exit_code = code
+        info.end_time = time.time()
+        info.settled.set()
+        info.exited.set()
+        listener.on_exit(info)
+        if info.supervised is not None:
+            self.supervisor.exited(info.supervised, info)
+
+    def _on_ready(self, item, ok, listener):
+        # 没有 probe 的项启动即算就绪，名额仍要占到退出或 start_window 结束
+        info = item.process
+        if info is not None and item.entry.get('probe'):
+            if ok:
+                info.ready_time = time.time()
+            info.settled.set()
+        listener.on_ready(item, ok)
+
+
+class LaunchRun:
+    """一次运行，可以在其他线程中暂停、继续、取消、跳过当前等待，或结束它启动的所有程序"""
+
+    _ids = itertools.count(1)
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    PAUSED = 'paused'
+    CANCELLED = 'cancelled'
+    FINISHED = 'finished'
+
+    def __init__(self, engine, plan, listener, name=None, settings=None):
+        self.id = next(self._ids)
+        self.engine = engine
+        self.plan = plan
+        self.listener = listener
+        self.name = name
+        self.result = RunResult(plan)
+        self.spawned = []  # 这次运行启动的所有进程（包括守护重启的）
+        self.state = self.PENDING
+        self.done = threading.Event()
+        # 创建时确定设置，之后修改引擎的设置不影响这次运行
+        settings = settings or {}
+        self.max_concurrent = settings.get('max_concurrent', engine.max_concurrent) or None
+        self.prefetch = settings.get('prefetch', engine.prefetch)
+        self.prefetcher = None
+        self.scheduler = Scheduler(self._launch_batch, on_wait=self._on_wait,
+                                   throttle=settings.get('throttle', engine.throttle),
+                                   on_throttle=listener.on_throttle)
+        self.pool = None
+
+    @property
+    def active(self):
+        return not self.done.is_set()
+
+    def execute(self):
+        """运行到所有文件都已启动或被取消，返回 RunResult"""
+        engine = self.engine
+        with engine._lock:
+            engine.runs.append(self)
+        if self.state == self.PENDING:
+            self.state = self.RUNNING
+        try:
+            for item in engine.preflight(self.plan, self.listener):
+                self.result.errors.append((item, f"{item.check.problem}: {item.path}"))
+            if self.max_concurrent:
+                # 线程池只在限制并发时才需要，延迟导入以缩短命令行启动时间
+                from concurrent.futures import ThreadPoolExecutor
+                self.pool = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix='launch')
+            if self.prefetch:
+                self.prefetcher = Prefetcher(engine.prefetch_budget)
+            self.plan.start(self.scheduler)
+            self.scheduler.run()
+        finally:
+            if self.pool:
+                # 取消后丢弃还在排队的项；已经开始的任务在启动前会检查是否已取消
+                self.pool.shutdown(wait=True, cancel_futures=self.scheduler.stopped)
+            if self.prefetcher:
+                self.prefetcher.close()
+                self.result.prefetched = self.prefetcher.bytes
+            self.result.finished = time.monotonic()
+            if self.state != self.CANCELLED:
+                self.state = self.FINISHED
+            with engine._lock:
+                engine.runs.remove(self)
+            self.done.set()
+        return self.result
+
+    def _launch_batch(self, batch):
+        for item in batch:
+            info = item.process = ProcessInfo(item)
+            if self.pool:
+                self.pool.submit(self._launch_and_settle, info)
+            elif self.scheduler.proceed():
+                self.engine.launch(info, self)
+
+    def _launch_and_settle(self, info):
+        """在工作线程中启动，并占用名额直到程序就绪、退出或超时
+
+        排队等待名额期间运行可能被暂停或取消：暂停时等到继续再启动，取消后不再启动。
+        """
+        if not self.scheduler.proceed():
+            return
+        if self.engine.launch(info, self) and not self.scheduler.stopped:
+            info.settled.wait(self.engine.start_window)
+
+    def _on_wait(self, item, remaining):
+        self.listener.on_wait(item, remaining)
+        if self.prefetcher is not None:
+            self.prefetcher.request(path for upcoming in self._upcoming(item) for path in targets(upcoming))
+
+    def _upcoming(self, item):
+        """正在等待的项以及它之后尚未启动的项，共 prefetch 个"""
+        upcoming = [item]
+        for other in self.plan.items[item.index:]:
+            if len(upcoming) >= self.prefetch:
+                break
+            if not other.launched:
+                upcoming.append(other)
+        return upcoming
+
+    def fail(self, item, message):
+        self.result.errors.append((item, message))
+        self.listener.on_error(item, message)
+        self.plan.launched(item, ok=False)
+
+    # ---- 控制（可以在任意线程中调用） ----
+
+    def pause(self):
+        """暂停：到期的项不再启动，继续后剩余的等待时间不变"""
+        if self.active and self.state in (self.PENDING, self.RUNNING):
+            self.scheduler.pause()
+            self.state = self.PAUSED
+            self.listener.on_status("运行已暂停")
+
+    def resume(self):
+        if self.state == self.PAUSED:
+            self.state = self.RUNNING
+            self.scheduler.resume()
+            self.listener.on_status("运行已继续")
+
+    def skip_wait(self):
+        """跳过当前的等待，马上启动下一项"""
+        item = self.scheduler.skip()
+        if item is not None:
+            self.listener.on_status(f"跳过等待，马上运行第 {item.index} 个文件: {os.path.basename(item.path)}")
+        return item
+
+    def cancel(self):
+        """取消运行，尚未启动的文件不再启动，已经启动的程序保持运行"""
+        if self.active:
+            self.state = self.CANCELLED
+            self.scheduler.stop()
+            # 不再有项等待名额，占着名额的工作线程马上结束
+            with self.engine._lock:
+                for info in self.spawned:
+                    info.settled.set()
+
+    def _live_processes(self):
+        with self.engine._lock:
+            infos = [info for info in self.spawned if info.popen is not None]
+        return [info for info in infos if info.running or group_alive(info)]
+
+    def stop_processes(self, grace=STOP_GRACE):
+        """取消运行并结束它启动的所有程序（连同它们的子进程）：
+        先发 SIGTERM，grace 秒后仍在运行的发 SIGKILL，返回 (发出 SIGTERM 的数量, 强制结束的数量)"""
+        self.cancel()
+        if self.engine.supervisor is not None:
+            self.engine.supervisor.stop(run=self)
+        deadline = time.monotonic() + grace
+        with self.engine._lock:
+            executing = self in self.engine.runs
+        infos = self._live_processes()
+        terminated = sum(signal_group(info) for info in infos)
+        if executing:
+            # 工作线程可能在取消之前已经开始创建进程，等运行结束后补上取快照之后才创建的进程
+            self.done.wait(max(0.0, deadline - time.monotonic()))
+            late = [info for info in self._live_processes() if info not in infos]
+            terminated += sum(signal_group(info) for info in late)
+            infos += late
+        return terminated, kill_remaining(infos, deadline)
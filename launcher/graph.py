@@ -0,0 +1,209 @@
+"""启动依赖图
+
+文件项可以用 after 字段列出它依赖的项（填写对方的 id 或路径）：
+
+    {"path": "C:/app/client.exe", "delay": 15, "after": ["db"]}
+    {"id": "db", "path": "C:/db/db.exe", "delay": 0,
+     "probe": {"type": "port", "port": 5432}}
+
+带 after 字段的项在所有依赖都就绪后立即启动（依赖项有 probe 时以探测成功为准，
+否则启动即就绪），delay 只作为兜底：依赖全部启动 delay 秒后仍未就绪也照常启动，
+delay 为 0 表示一直等到就绪（探测本身有超时）。after 为空列表表示不依赖任何项，
+在运行开始 delay 秒后启动。没有 after 字段的项保持原有的 schedule 语义。
+互不依赖的分支会并行推进。
+
+依赖项启动失败（文件不存在、无法创建进程）时不算就绪：依赖它的项等到兜底截止时间再启动，
+delay 为 0（没有兜底）的项不再启动，报告为失败，依赖它们的项再依次按同样的规则处理。
+"""
+import importlib
+import threading
+
+from launcher.scheduler import LaunchItem, OFFSET
+
+# 文件项中的可选设置 -> (解析它的模块, 函数)；只有用到某个设置时才导入对应模块，
+# 不使用这些设置的 --run 不必付出导入 supervisor（selectors、socket 等）的开销
+OPTION_PARSERS = {
+    'probe': ('launcher.probes', 'make_probe'),
+    'resources': ('launcher.resources', 'make_resources'),
+    'supervise': ('launcher.supervisor', 'make_policy'),
+    'capture': ('launcher.capture', 'capture_options'),
+}
+
+
+class DependencyError(ValueError):
+    """依赖配置错误"""
+
+
+class DependencyCycleError(DependencyError):
+    """依赖关系中存在环"""
+
+    def __init__(self, cycle):
+        self.cycle = cycle
+        chain = ' -> '.join(item.name for item in cycle)
+        super().__init__(f"启动依赖存在循环: {chain}")
+
+
+def _resolve(items):
+    """解析每一项的依赖，返回 {item: [依赖项]}"""
+    by_key = {}
+    for item in items:
+        keys = {item.path}
+        if item.entry.get('id'):
+            keys.add(item.entry['id'])
+        for key in keys:
+            by_key.setdefault(key, []).append(item)
+
+    deps = {}
+    previous = None
+    for item in items:
+        after = item.entry.get('after')
+        if after is None:
+            # 顺序项隐式依赖上一项的启动
+            deps[item] = [previous] if previous is not None and item.mode != OFFSET else []
+        else:
+            if isinstance(after, str):
+                after = [after]
+            resolved = []
+            for key in after:
+                targets = by_key.get(key)
+                if not targets:
+                    raise DependencyError(f"第 {item.index} 项依赖的 '{key}' 不存在")
+                if len(targets) > 1:
+                    raise DependencyError(f"第 {item.index} 项依赖的 '{key}' 对应多个文件项，请为它们设置 id")
+                resolved.append(targets[0])
+            deps[item] = resolved
+        previous = item
+    return deps
+
+
+def parse_option(items, key):
+    """解析每一项的 key 设置，返回 {item: 解析结果或 None}"""
+    if not any(item.entry.get(key) for item in items):
+        return dict.fromkeys(items)
+    module, name = OPTION_PARSERS[key]
+    parse = getattr(importlib.import_module(module), name)
+    return {item: parse(item.entry.get(key)) for item in items}
+
+
+def find_cycle(deps):
+    """在依赖图中查找一个环，没有则返回 None"""
+    WHITE, GREY, BLACK = 0, 1, 2
+    color = {item: WHITE for item in deps}
+    for root in deps:
+        if color[root] != WHITE:
+            continue
+        # 迭代式深度优先搜索，避免长链导致递归过深
+        path = [root]
+        stack = [iter(deps[root])]
+        color[root] = GREY
+        while stack:
+            dep = next(stack[-1], None)
+            if dep is None:
+                color[path.pop()] = BLACK
+                stack.pop()
+            elif color[dep] == GREY:
+                return path[path.index(dep):] + [dep]
+            elif color[dep] == WHITE:
+                color[dep] = GREY
+                path.append(dep)
+                stack.append(iter(deps[dep]))
+    return None
+
+
+class LaunchPlan:
+    """把依赖图转换成调度器中的截止时间
+
+    on_ready(item, ok) 在某一项就绪（ok 为 True）或探测超时（ok 为 False）时调用。
+    """
+
+    def __init__(self, entries, on_ready=None):
+        self.items = [LaunchItem(i, entry) for i, entry in enumerate(entries, 1)]
+        self.on_ready = on_ready
+        self.deps = _resolve(self.items)
+        cycle = find_cycle(self.deps)
+        if cycle:
+            raise DependencyCycleError(cycle)
+        self.probes = parse_option(self.items, 'probe')
+        self.resources = parse_option(self.items, 'resources')
+        self.supervision = parse_option(self.items, 'supervise')
+        self.capture = parse_option(self.items, 'capture')
+        self.dependents = {item: [] for item in self.items}
+        for item, deps in self.deps.items():
+            for dep in deps:
+                self.dependents[dep].append(item)
+        self.ready = set()
+        self.scheduler = None
+        self._lock = threading.Lock()
+
+    def _graph_item(self, item):
+        return item.entry.get('after') is not None
+
+    def start(self, scheduler):
+        """把没有依赖的项放入调度器，其余项登记为待定"""
+        self.scheduler = scheduler
+        start = scheduler.clock.now()
+        roots = [item for item in self.items if not self.deps[item]]
+        scheduler.expect(len(self.items))
+        if scheduler.throttle is not None:
+            # 先采样一次，第一项到期时才能算出压力比例
+            scheduler.throttle.sample()
+        for item in roots:
+            self._schedule(item, start)
+
+    def _schedule(self, item, base):
+        """按 delay 在 base 之后启动；按负载调节时 delay 是上限，系统不忙可以提前到下限"""
+        throttle = self.scheduler.throttle
+        if throttle is None or item.delay <= 0:
+            self.scheduler.schedule(item, base + item.delay)
+            return
+        item.latest = base + item.delay
+        self.scheduler.schedule(item, base + throttle.earliest(item))
+
+    def launched(self, item, ok=True):
+        """某一项已经启动（ok 为 False 表示启动失败）"""
+        for dependent in self.dependents[item]:
+            if self._graph_item(dependent):
+                deps = self.deps[dependent]
+                if dependent.delay > 0 and all(dep.launched for dep in deps):
+                    # 兜底截止时间：依赖全部启动 delay 秒后
+                    fallback = max(dep.deadline for dep in deps) + dependent.delay
+                    self.scheduler.schedule(dependent, fallback)
+            else:
+                self._schedule(dependent, item.deadline)
+        self._watch(item, ok)
+
+    def _watch(self, item, ok):
+        """等待刚启动的项就绪"""
+        if not ok:
+            self._failed(item)
+            return
+        probe = self.probes[item]
+        if probe is None:
+            self._mark_ready(item, True)
+            return
+        probe.start()
+
+        def wait_ready():
+            self._mark_ready(item, probe.wait(cancelled=lambda: self.scheduler.stopped))
+
+        threading.Thread(target=wait_ready, daemon=True).start()
+
+    def _mark_ready(self, item, ok):
+        if self.on_ready:
+            self.on_ready(item, ok)
+        with self._lock:
+            self.ready.add(item)
+            due = [dependent for dependent in self.dependents[item]
+                   if self._graph_item(dependent)
+                   and all(dep in self.ready for dep in self.deps[dependent])]
+        now = self.scheduler.clock.now()
+        for dependent in due:
+            self.scheduler.schedule(dependent, now)
+
+    def _failed(self, item):
+        """启动失败的项（失败已经由启动方报告）：不算就绪，没有兜底截止时间的依赖项马上出队并标记为失败"""
+        now = self.scheduler.clock.now()
+        for dependent in self.dependents[item]:
+            if self._graph_item(dependent) and dependent.delay <= 0:
+                dependent.blocked = f"依赖的第 {item.index} 项启动失败"
+                self.scheduler.schedule(dependent, now)
@@ -0,0 +1,1431 @@
+"""图形界面"""
+import os
+import sys
+import time
+import threading
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox, simpledialog
+
+from launcher.capture import RING_LINES, log_dir
+from launcher.client import DaemonClient, DaemonError, RemoteRun, available
+from launcher.engine import LaunchEngine, LaunchRun, RunListener
+from launcher.metrics import MetricsStore, Observer, metrics_file, run_events, summarize
+from launcher.preflight import StatCache
+from launcher.prefetch import DEFAULT_LOOKAHEAD
+from launcher.scheduler import jitter_summary
+from launcher.search import PATH_PREFIX, SearchIndex, matching_files, matching_positions, scan
+from launcher.storage import DEFAULT_DATA_FILE, RecordStore, file_count
+from launcher.supervisor import FAILED, RESTARTING
+from launcher.resources import ResourceError, make_resources
+from launcher.throttle import Throttle
+from launcher.treerows import TreeRows
+from launcher.tuning import DEFAULT_PERCENTILE, ReadinessEstimates, report, tuned_files
+from launcher.uichannel import UiChannel
+
+
+# 有消息时每帧取一次后台消息，空闲时降低频率
+FRAME_MS = 16
+IDLE_MS = 100
+# 交给后台服务运行时查询状态的间隔（秒）
+DAEMON_POLL = 0.2
+# 后台建立搜索索引时每处理多少条记录让出一次 GIL，界面保持响应
+INDEX_BATCH = 500
+
+# 日志窗口打开时取新输出的间隔（毫秒）
+LOG_POLL_MS = 250
+
+RUN_STATE_NAMES = {
+    LaunchRun.PENDING: "准备中",
+    LaunchRun.RUNNING: "运行中",
+    LaunchRun.PAUSED: "已暂停",
+    LaunchRun.CANCELLED: "已取消",
+    LaunchRun.FINISHED: "已完成",
+    RemoteRun.PENDING: "排队中",
+    RemoteRun.FAILED: "失败",
+}
+
+
+class GuiRunListener(RunListener):
+    """把启动引擎的事件转发到界面消息通道（在后台线程中调用）"""
+    
+    def __init__(self, ui, observer=None, on_supervise=None):
+        self.ui = ui
+        self.observer = observer
+        self.supervise_callback = on_supervise
+        self.errors = 0
+    
+    def on_launch(self, info):
+        if self.observer is not None:
+            self.observer.add(info)
+    
+    def on_status(self, text):
+        self.ui.status(text)
+    
+    def on_wait(self, item, remaining):
+        self.ui.status(f"等待 {remaining:.1f} 秒后运行第 {item.index} 个文件: {os.path.basename(item.path)}")
+    
+    def on_throttle(self, item, reasons):
+        self.ui.status(f"系统繁忙（{'，'.join(reasons)}），暂缓运行第 {item.index} 个文件: {os.path.basename(item.path)}")
+    
+    def on_ready(self, item, ok):
+        if ok:
+            self.ui.status(f"第 {item.index} 个文件已就绪: {os.path.basename(item.path)}")
+        else:
+            self.ui.status(f"第 {item.index} 个文件就绪探测超时，继续启动后续文件: {os.path.basename(item.path)}")
+            self.ui.error(f"第 {item.index} 个文件就绪探测超时: {item.path}")
+    
+    def on_error(self, item, message):
+        self.errors += 1
+        self.ui.error(f"第 {item.index} 个文件: {message}")
+    
+    def on_supervise(self, supervised):
+        if self.supervise_callback is not None:
+            self.ui.call(self.supervise_callback, supervised)
+
+
+class RunReport:
+    """运行报告面板
+
+    汇总运行过程中的错误，非模态窗口，不会阻塞界面，也不会让后台线程等待。
+    关闭后内容保留，可以通过"运行报告"按钮再次打开。
+    """
+    
+    def __init__(self, root):
+        self.root = root
+        self.window = None
+        self.text = None
+        self.count = 0
+    
+    def _create(self):
+        self.window = tk.Toplevel(self.root)
+        self.window.title("运行报告")
+        self.window.geometry("700x300")
+        self.window.protocol("WM_DELETE_WINDOW", self.window.withdraw)
+        
+        frame = tk.Frame(self.window)
+        frame.pack(fill='both', expand=True, padx=10, pady=10)
+        self.text = tk.Text(frame, wrap='word', state='disabled', font=('Microsoft YaHei', 10))
+        scroll = ttk.Scrollbar(frame, orient='vertical', command=self.text.yview)
+        self.text.configure(yscrollcommand=scroll.set)
+        self.text.pack(side='left', fill='both', expand=True)
+        scroll.pack(side='right', fill='y')
+        
+        buttons = tk.Frame(self.window)
+        buttons.pack(fill='x', padx=10, pady=(0, 10))
+        tk.Button(buttons, text="清空", command=self.clear, width=8).pack(side='right', padx=5)
+        tk.Button(buttons, text="关闭", command=self.window.withdraw, width=8).pack(side='right')
+    
+    def show(self):
+        if self.window is None:
+            self._create()
+        self.window.deiconify()
+        self.window.lift()
+    
+    def add(self, messages):
+        """追加错误信息，第一次出现错误时打开面板"""
+        if self.window is None or self.count == 0:
+            self.show()
+        timestamp = time.strftime("%H:%M:%S")
+        self.text.configure(state='normal')
+        self.text.insert('end', ''.join(f"[{timestamp}] {message}\n" for message in messages))
+        self.text.configure(state='disabled')
+        self.text.see('end')
+        self.count += len(messages)
+    
+    def clear(self):
+        self.count = 0
+        if self.text is not None:
+            self.text.configure(state='normal')
+            self.text.delete('1.0', 'end')
+            self.text.configure(state='disabled')
+
+
+class MetricsView:
+    """启动耗时统计窗口，按文件显示某条记录历次运行的 p50/p95 耗时"""
+    
+    COLUMNS = ('序号', '文件', '次数', '失败', '创建进程(ms)', '就绪或退出(秒)', '峰值内存(MB)')
+    
+    def __init__(self, root, metrics, ui):
+        self.root = root
+        self.metrics = metrics
+        self.ui = ui
+        self.window = None
+        self.tree = None
+        self.record_name = None
+    
+    def _create(self):
+        self.window = tk.Toplevel(self.root)
+        self.window.geometry("900x300")
+        self.window.protocol("WM_DELETE_WINDOW", self.window.withdraw)
+        
+        frame = tk.Frame(self.window)
+        frame.pack(fill='both', expand=True, padx=10, pady=10)
+        self.tree = ttk.Treeview(frame, columns=self.COLUMNS, show='headings')
+        for column in self.COLUMNS:
+            self.tree.heading(column, text=column)
+            self.tree.column(column, width=90, anchor='center')
+        self.tree.column('文件', width=360, anchor='w')
+        scroll = ttk.Scrollbar(frame, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scroll.set)
+        self.tree.pack(side='left', fill='both', expand=True)
+        scroll.pack(side='right', fill='y')
+    
+    def show(self, record_name):
+        if self.window is None:
+            self._create()
+        self.record_name = record_name
+        self.window.title(f"启动耗时统计 - {record_name}")
+        self.window.deiconify()
+        self.window.lift()
+        self.refresh()
+    
+    def refresh(self):
+        """在后台读取统计文件，读完后在 Tk 线程中更新表格"""
+        if self.window is None or not self.window.winfo_viewable():
+            return
+        record_name = self.record_name
+        
+        def read_in_thread():
+            try:
+                summary = summarize(self.metrics.read(record_name))
+            except Exception as e:
+                self.ui.error(f"读取启动耗时统计失败: {str(e)}")
+                return
+            self.ui.call(self._fill, record_name, summary)
+        
+        threading.Thread(target=read_in_thread, daemon=True).start()
+    
+    def _fill(self, record_name, summary):
+        if record_name != self.record_name:
+            return
+        self.tree.delete(*self.tree.get_children())
+        for position, (path, stats) in enumerate(summary.items(), 1):
+            self.tree.insert('', 'end', values=(
+                position, path, stats['runs'], stats['errors'],
+                _pair(stats['spawn_p50'], stats['spawn_p95'], 1000, "{:.0f}"),
+                _pair(stats['settle_p50'], stats['settle_p95'], 1, "{:.1f}"),
+                "" if stats['peak_rss'] is None else f"{stats['peak_rss'] / 1024 / 1024:.0f}"))
+
+
+class LogView:
+    """程序输出窗口，显示启动引擎环形缓冲区中最近的输出"""
+    
+    def __init__(self, root, engine):
+        self.root = root
+        self.engine = engine
+        self.window = None
+        self.text = None
+        self.seq = 0  # 已经显示到的行号
+    
+    def _create(self):
+        self.window = tk.Toplevel(self.root)
+        self.window.title("程序输出")
+        self.window.geometry("900x400")
+        self.window.protocol("WM_DELETE_WINDOW", self.window.withdraw)
+        
+        frame = tk.Frame(self.window)
+        frame.pack(fill='both', expand=True, padx=10, pady=10)
+        self.text = tk.Text(frame, wrap='none', state='disabled', font=('Consolas', 10))
+        self.text.tag_configure('stderr', foreground='#e74c3c')
+        scroll = ttk.Scrollbar(frame, orient='vertical', command=self.text.yview)
+        self.text.configure(yscrollcommand=scroll.set)
+        self.text.pack(side='left', fill='both', expand=True)
+        scroll.pack(side='right', fill='y')
+        
+        buttons = tk.Frame(self.window)
+        buttons.pack(fill='x', padx=10, pady=(0, 10))
+        tk.Label(buttons, text=f"只显示最近 {RING_LINES} 行，完整输出见日志目录: {self.engine.log_dir}",
+                 fg='#7f8c8d').pack(side='left')
+        tk.Button(buttons, text="清空", command=self.clear, width=8).pack(side='right', padx=5)
+        tk.Button(buttons, text="关闭", command=self.window.withdraw, width=8).pack(side='right')
+    
+    def show(self):
+        if self.window is None:
+            self._create()
+            self.poll()
+        self.window.deiconify()
+        self.window.lift()
+    
+    def clear(self):
+        self.text.configure(state='normal')
+        self.text.delete('1.0', 'end')
+        self.text.configure(state='disabled')
+    
+    def poll(self):
+        """窗口可见时定时取新的输出，文本框中最多保留 RING_LINES 行"""
+        if self.window.winfo_viewable():
+            lines = self.engine.log_tail(self.seq)
+            if lines:
+                self.seq = lines[-1][0]
+                at_end = self.text.yview()[1] >= 1.0
+                self.text.configure(state='normal')
+                for seq, when, name, stream, text in lines:
+                    self.text.insert('end', f"{time.strftime('%H:%M:%S', time.localtime(when))} {name}: {text}\n",
+                                     (stream,))
+                self.text.delete('1.0', f'end - {RING_LINES + 1} lines')
+                self.text.configure(state='disabled')
+                if at_end:
+                    self.text.see('end')
+        self.root.after(LOG_POLL_MS, self.poll)
+
+
+def _pair(p50, p95, scale, fmt):
+    """把 p50 和 p95 显示为 "p50 / p95" 的形式"""
+    if p50 is None:
+        return ""
+    return f"{fmt.format(p50 * scale)} / {fmt.format(p95 * scale)}"
+
+
+class FileItemDialog(simpledialog.Dialog):
+    """编辑文件项的延迟时间、资源设置、是否守护和是否记录输出"""
+    
+    FIELDS = (
+        ('delay', "延迟时间(秒):"),
+        ('cpus', "CPU 亲和性(如 0-3,6):"),
+        ('nice', "优先级 nice(-20 ~ 19):"),
+        ('ionice', "IO 调度类:"),
+        ('slice', "cgroup slice:"),
+        ('cpu_quota', "CPU 配额(如 50%):"),
+        ('memory_max', "内存上限(如 2G):"),
+    )
+    
+    def __init__(self, parent, file_item):
+        self.file_item = file_item
+        self.entries = {}
+        self.supervise = None
+        self.capture = None
+        super().__init__(parent, f"编辑: {os.path.basename(file_item['path'])}")
+    
+    def body(self, master):
+        resources = self.file_item.get('resources') or {}
+        cgroup = resources.get('cgroup') or {}
+        initial = {
+            'delay': self.file_item['delay'],
+            'cpus': resources.get('cpus', ''),
+            'nice': resources.get('nice', ''),
+            'ionice': resources.get('ionice', ''),
+            'slice': cgroup.get('slice', ''),
+            'cpu_quota': cgroup.get('cpu_quota', ''),
+            'memory_max': cgroup.get('memory_max', ''),
+        }
+        for row, (key, label) in enumerate(self.FIELDS):
+            tk.Label(master, text=label, anchor='w').grid(row=row, column=0, sticky='w', padx=5, pady=3)
+            if key == 'ionice':
+                entry = ttk.Combobox(master, width=18,
+                                     values=('', 'realtime', 'best-effort', 'best-effort:7', 'idle'))
+            else:
+                entry = tk.Entry(master, width=20)
+            entry.insert(0, str(initial[key]))
+            entry.grid(row=row, column=1, padx=5, pady=3)
+            self.entries[key] = entry
+        self.supervise = tk.BooleanVar(value=bool(self.file_item.get('supervise')))
+        tk.Checkbutton(master, text="异常退出后自动重启", variable=self.supervise).grid(
+            row=len(self.FIELDS), column=0, columnspan=2, sticky='w', padx=5, pady=3)
+        self.capture = tk.BooleanVar(value=bool(self.file_item.get('capture')))
+        tk.Checkbutton(master, text="记录程序输出", variable=self.capture).grid(
+            row=len(self.FIELDS) + 1, column=0, columnspan=2, sticky='w', padx=5, pady=3)
+        tk.Label(master, text="留空表示不设置；资源设置目前只在 Linux 上生效", fg='#7f8c8d').grid(
+            row=len(self.FIELDS) + 2, column=0, columnspan=2, sticky='w', padx=5, pady=(6, 0))
+        return self.entries['delay']
+    
+    def validate(self):
+        values = {key: entry.get().strip() for key, entry in self.entries.items()}
+        try:
+            delay = float(values['delay'])
+        except ValueError:
+            messagebox.showerror("错误", "延迟时间必须是数字", parent=self)
+            return False
+        if not 0 <= delay <= 3600:
+            messagebox.showerror("错误", "延迟时间必须在 0 ~ 3600 秒之间", parent=self)
+            return False
+        
+        # 保留界面上不能编辑的设置（如 cpu_weight）
+        resources = dict(self.file_item.get('resources') or {})
+        cgroup = dict(resources.get('cgroup') or {})
+        for key in ('cpus', 'nice', 'ionice'):
+            resources[key] = values[key]
+        for key in ('slice', 'cpu_quota', 'memory_max'):
+            cgroup[key] = values[key]
+        resources['cgroup'] = {key: value for key, value in cgroup.items() if value not in (None, '')}
+        resources = {key: value for key, value in resources.items() if value not in (None, '', {})}
+        try:
+            make_resources(resources)
+        except ResourceError as e:
+            messagebox.showerror("错误", str(e), parent=self)
+            return False
+        if 'nice' in resources:
+            resources['nice'] = int(resources['nice'])
+        # 保留手动配置的重启策略和捕获设置，只在勾选状态变化时改写
+        supervise = (self.file_item.get('supervise') or True) if self.supervise.get() else None
+        capture = (self.file_item.get('capture') or True) if self.capture.get() else None
+        self.result = (delay, resources, supervise, capture)
+        return True
+
+
+def describe_resources(file_item):
+    """文件列表中资源设置的显示内容"""
+    try:
+        resources = make_resources(file_item.get('resources'))
+    except ResourceError:
+        return "设置有误"
+    return resources.describe() if resources is not None else ""
+
+
+def file_row_values(file_item, position, check=None, supervised=None):
+    """文件列表中一行的显示内容，check 为启动前检查的结果，supervised 为守护状态"""
+    if supervised is not None:
+        status = supervised.describe()
+    else:
+        status = "检查中..." if check is None else (check.describe() or "正常")
+    return (position + 1, file_item['path'], file_item['delay'], describe_resources(file_item), status)
+
+
+def file_row_tags(check, supervised=None):
+    """按检查结果和守护状态给文件行设置颜色"""
+    if supervised is not None and supervised.state == FAILED:
+        return ('missing',)
+    if supervised is not None and supervised.state == RESTARTING:
+        return ('warning',)
+    if check is None:
+        return ()
+    if not check.ok:
+        return ('missing',)
+    if check.warning:
+        return ('warning',)
+    return ()
+
+
+def history_row_values(record, position):
+    """历史记录列表中一行的显示内容"""
+    return (record['name'], file_count(record), record['create_time'])
+
+
+class DesktopLauncher:
+    def __init__(self, data_file=DEFAULT_DATA_FILE, socket_path=None):
+        self.root = tk.Tk()
+        self.root.title("自动打开桌面软件")
+        self.root.geometry("1400x800")
+        self.root.configure(bg='#f0f0f0')
+        
+        # 数据存储
+        # 当前文件列表；其中的文件项可能与历史记录共用（只读的 FileEntry），修改时替换为副本
+        self.current_files = []
+        self.data_file = data_file
+        self.store = RecordStore(data_file, on_error=self.on_store_error)
+        self.history_records = self.store.records  # 历史记录，修改需通过 self.store 进行
+        # 历史记录名称和文件路径的搜索索引，在后台建立，建好之前搜索时逐条比较；
+        # 记录修改后通过 index_record / unindex_record 同步
+        self.search_index = SearchIndex()
+        self.search_ready = False
+        self.search_dirty = {}  # 建立索引期间修改过的记录，id -> 记录
+        self.search_generation = 0
+        # 文件检查结果按路径缓存，界面和启动引擎共用
+        self.stat_cache = StatCache()
+        self.file_checks = {}  # 路径 -> 最近一次检查结果
+        self.supervised = {}  # 路径 -> 最近一次运行中被守护的 supervisor.Supervised
+        self.engine = LaunchEngine(stat_cache=self.stat_cache, log_dir=log_dir(data_file))
+        self.runs = []  # 从界面开始的运行（LaunchRun，交给后台服务的是 RemoteRun），最新的在最后
+        self.metrics = MetricsStore(metrics_file(data_file))
+        self.current_record_name = None  # 当前文件列表来自哪条历史记录
+        self.adaptive_percentile = DEFAULT_PERCENTILE  # 自适应延迟使用的百分位数，随记录保存
+        self.throttle_config = None  # 记录中的负载阈值，勾选调节但没有配置时使用默认阈值
+        self.socket_path = socket_path  # 后台服务在运行时，运行交给后台服务执行
+        # 后台线程只能通过 self.ui 更新界面
+        self.ui = UiChannel()
+        
+        # 初始化界面
+        self.setup_ui()
+        self.report = RunReport(self.root)
+        self.metrics_view = MetricsView(self.root, self.metrics, self.ui)
+        self.log_view = LogView(self.root, self.engine)
+        self.root.after(FRAME_MS, self.drain_ui)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.load_data()
+        # 如果有历史记录，默认加载第一条
+        self.load_first_history_on_startup()
+        
+    def setup_ui(self):
+        # 主标题
+        title_frame = tk.Frame(self.root, bg='#f0f0f0')
+        title_frame.pack(fill='x', padx=20, pady=10)
+        
+        title_label = tk.Label(title_frame, text="自动打开桌面软件", 
+                              font=('Microsoft YaHei', 24, 'bold'),
+                              bg='#f0f0f0', fg='#2c3e50')
+        title_label.pack()
+        
+        # 主容器
+        main_frame = tk.Frame(self.root, bg='#f0f0f0')
+        main_frame.pack(fill='both', expand=True, padx=20, pady=10)
+        
+        # 上半部分 - 左右分布
+        top_frame = tk.Frame(main_frame, bg='#f0f0f0')
+        top_frame.pack(fill='both', expand=True, pady=(0, 10))
+        
+        # 左侧面板 - 当前文件列表
+        left_frame = tk.LabelFrame(top_frame, text="当前文件列表", 
+                                  font=('Microsoft YaHei', 12, 'bold'),
+                                  bg='#ffffff', fg='#2c3e50', relief='raised')
+        left_frame.pack(side='left', fill='both', expand=True, padx=(0, 10))
+        self.file_frame = left_frame
+        
+        # 文件列表
+        self.file_tree = ttk.Treeview(left_frame, columns=('序号', '文件路径', '延迟时间', '资源', '状态'), show='headings')
+        self.file_tree.heading('序号', text='序号')
+        self.file_tree.heading('文件路径', text='文件路径')
+        self.file_tree.heading('延迟时间', text='延迟时间(秒)')
+        self.file_tree.heading('资源', text='资源设置')
+        self.file_tree.heading('状态', text='状态')
+        
+        self.file_tree.column('序号', width=60, anchor='center')
+        self.file_tree.column('文件路径', width=400, anchor='w')
+        self.file_tree.column('延迟时间', width=100, anchor='center')
+        self.file_tree.column('资源', width=140, anchor='w')
+        self.file_tree.column('状态', width=160, anchor='w')
+        self.file_tree.tag_configure('missing', foreground='#e74c3c')
+        self.file_tree.tag_configure('warning', foreground='#d35400')
+        
+        file_scroll = ttk.Scrollbar(left_frame, orient='vertical', command=self.file_tree.yview)
+        self.file_tree.configure(yscrollcommand=file_scroll.set)
+        
+        self.file_tree.pack(side='left', fill='both', expand=True, padx=10, pady=10)
+        file_scroll.pack(side='right', fill='y', pady=10)
+        
+        self.file_rows = TreeRows(
+            self.file_tree,
+            lambda file_item, position: file_row_values(file_item, position, self.file_checks.get(file_item['path']),
+                                                        self.supervised.get(file_item['path'])),
+            prefix='file', position_columns=True,
+            tags=lambda file_item: file_row_tags(self.file_checks.get(file_item['path']),
+                                                 self.supervised.get(file_item['path'])))
+        
+        # 双击编辑事件
+        self.file_tree.bind('<Double-1>', self.edit_file_item)
+        # 右键查找使用同一个文件的记录
+        self.file_menu = tk.Menu(self.root, tearoff=0)
+        self.file_menu.add_command(label="查找使用此文件的记录", command=self.search_selected_path)
+        self.file_tree.bind('<Button-3>', self.show_file_menu)
+        
+        # 右侧面板 - 历史记录
+        right_frame = tk.LabelFrame(top_frame, text="历史记录", 
+                                   font=('Microsoft YaHei', 12, 'bold'),
+                                   bg='#ffffff', fg='#2c3e50', relief='raised')
+        right_frame.pack(side='right', fill='both', expand=True, padx=(10, 0))
+        
+        # 搜索框，输入时同时过滤历史记录和当前文件列表
+        search_frame = tk.Frame(right_frame, bg='#ffffff')
+        search_frame.pack(side='top', fill='x', padx=10, pady=(10, 0))
+        tk.Label(search_frame, text="搜索:", font=('Microsoft YaHei', 10), bg='#ffffff').pack(side='left')
+        self.search_var = tk.StringVar()
+        search_entry = tk.Entry(search_frame, textvariable=self.search_var, font=('Microsoft YaHei', 10))
+        search_entry.pack(side='left', fill='x', expand=True, padx=5)
+        search_entry.bind('<Escape>', lambda event: self.search_var.set(""))
+        self.search_info = tk.StringVar(value=f"名称或路径，{PATH_PREFIX}路径 只查找文件路径")
+        tk.Label(search_frame, textvariable=self.search_info, font=('Microsoft YaHei', 9),
+                 bg='#ffffff', fg='#7f8c8d').pack(side='left')
+        self.search_var.trace_add('write', lambda *args: self.apply_search())
+        
+        # 历史记录列表
+        self.history_tree = ttk.Treeview(right_frame, columns=('记录名称', '文件数量', '创建时间'), show='headings')
+        self.history_tree.heading('记录名称', text='记录名称')
+        self.history_tree.heading('文件数量', text='文件数量')
+        self.history_tree.heading('创建时间', text='创建时间')
+        
+        self.history_tree.column('记录名称', width=200, anchor='w')
+        self.history_tree.column('文件数量', width=80, anchor='center')
+        self.history_tree.column('创建时间', width=150, anchor='center')
+        
+        history_scroll = ttk.Scrollbar(right_frame, orient='vertical', command=self.history_tree.yview)
+        self.history_tree.configure(yscrollcommand=history_scroll.set)
+        
+        self.history_tree.pack(side='left', fill='both', expand=True, padx=10, pady=10)
+        history_scroll.pack(side='right', fill='y', pady=10)
+        
+        self.history_rows = TreeRows(self.history_tree, history_row_values, prefix='record')
+        
+        # 双击编辑历史记录名称
+        self.history_tree.bind('<Double-1>', self.edit_history_name)
+        # 单击加载历史记录
+        self.history_tree.bind('<<TreeviewSelect>>', self.load_history_on_click)
+        
+        # 下半部分 - 按钮区域
+        bottom_frame = tk.Frame(main_frame, bg='#f0f0f0')
+        bottom_frame.pack(fill='x', pady=(10, 0))
+        
+        # 第一行按钮 - 居中显示（合并所有按钮到一行）
+        first_row_frame = tk.Frame(bottom_frame, bg='#f0f0f0')
+        first_row_frame.pack(pady=5)
+        
+        btn_style = {'font': ('Microsoft YaHei', 10), 'width': 12, 'height': 1}
+        
+        tk.Button(first_row_frame, text="添加文件", command=self.add_file,
+                 bg='#3498db', fg='white', **btn_style).pack(side='left', padx=5)
+        tk.Button(first_row_frame, text="删除文件", command=self.delete_file,
+                 bg='#e74c3c', fg='white', **btn_style).pack(side='left', padx=5)
+        tk.Button(first_row_frame, text="上移", command=self.move_up,
+                 bg='#9b59b6', fg='white', **btn_style).pack(side='left', padx=5)
+        tk.Button(first_row_frame, text="下移", command=self.move_down,
+                 bg='#9b59b6', fg='white', **btn_style).pack(side='left', padx=5)
+        tk.Button(first_row_frame, text="保存记录", command=self.save_config,
+                 bg='#27ae60', fg='white', **btn_style).pack(side='left', padx=5)
+        tk.Button(first_row_frame, text="删除记录", command=self.delete_record,
+                 bg='#e74c3c', fg='white', **btn_style).pack(side='left', padx=5)
+        
+        # 运行控制区域
+        run_frame = tk.Frame(bottom_frame, bg='#f0f0f0')
+        run_frame.pack(pady=10)
+        
+        # 运行后关闭软件选项
+        self.close_after_run = tk.BooleanVar()
+        tk.Checkbutton(run_frame, text="运行后关闭软件", variable=self.close_after_run,
+                      font=('Microsoft YaHei', 10), bg='#f0f0f0').pack(side='left', padx=10)
+        
+        # 同时启动数量上限，0 表示不限制
+        self.max_concurrent = tk.IntVar(value=0)
+        tk.Label(run_frame, text="同时启动上限(0为不限):", font=('Microsoft YaHei', 10),
+                 bg='#f0f0f0').pack(side='left')
+        tk.Spinbox(run_frame, from_=0, to=64, width=4, textvariable=self.max_concurrent,
+                   font=('Microsoft YaHei', 10)).pack(side='left', padx=(0, 10))
+        
+        # 等待延迟期间预读接下来几项的程序文件
+        self.prefetch = tk.BooleanVar()
+        tk.Checkbutton(run_frame, text="等待时预读后续程序", variable=self.prefetch,
+                      font=('Microsoft YaHei', 10), bg='#f0f0f0').pack(side='left', padx=(0, 10))
+        
+        # 按实测就绪时间自动调整延迟
+        self.adaptive = tk.BooleanVar()
+        tk.Checkbutton(run_frame, text="自适应延迟", variable=self.adaptive,
+                      font=('Microsoft YaHei', 10), bg='#f0f0f0').pack(side='left', padx=(0, 10))
+        
+        # 按系统负载调节启动节奏，delay 作为等待上限
+        self.throttle = tk.BooleanVar()
+        tk.Checkbutton(run_frame, text="按系统负载调节", variable=self.throttle,
+                      font=('Microsoft YaHei', 10), bg='#f0f0f0').pack(side='left', padx=(0, 10))
+        
+        tk.Button(run_frame, text="开始运行", command=self.run_files,
+                 bg='#f39c12', fg='white', font=('Microsoft YaHei', 12, 'bold'),
+                 width=15, height=2).pack(side='left', padx=10)
+        tk.Button(run_frame, text="运行报告", command=lambda: self.report.show(),
+                 font=('Microsoft YaHei', 10), width=10).pack(side='left', padx=10)
+        tk.Button(run_frame, text="耗时统计", command=self.show_metrics,
+                 font=('Microsoft YaHei', 10), width=10).pack(side='left')
+        tk.Button(run_frame, text="建议延迟", command=self.suggest_delays,
+                 font=('Microsoft YaHei', 10), width=10).pack(side='left', padx=10)
+        tk.Button(run_frame, text="程序输出", command=lambda: self.log_view.show(),
+                 font=('Microsoft YaHei', 10), width=10).pack(side='left')
+        
+        # 运行中的控制，作用于当前记录的运行（没有时作用于最近一次运行）
+        control_frame = tk.Frame(bottom_frame, bg='#f0f0f0')
+        control_frame.pack(pady=(0, 10))
+        self.pause_text = tk.StringVar(value="暂停")
+        tk.Button(control_frame, textvariable=self.pause_text, command=self.toggle_pause,
+                 font=('Microsoft YaHei', 10), width=10).pack(side='left', padx=5)
+        tk.Button(control_frame, text="跳过等待", command=self.skip_wait,
+                 font=('Microsoft YaHei', 10), width=10).pack(side='left', padx=5)
+        tk.Button(control_frame, text="取消运行", command=self.cancel_run,
+                 font=('Microsoft YaHei', 10), width=10).pack(side='left', padx=5)
+        tk.Button(control_frame, text="结束程序", command=self.stop_programs,
+                 bg='#e74c3c', fg='white', font=('Microsoft YaHei', 10), width=10).pack(side='left', padx=5)
+        self.runs_var = tk.StringVar(value="")
+        tk.Label(control_frame, textvariable=self.runs_var, font=('Microsoft YaHei', 10),
+                 bg='#f0f0f0', fg='#2c3e50').pack(side='left', padx=10)
+        
+        # 状态栏
+        self.status_var = tk.StringVar(value="就绪")
+        status_bar = tk.Label(self.root, textvariable=self.status_var, 
+                             relief='sunken', anchor='w', bg='#ecf0f1', fg='#2c3e50')
+        status_bar.pack(side='bottom', fill='x')
+    
+    def load_first_history_on_startup(self):
+        """启动时加载第一条历史记录"""
+        if self.history_records:
+            first_record = self.history_records[0]
+            self.current_files = list(first_record['files'])
+            self.current_record_name = first_record['name']
+            self.close_after_run.set(first_record.get('close_after_run', False))
+            self.max_concurrent.set(first_record.get('max_concurrent', 0))
+            self.prefetch.set(bool(first_record.get('prefetch', 0)))
+            self.adaptive.set(first_record.get('adaptive', False))
+            self.adaptive_percentile = first_record.get('adaptive_percentile', DEFAULT_PERCENTILE)
+            self.throttle_config = first_record.get('throttle') or None
+            self.throttle.set(bool(self.throttle_config))
+            self.refresh_file_list()
+            # 选中第一条历史记录
+            self.history_rows.select(0)
+            self.status_var.set(f"已自动加载第一条历史记录: {first_record['name']}")
+    
+    def get_max_concurrent(self):
+        """读取同时启动上限，输入无效时视为不限制"""
+        try:
+            return max(0, self.max_concurrent.get())
+        except tk.TclError:
+            return 0
+    
+    def add_file(self):
+        """添加文件"""
+        file_path = filedialog.askopenfilename(
+            title="选择要运行的文件",
+            filetypes=[("所有文件", "*.*"), ("可执行文件", "*.exe"), ("批处理文件", "*.bat")]
+        )
+        
+        if file_path:
+            delay = simpledialog.askfloat("设置延迟时间", "请输入延迟执行时间(秒):", 
+                                        minvalue=0, maxvalue=3600, initialvalue=0)
+            if delay is not None:
+                file_item = {
+                    'path': file_path,
+                    'delay': delay
+                }
+                self.current_files.append(file_item)
+                self.file_rows.append(file_item)
+                self.filter_files()
+                self.check_files([file_path])
+                self.status_var.set(f"已添加文件: {os.path.basename(file_path)}")
+    
+    def delete_file(self):
+        """删除选中的文件"""
+        selection = self.file_tree.selection()
+        if not selection:
+            messagebox.showwarning("警告", "请先选择要删除的文件")
+            return
+        
+        index = self.file_rows.position_of(selection[0])
+        
+        deleted_file = self.current_files.pop(index)
+        self.file_rows.delete(index, self.current_files)
+        self.filter_files()
+        self.status_var.set(f"已删除文件: {os.path.basename(deleted_file['path'])}")
+    
+    def edit_file_item(self, event):
+        """编辑文件项"""
+        selection = self.file_tree.selection()
+        if not selection:
+            return
+        
+        index = self.file_rows.position_of(selection[0])
+        
+        # 编辑延迟时间和资源设置
+        dialog = FileItemDialog(self.root, self.current_files[index])
+        if dialog.result is not None:
+            # 文件项可能与历史记录共用，先复制再修改
+            current_file = self.current_files[index] = dict(self.current_files[index])
+            current_file['delay'], resources, supervise, capture = dialog.result
+            for key, value in (('resources', resources), ('supervise', supervise), ('capture', capture)):
+                if value:
+                    current_file[key] = value
+                else:
+                    current_file.pop(key, None)
+            self.file_rows.update(index, current_file)
+            self.status_var.set("已更新文件设置")
+    
+    def save_config(self):
+        """保存当前配置到历史记录"""
+        if not self.current_files:
+            messagebox.showwarning("警告", "当前文件列表为空，无法保存")
+            return
+        
+        record_name = simpledialog.askstring("保存配置", "请输入记录名称:")
+        if record_name is None:  # 用户取消
+            return
+        
+        if not record_name.strip():
+            record_name = "历史记录"
+        
+        # 检查是否已存在同名记录
+        for index, record in enumerate(self.history_records):
+            if record['name'] == record_name:
+                if not messagebox.askyesno("记录已存在", f"记录'{record_name}'已存在，是否覆盖?"):
+                    return
+                self.unindex_record(self.store.delete(index))
+                self.history_rows.delete(index)
+                break
+        
+        # 创建新记录
+        new_record = dict(self.current_settings(), name=record_name,
+                          create_time=time.strftime("%Y-%m-%d %H:%M:%S"))
+        
+        self.store.append(new_record)
+        self.history_rows.append(new_record)
+        self.index_record(new_record)
+        self.filter_history()
+        self.current_record_name = record_name
+        self.status_var.set(f"已保存配置: {record_name}")
+    
+    def current_settings(self):
+        """当前文件列表和运行设置，保存记录和交给后台服务运行时使用"""
+        return {
+            'files': list(self.current_files),
+            'close_after_run': self.close_after_run.get(),
+            'max_concurrent': self.get_max_concurrent(),
+            'prefetch': DEFAULT_LOOKAHEAD if self.prefetch.get() else 0,
+            'adaptive': self.adaptive.get(),
+            'adaptive_percentile': self.adaptive_percentile,
+            'throttle': (self.throttle_config or True) if self.throttle.get() else False,
+        }
+    
+    def auto_save_default_record(self):
+        """自动保存默认历史记录（仅在历史记录为空且有文件时）"""
+        if not self.history_records and self.current_files:
+            # 创建默认记录
+            default_record = dict(self.current_settings(), name='默认历史记录',
+                                  create_time=time.strftime("%Y-%m-%d %H:%M:%S"))
+            
+            self.store.append(default_record)
+            self.history_rows.append(default_record)
+            self.index_record(default_record)
+            self.filter_history()
+            self.current_record_name = default_record['name']
+            self.status_var.set("已自动保存为默认历史记录")
+    
+    def load_history_on_click(self, event):
+        """单击历史记录时加载配置"""
+        selection = self.history_tree.selection()
+        if not selection:
+            return
+        
+        index = self.history_rows.position_of(selection[0])
+        
+        if index < len(self.history_records):
+            target_record = self.history_records[index]
+            self.current_files = list(target_record['files'])
+            self.current_record_name = target_record['name']
+            self.close_after_run.set(target_record.get('close_after_run', False))
+            self.max_concurrent.set(target_record.get('max_concurrent', 0))
+            self.prefetch.set(bool(target_record.get('prefetch', 0)))
+            self.adaptive.set(target_record.get('adaptive', False))
+            self.adaptive_percentile = target_record.get('adaptive_percentile', DEFAULT_PERCENTILE)
+            self.throttle_config = target_record.get('throttle') or None
+            self.throttle.set(bool(self.throttle_config))
+            self.refresh_file_list()
+            self.status_var.set(f"已加载配置: {target_record['name']}")
+    
+    def delete_record(self):
+        """删除选中的历史记录"""
+        selection = self.history_tree.selection()
+        if not selection:
+            messagebox.showwarning("警告", "请先选择要删除的历史记录")
+            return
+        
+        index = self.history_rows.position_of(selection[0])
+        
+        record_name = self.history_records[index]['name']
+        
+        if messagebox.askyesno("确认删除", f"确定要删除历史记录: {record_name}?"):
+            deleted_record = self.store.delete(index)
+            self.history_rows.delete(index)
+            self.unindex_record(deleted_record)
+            self.filter_history()
+            self.status_var.set(f"已删除记录: {deleted_record['name']}")
+    
+    def move_up(self):
+        """上移选中项"""
+        self.move_selected(-1)
+    
+    def move_down(self):
+        """下移选中项"""
+        self.move_selected(1)
+    
+    def move_selected(self, step):
+        """把选中项移动一位，step 为 -1 表示上移，1 表示下移"""
+        direction = "上移" if step < 0 else "下移"
+        edge = "第一个" if step < 0 else "最后一个"
+        
+        # 优先处理文件列表
+        file_selection = self.file_tree.selection()
+        if file_selection:
+            index = self.file_rows.position_of(file_selection[0])
+            target = index + step
+            
+            if 0 <= target < len(self.current_files):
+                # 交换位置
+                self.current_files[index], self.current_files[target] = \
+                    self.current_files[target], self.current_files[index]
+                
+                self.file_rows.swap(index, target, self.current_files)
+                self.filter_files()
+                # 保持选中状态
+                self.file_rows.select(target)
+                self.status_var.set(f"已{direction}文件")
+            else:
+                self.status_var.set(f"已是{edge}文件，无法{direction}")
+            return
+        
+        # 处理历史记录列表
+        history_selection = self.history_tree.selection()
+        if history_selection:
+            index = self.history_rows.position_of(history_selection[0])
+            target = index + step
+            
+            if 0 <= target < len(self.history_records):
+                # 交换位置
+                self.store.move(index, target)
+                
+                self.history_rows.swap(index, target, self.history_records)
+                self.filter_history()
+                # 保持选中状态
+                self.history_rows.select(target)
+                self.status_var.set(f"已{direction}历史记录")
+            else:
+                self.status_var.set(f"已是{edge}记录，无法{direction}")
+            return
+        
+        messagebox.showwarning("警告", "请先选择要移动的项目")
+    
+    def edit_history_name(self, event):
+        """编辑历史记录名称"""
+        selection = self.history_tree.selection()
+        if not selection:
+            return
+        
+        index = self.history_rows.position_of(selection[0])
+        
+        if index < len(self.history_records):
+            old_name = self.history_records[index]['name']
+            
+            new_name = simpledialog.askstring("修改记录名称", f"当前名称: {old_name}\n请输入新名称:", initialvalue=old_name)
+            
+            if new_name and new_name != old_name:
+                # 检查是否已存在同名记录
+                for record in self.history_records:
+                    if record['name'] == new_name:
+                        messagebox.showerror("错误", "该名称已存在")
+                        return
+                
+                # 更新记录名称
+                self.store.update(index, name=new_name)
+                if self.current_record_name == old_name:
+                    self.current_record_name = new_name
+                self.history_rows.update(index, self.history_records[index])
+                self.index_record(self.history_records[index])
+                self.filter_history()
+                self.status_var.set(f"已修改记录名称: {old_name} -> {new_name}")
+    
+    def run_files(self):
+        """运行文件列表"""
+        if not self.current_files:
+            messagebox.showwarning("警告", "当前文件列表为空")
+            return
+        
+        # 如果历史记录为空，自动保存默认记录
+        self.auto_save_default_record()
+        
+        if available(self.socket_path):
+            self.run_via_daemon()
+            return
+        
+        record_name = self.current_record_name or "未保存的文件列表"
+        if any(run.active and run.name == record_name for run in self.runs):
+            # 不同的记录可以同时运行，同一条记录不能重复运行
+            messagebox.showwarning("警告", f"{record_name} 正在运行，可以先取消这次运行")
+            return
+        
+        # 先检查依赖关系，存在循环或配置错误时直接报错，不启动任何文件
+        observer = Observer()
+        listener = GuiRunListener(self.ui, observer, on_supervise=self.supervise_changed)
+        plan_files = list(self.current_files)
+        try:
+            plan = self.engine.plan(plan_files, listener)
+        except ValueError as e:
+            messagebox.showerror("错误", f"启动配置错误:\n{str(e)}")
+            return
+        # 每次运行单独的设置，不影响同时进行的其他运行
+        settings = {
+            'max_concurrent': self.get_max_concurrent() or None,
+            'prefetch': DEFAULT_LOOKAHEAD if self.prefetch.get() else 0,
+        }
+        try:
+            settings['throttle'] = Throttle.from_config((self.throttle_config or True) if self.throttle.get() else None)
+        except (TypeError, ValueError) as e:
+            messagebox.showerror("错误", f"负载调节配置错误:\n{str(e)}")
+            return
+        # 界面变量只能在 Tk 线程中读取
+        close_after_run = self.close_after_run.get()
+        adaptive = self.adaptive.get()
+        percentile = self.adaptive_percentile
+        self.report.clear()
+        launch = self.engine.create_run(plan, listener, record_name, **settings)
+        self.runs.append(launch)
+        self.refresh_runs()
+        
+        def run_in_thread():
+            nonlocal launch
+            try:
+                self.ui.status("正在运行文件...")
+                if adaptive:
+                    # 读取统计文件较慢，在后台线程中按实测就绪时间生成新的计划；
+                    # 这期间按下的暂停、取消交给新的运行
+                    estimates = ReadinessEstimates(self.metrics.read())
+                    tuned = self.engine.create_run(
+                        self.engine.plan(tuned_files(plan_files, estimates, percentile), listener),
+                        listener, record_name, **settings)
+                    self.ui.call(self.replace_run, launch, tuned)
+                    launch = tuned
+                result = launch.execute()
+                self.ui.call(self.refresh_runs)
+                # 运行时的检查结果同步到文件列表
+                self.ui.call(self.apply_checks, {item.path: item.check for item in result.items if item.check})
+                
+                mean_jitter, max_jitter = jitter_summary(result.items)
+                errors = f"，{listener.errors} 个错误（详见运行报告）" if listener.errors else ""
+                prefetched = f"，预读 {result.prefetched / 1024 / 1024:.1f} MB" if result.prefetched else ""
+                throttled = sum(item.throttled for item in result.items)
+                throttled = f"，因系统繁忙推迟 {throttled:.1f} 秒" if throttled else ""
+                if launch.state == launch.CANCELLED:
+                    started = sum(1 for item in result.items if item.launched)
+                    self.ui.status(f"{record_name} 已取消，启动了 {started}/{len(result.items)} 个文件{errors}")
+                    return
+                self.ui.status(f"所有文件运行完成，用时 {result.duration:.1f} 秒{throttled}{prefetched}{errors}"
+                               f" (平均偏差 {mean_jitter * 1000:.0f} ms, 最大偏差 {max_jitter * 1000:.0f} ms)")
+                
+                # 如果设置了运行后关闭软件
+                if close_after_run:
+                    # 等待1秒后关闭
+                    self.ui.call(self.root.after, 1000, self.close_after_launch)
+                
+                # 等待程序就绪或退出后记录耗时；马上要关闭时只采样一次
+                observer.finish(timeout=0 if close_after_run else None)
+                try:
+                    self.metrics.append(run_events(result, record_name))
+                except OSError as e:
+                    self.ui.error(f"保存启动耗时统计失败: {str(e)}")
+                self.ui.call(self.metrics_view.refresh)
+                    
+            except Exception as e:
+                self.ui.error(f"运行过程中发生错误: {str(e)}")
+                self.ui.status("运行失败")
+                # 生成计划时出错，运行没有开始执行
+                launch.done.set()
+                self.ui.call(self.refresh_runs)
+        
+        # 在新线程中运行，避免阻塞UI
+        thread = threading.Thread(target=run_in_thread)
+        thread.daemon = True
+        thread.start()
+    
+    def run_via_daemon(self):
+        """把当前文件列表交给后台服务运行，并在后台线程中跟踪运行状态
+        
+        运行以 RemoteRun 加入 self.runs，暂停、跳过等待、取消和结束程序按钮通过后台服务的命令控制它。
+        """
+        record = dict(self.current_settings(), name=self.current_record_name or "未保存的文件列表")
+        close_after_run = record['close_after_run']
+        self.report.clear()
+        
+        def track_in_thread():
+            try:
+                with DaemonClient(self.socket_path) as client:
+                    response = client.request('run', record=record)
+                    remote = RemoteRun(self.socket_path, response['run'], record['name'])
+                    if response['duplicate']:
+                        self.ui.status(f"{record['name']} 已在后台服务中运行 (#{remote.id})")
+                        if any(isinstance(run, RemoteRun) and run.id == remote.id for run in self.runs):
+                            return
+                    self.ui.call(self.add_run, remote)
+                    reported = 0
+                    while True:
+                        run = client.request('status', run=remote.id)['runs'][0]
+                        for message in run['errors'][reported:]:
+                            self.ui.error(message)
+                        reported = len(run['errors'])
+                        self.ui.status(f"[后台服务 #{remote.id}] {run['status']}")
+                        if run['state'] != remote.state:
+                            remote.state = run['state']
+                            self.ui.call(self.refresh_runs)
+                        if not remote.active:
+                            break
+                        time.sleep(DAEMON_POLL)
+            except DaemonError as e:
+                self.ui.error(f"后台服务运行失败: {str(e)}")
+                self.ui.status("运行失败")
+                return
+            if close_after_run:
+                self.ui.call(self.root.after, 1000, self.close_after_launch)
+        
+        self.status_var.set("已交给后台服务运行")
+        threading.Thread(target=track_in_thread, daemon=True).start()
+    
+    def add_run(self, run):
+        self.runs.append(run)
+        self.refresh_runs()
+    
+    def replace_run(self, old, new):
+        """自适应延迟生成新计划后，用新的运行替换原来的运行，保留这期间按下的暂停、取消"""
+        self.runs[self.runs.index(old)] = new
+        if old.state == old.PAUSED:
+            new.pause()
+        elif old.state == old.CANCELLED:
+            new.cancel()
+        self.refresh_runs()
+    
+    def selected_run(self):
+        """控制按钮作用的运行：当前记录正在进行的运行，其次是最近一次运行"""
+        if not self.runs:
+            return None
+        record_name = self.current_record_name or "未保存的文件列表"
+        for run in reversed(self.runs):
+            if run.active and run.name == record_name:
+                return run
+        active = [run for run in self.runs if run.active]
+        return active[-1] if active else self.runs[-1]
+    
+    def refresh_runs(self):
+        """更新运行控制区域显示的运行状态，已结束的运行只保留最近一次"""
+        latest = self.runs[-1] if self.runs else None
+        self.runs = [run for run in self.runs if run.active or run is latest]
+        active = [run for run in self.runs if run.active]
+        self.runs_var.set("  ".join(f"#{run.id} {run.name}{'（后台服务）' if isinstance(run, RemoteRun) else ''}: "
+                                    f"{RUN_STATE_NAMES[run.state]}" for run in active))
+        run = self.selected_run()
+        self.pause_text.set("继续" if run is not None and run.state == run.PAUSED else "暂停")
+    
+    def toggle_pause(self):
+        run = self.selected_run()
+        if run is None or not run.active:
+            self.status_var.set("没有进行中的运行")
+            return
+        try:
+            if run.state == run.PAUSED:
+                run.resume()
+            else:
+                run.pause()
+        except DaemonError as e:
+            self.status_var.set(f"控制后台服务中的运行失败: {str(e)}")
+        self.refresh_runs()
+    
+    def skip_wait(self):
+        run = self.selected_run()
+        if run is None or not run.active:
+            self.status_var.set("没有进行中的运行")
+            return
+        try:
+            if run.skip_wait() is None:
+                self.status_var.set("当前没有需要等待的文件")
+        except DaemonError as e:
+            self.status_var.set(f"控制后台服务中的运行失败: {str(e)}")
+    
+    def cancel_run(self):
+        run = self.selected_run()
+        if run is None or not run.active:
+            self.status_var.set("没有进行中的运行")
+            return
+        try:
+            run.cancel()
+        except DaemonError as e:
+            self.status_var.set(f"控制后台服务中的运行失败: {str(e)}")
+            return
+        self.status_var.set(f"正在取消 {run.name}，已经启动的程序保持运行")
+        self.refresh_runs()
+    
+    def stop_programs(self):
+        """取消运行并结束它启动的所有程序，等待程序退出在后台线程中进行"""
+        run = self.selected_run()
+        if run is None:
+            self.status_var.set("还没有运行过")
+            return
+        if not messagebox.askyesno("确认", f"确定要结束 {run.name} 启动的所有程序吗？\n"
+                                         "程序会先收到退出请求，几秒后仍未退出的会被强制结束。"):
+            return
+        self.status_var.set(f"正在结束 {run.name} 启动的程序...")
+        
+        def stop_in_thread():
+            try:
+                terminated, killed = run.stop_processes()
+            except DaemonError as e:
+                self.ui.error(f"通过后台服务结束程序失败: {str(e)}")
+                return
+            forced = f"，其中 {killed} 个被强制结束" if killed else ""
+            self.ui.status(f"已结束 {run.name} 启动的 {terminated} 个程序{forced}")
+            self.ui.call(self.refresh_runs)
+        
+        threading.Thread(target=stop_in_thread, daemon=True).start()
+    
+    def close_after_launch(self):
+        """运行后关闭软件；还有依赖启动器的程序（见 LaunchEngine.attached）时不关闭，
+        否则启动器退出后它们再输出时会被 SIGPIPE 结束"""
+        attached = self.engine.attached()
+        if attached:
+            self.status_var.set(f"有 {len(attached)} 个程序的输出由启动器记录或由启动器守护，没有自动关闭软件")
+            return
+        self.root.quit()
+    
+    def on_close(self):
+        """关闭窗口：还有运行未完成时询问是否同时结束这些运行启动的程序，
+        还有依赖启动器的程序时询问是否结束它们"""
+        # 交给后台服务的运行不受关闭窗口影响
+        active = [run for run in self.runs if run.active and isinstance(run, LaunchRun)]
+        attached = self.engine.attached()
+        if attached:
+            runs = f"还有 {len(active)} 个运行尚未完成。\n" if active else ""
+            if not messagebox.askokcancel(
+                    "退出", f"{runs}有 {len(attached)} 个程序的输出由启动器记录或由启动器守护，"
+                            "启动器退出后它们再输出时会被系统结束，也不会再被重启。\n\n"
+                            "确定：结束这些程序（以及未完成的运行）后退出\n取消：不退出"):
+                return
+            self.status_var.set("正在结束程序...")
+            
+            def stop_attached_in_thread():
+                for run in active:
+                    run.stop_processes()
+                self.engine.stop_attached()
+                self.ui.call(self.root.quit)
+            
+            threading.Thread(target=stop_attached_in_thread, daemon=True).start()
+            return
+        if not active:
+            self.root.quit()
+            return
+        answer = messagebox.askyesnocancel(
+            "退出", f"还有 {len(active)} 个运行尚未完成。\n\n"
+                    "是：结束这些运行启动的程序后退出\n否：取消运行后退出，已经启动的程序保持运行\n取消：不退出")
+        if answer is None:
+            return
+        if not answer:
+            for run in active:
+                run.cancel()
+            self.root.quit()
+            return
+        self.status_var.set("正在结束程序...")
+        
+        def stop_in_thread():
+            for run in active:
+                run.stop_processes()
+            self.ui.call(self.root.quit)
+        
+        threading.Thread(target=stop_in_thread, daemon=True).start()
+    
+    def suggest_delays(self):
+        """根据实测就绪时间建议延迟，确认后应用到当前文件列表"""
+        if not self.current_files:
+            messagebox.showwarning("警告", "当前文件列表为空")
+            return
+        files = list(self.current_files)
+        percentile = self.adaptive_percentile
+        self.status_var.set("正在分析启动耗时...")
+        
+        def analyze_in_thread():
+            try:
+                estimates = ReadinessEstimates(self.metrics.read())
+                suggestions, lines = report(files, estimates, percentile)
+            except Exception as e:
+                self.ui.error(f"分析启动耗时失败: {str(e)}")
+                self.ui.status("分析启动耗时失败")
+                return
+            self.ui.call(self.confirm_delays, files, suggestions, lines)
+        
+        threading.Thread(target=analyze_in_thread, daemon=True).start()
+    
+    def confirm_delays(self, files, suggestions, lines):
+        """显示建议的延迟（在 Tk 线程中调用）"""
+        self.status_var.set("就绪")
+        text = '\n'.join(lines)
+        if not suggestions:
+            messagebox.showinfo("建议延迟", text)
+            return
+        if files != self.current_files:
+            # 分析期间切换了记录或修改了文件列表
+            return
+        if not messagebox.askyesno("建议延迟", f"{text}\n\n是否应用到当前文件列表?"):
+            return
+        for position, current, delay in suggestions:
+            self.current_files[position] = dict(self.current_files[position], delay=delay)
+            self.file_rows.update(position, self.current_files[position])
+        self.status_var.set(f"已调整 {len(suggestions)} 个文件的延迟，保存记录后生效")
+    
+    def show_metrics(self):
+        """显示当前记录的启动耗时统计"""
+        if not self.current_record_name:
+            messagebox.showwarning("警告", "请先选择一条历史记录")
+            return
+        self.metrics_view.show(self.current_record_name)
+    
+    def refresh_file_list(self):
+        """刷新文件列表显示（切换到另一组文件时整体重建）"""
+        self.file_rows.reset(self.current_files)
+        self.filter_files()
+        self.check_files([file_item['path'] for file_item in self.current_files])
+    
+    def check_files(self, paths):
+        """在后台并行检查文件，结果回到 Tk 线程后只更新对应的行"""
+        if not paths:
+            return
+        
+        def check_in_thread():
+            try:
+                results = self.stat_cache.check_many(paths)
+            except Exception as e:
+                self.ui.error(f"检查文件失败: {str(e)}")
+                return
+            self.ui.call(self.apply_checks, results)
+        
+        threading.Thread(target=check_in_thread, daemon=True).start()
+    
+    def apply_checks(self, results):
+        """在文件列表中标出检查结果（在 Tk 线程中调用）"""
+        changed = {path for path, check in results.items() if self.file_checks.get(path) is not check}
+        self.file_checks.update(results)
+        if not changed:
+            return
+        for position, file_item in enumerate(self.current_files):
+            if file_item['path'] in changed:
+                self.file_rows.update(position, file_item)
+    
+    def supervise_changed(self, supervised):
+        """被守护的项状态变化，更新对应的行（在 Tk 线程中调用）"""
+        self.supervised[supervised.path] = supervised
+        for position, file_item in enumerate(self.current_files):
+            if file_item['path'] == supervised.path:
+                self.file_rows.update(position, file_item)
+        if supervised.state == FAILED:
+            self.ui.error(f"{supervised.path} {supervised.describe()}")
+    
+    def refresh_history_list(self):
+        """刷新历史记录列表显示（重新读取数据后整体重建），并在后台重建搜索索引"""
+        self.history_rows.reset(self.history_records)
+        self.build_search_index()
+        self.filter_history()
+    
+    def build_search_index(self):
+        """在后台线程中为所有记录建立搜索索引，文件列表尚未加载的记录从快照中读取路径
+        
+        几万条记录建立索引需要几百毫秒，不能放在 Tk 线程中；建好之前 filter_history 逐条比较。
+        """
+        self.search_generation += 1
+        generation = self.search_generation
+        self.search_ready = False
+        self.search_dirty = {}
+        records = list(self.history_records)
+        
+        def build_in_thread():
+            index = SearchIndex()
+            try:
+                for start in range(0, len(records), INDEX_BATCH):
+                    for record in records[start:start + INDEX_BATCH]:
+                        index.update(record)
+                    time.sleep(0)
+                pending = index.pending()
+                for start in range(0, len(pending), INDEX_BATCH):
+                    index.set_paths([(record, [file_item['path'] for file_item in self.store.peek_files(record)])
+                                     for record in pending[start:start + INDEX_BATCH]])
+                    time.sleep(0)
+            except (OSError, ValueError) as e:
+                self.ui.error(f"建立搜索索引失败: {str(e)}")
+            self.ui.call(self.search_index_built, generation, index)
+        
+        threading.Thread(target=build_in_thread, daemon=True).start()
+    
+    def search_index_built(self, generation, index):
+        """后台建好的索引（在 Tk 线程中调用），补上建立期间修改过的记录后开始使用"""
+        if generation != self.search_generation:
+            # 期间重新读取了数据，已经有更新的索引在建立
+            return
+        current = {id(record): record for record in self.history_records}
+        for key, record in self.search_dirty.items():
+            if current.get(key) is record:
+                index.update(record)
+            else:
+                index.remove(record)
+        self.search_index = index
+        self.search_ready = True
+        self.search_dirty = {}
+        if self.search_var.get().strip():
+            self.filter_history()
+    
+    def index_record(self, record):
+        """记录新增或修改后更新搜索索引"""
+        if self.search_ready:
+            self.search_index.update(record)
+        else:
+            self.search_dirty[id(record)] = record
+    
+    def unindex_record(self, record):
+        """记录删除后从搜索索引中去掉"""
+        if self.search_ready:
+            self.search_index.remove(record)
+        else:
+            self.search_dirty[id(record)] = record
+    
+    def apply_search(self):
+        """搜索框内容变化时过滤历史记录和当前文件列表"""
+        self.filter_history()
+        self.filter_files()
+    
+    def filter_history(self):
+        """按搜索框的内容过滤历史记录列表，记录修改后也要调用以更新过滤结果"""
+        query = self.search_var.get()
+        if self.search_ready:
+            keys = self.search_index.search(query)
+        else:
+            keys = scan(self.history_records, query)
+        self.history_rows.filter(matching_positions(self.history_records, keys))
+        if not query.strip():
+            self.search_info.set(f"名称或路径，{PATH_PREFIX}路径 只查找文件路径")
+            return
+        indexing = "" if self.search_ready else "（正在建立索引，未读取的文件路径暂不参与搜索）"
+        self.search_info.set(f"{self.history_rows.shown}/{len(self.history_rows)} 条记录{indexing}")
+    
+    def filter_files(self):
+        """当前文件列表中只显示路径符合搜索内容的文件，标题中显示符合的数量"""
+        positions = matching_files(self.current_files, self.search_var.get())
+        self.file_rows.filter(positions)
+        if positions is None:
+            title = "当前文件列表"
+        elif positions:
+            title = f"当前文件列表（{len(positions)}/{len(self.current_files)} 个文件符合搜索）"
+        else:
+            title = "当前文件列表（没有符合搜索的文件）"
+        self.file_frame.config(text=title)
+    
+    def show_file_menu(self, event):
+        iid = self.file_tree.identify_row(event.y)
+        if iid:
+            self.file_tree.selection_set(iid)
+            self.file_menu.tk_popup(event.x_root, event.y_root)
+    
+    def search_selected_path(self):
+        """搜索使用选中文件的所有记录，工具换了位置时可以据此逐个更新"""
+        selection = self.file_tree.selection()
+        if selection:
+            path = self.current_files[self.file_rows.position_of(selection[0])]['path']
+            self.search_var.set(f"{PATH_PREFIX}{path}")
+    
+    def on_store_error(self, error):
+        """后台写入数据失败（在写入线程中调用）"""
+        self.ui.error(f"保存数据失败: {str(error)}")
+    
+    def drain_ui(self):
+        """在 Tk 线程中处理后台线程发来的消息"""
+        status, errors, calls = self.ui.drain()
+        if status is not None:
+            self.status_var.set(status)
+        for func, args in calls:
+            try:
+                func(*args)
+            except Exception as e:
+                errors.append(f"界面更新失败: {str(e)}")
+        if errors:
+            self.report.add(errors)
+        busy = status is not None or errors or calls
+        self.root.after(FRAME_MS if busy else IDLE_MS, self.drain_ui)
+    
+    def load_data(self):
+        """从本地文件加载数据"""
+        try:
+            if self.store.load():
+                if not self.store.indexed:
+                    # 旧版数据文件没有索引，在后台重写一次快照，下次启动只需读取索引
+                    self.store.compact()
+                self.refresh_history_list()
+                self.status_var.set(f"已加载 {len(self.history_records)} 条历史记录")
+            else:
+                self.status_var.set("未找到历史数据文件")
+        except Exception as e:
+            messagebox.showerror("错误", f"加载数据失败:\n{str(e)}")
+    
+    def run(self):
+        """运行应用程序"""
+        self.root.mainloop()
+        # 退出前写入所有修改并重写快照
+        try:
+            self.store.close()
+        except Exception as e:
+            print(f"保存数据失败: {e}", file=sys.stderr)
@@ -0,0 +1,329 @@
+"""启动耗时统计
+
+每次运行为每个启动项记录一条事件：
+
+    time           实际启动时刻（time.time()）
+    run            本次运行的开始时刻，同一次运行的事件相同
+    record         历史记录名称
+    index, path    在文件列表中的位置和路径
+    scheduled      计划启动时间，相对运行开始的秒数
+    jitter         实际启动与计划时间之差（秒）
+    throttled      因为系统繁忙推迟的秒数（按负载调节时）
+    throttle_reason  最近一次推迟时繁忙的原因
+    spawn_latency  创建进程耗时（秒）
+    ready          从启动到就绪探测成功的秒数，没有 probe 时为 null
+    idle           从启动到 CPU 占用降下来（进程仍在运行且连续几次采样几乎不占 CPU）的秒数
+    exit           从启动到进程退出的秒数，观察期内未退出时为 null
+    exit_code      退出码
+    peak_rss       观察期内的峰值常驻内存（字节，读取 /proc/<pid>/status 的 VmHWM）
+    error          启动失败的原因
+
+事件以每行一条 JSON 的形式追加到 launcher_data.metrics.jsonl，超过 MAX_BYTES 后轮转为
+.1、.2 …，最多保留 KEEP 个旧文件。
+"""
+import csv
+import json
+import os
+import threading
+import time
+
+METRICS_SUFFIX = ".metrics.jsonl"
+MAX_BYTES = 1024 * 1024
+KEEP = 3
+
+# 启动后最多观察多久（等待就绪或退出、采样内存）
+OBSERVE_WINDOW = 10.0
+SAMPLE_INTERVAL = 0.25
+
+# 连续 IDLE_SAMPLES 次采样 CPU 占用都低于 IDLE_CPU（单核的比例）视为启动完毕
+IDLE_CPU = 0.05
+IDLE_SAMPLES = 3
+
+FIELDS = ('time', 'run', 'record', 'index', 'path', 'scheduled', 'jitter', 'throttled', 'throttle_reason',
+          'spawn_latency', 'ready', 'idle', 'exit', 'exit_code', 'peak_rss', 'error')
+
+try:
+    CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+except (AttributeError, ValueError, OSError):
+    CLOCK_TICKS = None
+
+
+def metrics_file(data_file):
+    """数据文件对应的统计文件路径"""
+    return os.path.splitext(data_file)[0] + METRICS_SUFFIX
+
+
+def peak_rss(pid):
+    """进程到目前为止的峰值常驻内存（字节），无法读取时返回 None"""
+    try:
+        with open(f'/proc/{pid}/status', 'rb') as f:
+            for line in f:
+                if line.startswith(b'VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _children(pid):
+    children = []
+    try:
+        for task in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{task}/children', 'rb') as f:
+                children.extend(int(child) for child in f.read().split())
+    except (OSError, ValueError):
+        pass
+    return children
+
+
+def cpu_seconds(pid):
+    """进程及其子进程累计占用的 CPU 时间（秒），无法读取时返回 None
+
+    脚本和启动器往往由子进程做实际工作，所以要把子进程也算上（已退出的子进程计入 cutime/cstime）。
+    """
+    if CLOCK_TICKS is None:
+        return None
+    total = 0
+    pids = [pid]
+    while pids:
+        current = pids.pop()
+        try:
+            with open(f'/proc/{current}/stat', 'rb') as f:
+                data = f.read()
+            # 进程名可能包含空格，从最后一个右括号之后开始按空格切分
+            fields = data[data.rindex(b')') + 2:].split()
+            total += sum(int(value) for value in fields[11:15])
+        except (OSError, ValueError, IndexError):
+            if current == pid:
+                return None
+            continue
+        pids.extend(_children(current))
+    return total / CLOCK_TICKS
+
+
+class Observer:
+    """在后台采样刚启动的进程：峰值内存以及 CPU 占用何时降下来
+
+    add(info) 在进程创建后立即调用（通常来自 RunListener.on_launch），每个进程一直观察到
+    就绪、退出或启动后 window 秒为止；finish() 等待所有进程观察结束。
+    """
+
+    def __init__(self, window=OBSERVE_WINDOW):
+        self.window = window
+        self._pending = []
+        self._cpu = {}  # info -> (上次采样时刻, 累计 CPU 时间, 连续空闲次数, 第一次空闲的时刻, 是否忙过)
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def add(self, info):
+        if info.pid is None:
+            return
+        with self._cond:
+            if self._stopped:
+                return
+            self._pending.append(info)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='observer', daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def finish(self, timeout=None):
+        """等待所有进程观察结束，最多等待 timeout 秒，然后停止采样"""
+        with self._cond:
+            self._cond.wait_for(lambda: not self._pending, timeout)
+            self._stopped = True
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                pending = list(self._pending)
+            now = time.time()
+            done = [info for info in pending if self._sample(info, now)]
+            with self._cond:
+                for info in done:
+                    self._pending.remove(info)
+                if done:
+                    self._cond.notify_all()
+                if self._pending and not self._stopped:
+                    self._cond.wait(SAMPLE_INTERVAL)
+
+    def _sample(self, info, now):
+        """采样一次，返回该进程是否已经观察完毕"""
+        rss = peak_rss(info.pid)
+        if rss is not None:
+            info.peak_rss = max(info.peak_rss or 0, rss)
+        if info.idle_time is None and info.exit_code is None:
+            self._sample_cpu(info, now)
+        return info.exit_code is not None or info.ready_time is not None or now - info.start_time >= self.window
+
+    def _sample_cpu(self, info, now):
+        used = cpu_seconds(info.pid)
+        if used is None:
+            return
+        previous = self._cpu.get(info)
+        if previous is None:
+            self._cpu[info] = (now, used, 0, None, False)
+            return
+        last, last_used, idle_count, idle_since, busy = previous
+        if now > last and (used - last_used) / (now - last) < IDLE_CPU:
+            # 刚启动时读盘也几乎不占 CPU，必须先忙过一段再闲下来才算启动完毕
+            if busy:
+                idle_count += 1
+                idle_since = idle_since or last
+        else:
+            busy = True
+            idle_count, idle_since = 0, None
+        if idle_count >= IDLE_SAMPLES:
+            info.idle_time = idle_since
+        self._cpu[info] = (now, used, idle_count, idle_since, busy)
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds, 3)
+
+
+def run_events(result, record_name):
+    """把一次运行的结果转换为事件列表"""
+    errors = {}
+    for item, message in result.errors:
+        errors.setdefault(item, message)
+    run = round(result.start_time, 3)
+    events = []
+    for item in result.items:
+        if not item.launched:
+            continue
+        info = item.process
+        spawned = info is not None and info.start_time is not None
+        event = {
+            'time': round(info.start_time, 3) if spawned else run,
+            'run': run,
+            'record': record_name,
+            'index': item.index,
+            'path': item.path,
+            'scheduled': _ms(item.deadline - result.started) if item.deadline is not None else None,
+            'jitter': _ms(item.jitter),
+            'throttled': _ms(item.throttled) if item.throttled else None,
+            'throttle_reason': '，'.join(item.throttle_reasons) if item.throttled else None,
+            'spawn_latency': _ms(info.spawn_latency) if spawned else None,
+            'ready': _ms(info.ready_time - info.start_time) if spawned and info.ready_time else None,
+            'idle': _ms(info.idle_time - info.start_time) if spawned and info.idle_time else None,
+            'exit': _ms(info.end_time - info.start_time) if spawned and info.end_time else None,
+            'exit_code': info.exit_code if info is not None else None,
+            'peak_rss': info.peak_rss if info is not None else None,
+            'error': errors.get(item),
+        }
+        events.append(event)
+    return events
+
+
+def percentile(values, q):
+    """values 的第 q 百分位数（线性插值），values 为空时返回 None"""
+    values = sorted(values)
+    if not values:
+        return None
+    position = (len(values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def settle_time(event):
+    """启动到就绪（或退出）的秒数"""
+    return event['ready'] if event.get('ready') is not None else event.get('exit')
+
+
+def summarize(events):
+    """按路径汇总事件，返回 {路径: 统计}，按在文件列表中的位置排序"""
+    groups = {}
+    for event in events:
+        groups.setdefault(event['path'], []).append(event)
+    summary = {}
+    for path, group in sorted(groups.items(), key=lambda pair: pair[1][-1]['index']):
+        spawn = [e['spawn_latency'] for e in group if e.get('spawn_latency') is not None]
+        settle = [settle_time(e) for e in group if settle_time(e) is not None]
+        rss = [e['peak_rss'] for e in group if e.get('peak_rss')]
+        summary[path] = {
+            'runs': len(group),
+            'errors': sum(1 for e in group if e.get('error')),
+            'spawn_p50': percentile(spawn, 50),
+            'spawn_p95': percentile(spawn, 95),
+            'settle_p50': percentile(settle, 50),
+            'settle_p95': percentile(settle, 95),
+            'peak_rss': max(rss) if rss else None,
+        }
+    return summary
+
+
+class MetricsStore:
+    """追加写入、按大小轮转的统计文件"""
+
+    def __init__(self, path, max_bytes=MAX_BYTES, keep=KEEP):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def _rotated(self, number):
+        return f"{self.path}.{number}"
+
+    def append(self, events):
+        if not events:
+            return
+        data = ''.join(json.dumps(event, ensure_ascii=False, separators=(',', ':')) + '\n' for event in events)
+        with self._lock:
+            try:
+                size = os.path.getsize(self.path)
+            except OSError:
+                size = 0
+            if size and size + len(data.encode('utf-8')) > self.max_bytes:
+                self._rotate()
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(data)
+
+    def _rotate(self):
+        if self.keep <= 0:
+            os.remove(self.path)
+            return
+        for number in range(self.keep - 1, 0, -1):
+            if os.path.exists(self._rotated(number)):
+                os.replace(self._rotated(number), self._rotated(number + 1))
+        os.replace(self.path, self._rotated(1))
+
+    def read(self, record_name=None):
+        """读取所有事件（从旧到新），可以只取某条记录的"""
+        events = []
+        with self._lock:
+            paths = [self._rotated(number) for number in range(self.keep, 0, -1)] + [self.path]
+            for path in paths:
+                try:
+                    with open(path, encoding='utf-8') as f:
+                        lines = f.readlines()
+                except OSError:
+                    continue
+                for line in lines:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # 写到一半的行
+                        continue
+                    if record_name is None or event.get('record') == record_name:
+                        events.append(event)
+        return events
+
+
+def export(events, path):
+    """导出事件，扩展名为 .csv 时导出 CSV，否则导出 JSON"""
+    if path.lower().endswith('.csv'):
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(events)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(events, f, ensure_ascii=False, indent=2)
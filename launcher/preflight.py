@@ -0,0 +1,161 @@
+"""启动前检查
+
+在启动任何文件之前并行检查记录中的所有路径：是否存在、能否直接执行、大小、修改时间，
+脚本还要检查 #! 行指定的解释器是否存在。网络路径上一次 stat 可能要几百毫秒，
+所以检查结果按 (路径, 修改时间) 缓存：
+
+- ttl 秒内再次检查同一路径直接使用缓存，不访问文件系统
+- 超过 ttl 只重新 stat 一次，修改时间和大小没变时沿用上次的结果，
+  不再读取文件头、查找解释器
+"""
+import os
+import shutil
+import sys
+import threading
+import time
+
+DEFAULT_TTL = 10.0
+MAX_WORKERS = 16
+
+# Windows 上可以直接创建进程的扩展名，其余文件交给系统默认程序打开
+WINDOWS_EXECUTABLE = ('.exe', '.bat', '.cmd', '.com')
+
+
+class CheckResult:
+    """一个路径的检查结果"""
+
+    __slots__ = ('path', 'exists', 'executable', 'size', 'mtime', 'interpreter', 'problem', 'warning')
+
+    def __init__(self, path):
+        self.path = path
+        self.exists = False
+        self.executable = False
+        self.size = None
+        self.mtime = None
+        self.interpreter = None  # 脚本 #! 行中的解释器
+        self.problem = None  # 无法启动的原因
+        self.warning = None  # 可以启动但可能有问题
+
+    @property
+    def ok(self):
+        return self.problem is None
+
+    def describe(self):
+        """在文件列表中显示的状态文本"""
+        return self.problem or self.warning or ""
+
+
+def _read_shebang(path):
+    """返回脚本 #! 行中的解释器命令，不是脚本时返回 None"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(256)
+    except OSError:
+        return None
+    if not head.startswith(b'#!'):
+        return None
+    line = head[2:].split(b'\n', 1)[0].decode('utf-8', 'replace').strip()
+    parts = line.split()
+    if not parts:
+        return None
+    # /usr/bin/env python3 这种写法实际要找的是 python3
+    if os.path.basename(parts[0]) == 'env' and len(parts) > 1:
+        return parts[1]
+    return parts[0]
+
+
+def _interpreter_exists(interpreter):
+    if os.path.isabs(interpreter):
+        return os.access(interpreter, os.X_OK)
+    return shutil.which(interpreter) is not None
+
+
+def inspect(path, stat):
+    """根据 stat 结果检查一个已存在的路径（会读取文件头）"""
+    result = CheckResult(path)
+    result.exists = True
+    result.size = stat.st_size
+    result.mtime = stat.st_mtime
+    if os.path.isdir(path):
+        result.warning = "是文件夹，将用文件管理器打开"
+        return result
+    if sys.platform == 'win32':
+        result.executable = path.lower().endswith(WINDOWS_EXECUTABLE)
+        return result
+    result.executable = os.access(path, os.X_OK)
+    result.interpreter = _read_shebang(path)
+    if result.interpreter is not None:
+        if not _interpreter_exists(result.interpreter):
+            result.problem = f"解释器不存在: {result.interpreter}"
+        elif not result.executable:
+            result.warning = "脚本没有执行权限，将用默认程序打开"
+    return result
+
+
+class StatCache:
+    """按 (路径, 修改时间) 缓存的检查结果"""
+
+    def __init__(self, ttl=DEFAULT_TTL):
+        self.ttl = ttl
+        self._entries = {}  # path -> (检查时刻, (mtime_ns, size) 或 None, 结果)
+        self._lock = threading.Lock()
+
+    def cached(self, path):
+        """ttl 内的缓存结果，没有时返回 None"""
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[2]
+        return None
+
+    def check(self, path):
+        """检查一个路径，优先使用缓存"""
+        result = self.cached(path)
+        if result is not None:
+            return result
+        with self._lock:
+            entry = self._entries.get(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            result = CheckResult(path)
+            result.problem = "文件不存在"
+            key = None
+        else:
+            key = (stat.st_mtime_ns, stat.st_size)
+            if entry is not None and entry[1] == key:
+                result = entry[2]
+            else:
+                result = inspect(path, stat)
+        with self._lock:
+            self._entries[path] = (time.monotonic(), key, result)
+        return result
+
+    def check_many(self, paths, max_workers=MAX_WORKERS):
+        """并行检查多个路径，返回 {路径: 结果}"""
+        results = {}
+        todo = []
+        for path in dict.fromkeys(paths):
+            result = self.cached(path)
+            if result is not None:
+                results[path] = result
+            else:
+                todo.append(path)
+        if len(todo) == 1:
+            results[todo[0]] = self.check(todo[0])
+        elif todo:
+            # 只有需要访问文件系统时才创建线程池
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(todo)),
+                                    thread_name_prefix='preflight') as pool:
+                for path, result in zip(todo, pool.map(self.check, todo)):
+                    results[path] = result
+        return results
+
+    def invalidate(self, path=None):
+        """丢弃某个路径（或全部）的缓存"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
@@ -0,0 +1,194 @@
+"""就绪探测
+
+文件项可以带一个 probe 字段，描述它启动后怎样才算"就绪"，
+依赖它的项会在探测成功后立即启动。支持的类型：
+
+    {"type": "port", "host": "127.0.0.1", "port": 5432}    端口可以连接
+    {"type": "file", "path": "C:/db/ready.flag"}           文件出现
+    {"type": "socket", "path": "/run/user/1000/app.sock"}  Unix 套接字出现
+    {"type": "process", "name": "postgres"}                进程名出现
+    {"type": "log", "path": "app.log", "pattern": "started"}  日志中出现匹配行
+
+所有类型都可以指定 timeout（秒，默认 60）和 interval（轮询间隔，默认 0.2）。
+"""
+import os
+import re
+import stat
+import subprocess
+import sys
+import time
+
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_INTERVAL = 0.2
+
+
+class ProbeError(ValueError):
+    """探测配置错误"""
+
+
+class Probe:
+    """探测基类，子类实现 check()"""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.timeout = float(spec.get('timeout', DEFAULT_TIMEOUT))
+        self.interval = float(spec.get('interval', DEFAULT_INTERVAL))
+
+    def start(self):
+        """被探测的程序启动时调用"""
+
+    def check(self):
+        raise NotImplementedError
+
+    def describe(self):
+        return self.spec['type']
+
+    def wait(self, cancelled=None):
+        """轮询直到就绪、超时或被取消，返回是否就绪"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                if self.check():
+                    return True
+            except OSError:
+                pass
+            if cancelled is not None and cancelled():
+                return False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.interval, remaining))
+
+
+class PortProbe(Probe):
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.host = spec.get('host', '127.0.0.1')
+        self.port = int(spec['port'])
+
+    def check(self):
+        import socket
+        with socket.create_connection((self.host, self.port), timeout=self.interval):
+            return True
+
+    def describe(self):
+        return f"端口 {self.host}:{self.port}"
+
+
+class FileProbe(Probe):
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.path = spec['path']
+
+    def check(self):
+        return os.path.exists(self.path)
+
+    def describe(self):
+        return f"文件 {self.path}"
+
+
+class SocketProbe(FileProbe):
+    def check(self):
+        return stat.S_ISSOCK(os.stat(self.path).st_mode)
+
+    def describe(self):
+        return f"套接字 {self.path}"
+
+
+def _process_names():
+    """返回当前所有进程名（小写）"""
+    names = set()
+    if os.path.isdir('/proc'):
+        for pid in os.listdir('/proc'):
+            if not pid.isdigit():
+                continue
+            try:
+                with open(f'/proc/{pid}/comm', encoding='utf-8', errors='replace') as f:
+                    names.add(f.read().strip().lower())
+            except OSError:
+                continue
+    elif sys.platform == 'win32':
+        output = subprocess.run(['tasklist', '/FO', 'CSV', '/NH'], capture_output=True,
+                                text=True, errors='replace').stdout
+        for line in output.splitlines():
+            if line.startswith('"'):
+                names.add(line.split('","', 1)[0].strip('"').lower())
+    else:
+        output = subprocess.run(['ps', '-A', '-o', 'comm='], capture_output=True,
+                                text=True, errors='replace').stdout
+        names.update(os.path.basename(line.strip()).lower() for line in output.splitlines())
+    return names
+
+
+class ProcessProbe(Probe):
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.name = spec['name'].lower()
+        # 兼容 Windows 上带或不带 .exe 的写法；Linux 的 comm 最多 15 个字符
+        self.candidates = {self.name, self.name[:15]}
+        if not self.name.endswith('.exe'):
+            self.candidates.add(self.name + '.exe')
+
+    def check(self):
+        return not self.candidates.isdisjoint(_process_names())
+
+    def describe(self):
+        return f"进程 {self.name}"
+
+
+class LogProbe(Probe):
+    """只匹配程序启动之后新写入日志的内容"""
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.path = spec['path']
+        self.pattern = re.compile(spec['pattern'])
+        self.offset = 0
+        self.partial = ''
+
+    def start(self):
+        try:
+            self.offset = os.path.getsize(self.path)
+        except OSError:
+            self.offset = 0
+
+    def check(self):
+        size = os.path.getsize(self.path)
+        if size < self.offset:
+            # 日志被截断或轮转，从头开始读
+            self.offset = 0
+            self.partial = ''
+        if size == self.offset:
+            return False
+        with open(self.path, 'r', encoding='utf-8', errors='replace') as f:
+            f.seek(self.offset)
+            chunk = f.read()
+            self.offset = f.tell()
+        lines = (self.partial + chunk).split('\n')
+        self.partial = lines.pop()
+        return any(self.pattern.search(line) for line in lines)
+
+    def describe(self):
+        return f"日志 {self.path} 匹配 {self.pattern.pattern}"
+
+
+PROBE_TYPES = {
+    'port': PortProbe,
+    'file': FileProbe,
+    'socket': SocketProbe,
+    'process': ProcessProbe,
+    'log': LogProbe,
+}
+
+
+def make_probe(spec):
+    """根据配置创建探测对象，配置为空时返回 None"""
+    if not spec:
+        return None
+    try:
+        probe_class = PROBE_TYPES[spec['type']]
+        return probe_class(spec)
+    except KeyError as e:
+        raise ProbeError(f"探测配置缺少或包含未知字段: {e}") from None
+    except (TypeError, ValueError, re.error) as e:
+        raise ProbeError(f"探测配置无效: {e}") from None
@@ -0,0 +1,168 @@
+"""启动程序的资源设置
+
+文件项可以用 resources 字段为程序指定 CPU、优先级和 cgroup，让需要先用上的交互程序
+先获得资源，后台程序只占用剩下的部分：
+
+    "resources": {
+        "cpus": "0-3,6",              CPU 亲和性
+        "nice": 10,                   调度优先级，-20 ~ 19
+        "ionice": "idle",             IO 调度类：realtime[:0-7]、best-effort[:0-7]、idle
+        "cgroup": {                   通过 systemd-run --user --scope 放入 cgroup v2
+            "slice": "background.slice",
+            "cpu_quota": "50%",
+            "cpu_weight": 50,
+            "memory_max": "2G",
+            "io_weight": 50
+        }
+    }
+
+设置通过在命令前加上 systemd-run / taskset / nice / ionice 实现，这些命令都会直接 exec
+目标程序，进程号不变，程序启动时就已生效，之后创建的子进程也会继承。目前只支持 Linux。
+"""
+import shutil
+import sys
+
+
+class ResourceError(ValueError):
+    """资源设置错误"""
+
+
+IONICE_CLASSES = {'realtime': 1, 'best-effort': 2, 'idle': 3}
+
+# cgroup 字段对应的 systemd 属性
+CGROUP_PROPERTIES = {
+    'cpu_quota': 'CPUQuota',
+    'cpu_weight': 'CPUWeight',
+    'memory_max': 'MemoryMax',
+    'memory_high': 'MemoryHigh',
+    'io_weight': 'IOWeight',
+}
+
+
+def parse_cpus(spec):
+    """把 "0-3,6" 或 [0, 1] 解析为排好序的 CPU 编号列表"""
+    if isinstance(spec, (list, tuple)):
+        parts = [str(cpu) for cpu in spec]
+    else:
+        parts = [part.strip() for part in str(spec).split(',') if part.strip()]
+    cpus = set()
+    try:
+        for part in parts:
+            if '-' in part:
+                first, last = (int(value) for value in part.split('-', 1))
+                if first > last:
+                    raise ValueError
+                cpus.update(range(first, last + 1))
+            else:
+                cpus.add(int(part))
+    except ValueError:
+        raise ResourceError(f"CPU 列表格式错误: {spec}")
+    if not cpus or min(cpus) < 0:
+        raise ResourceError(f"CPU 列表格式错误: {spec}")
+    return sorted(cpus)
+
+
+def format_cpus(cpus):
+    """把 CPU 编号列表写成 "0-3,6" 的形式"""
+    ranges = []
+    for cpu in cpus:
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ','.join(str(first) if first == last else f"{first}-{last}" for first, last in ranges)
+
+
+def parse_ionice(spec):
+    """把 "best-effort:7" 解析为 (调度类编号, 级别或 None)"""
+    name, _, level = str(spec).partition(':')
+    if name not in IONICE_CLASSES:
+        raise ResourceError(f"未知的 IO 调度类: {name}（可用: {', '.join(IONICE_CLASSES)}）")
+    if not level:
+        return IONICE_CLASSES[name], None
+    if name == 'idle':
+        raise ResourceError("idle 调度类没有优先级")
+    try:
+        level = int(level)
+    except ValueError:
+        raise ResourceError(f"IO 优先级必须是 0 ~ 7 的整数: {level}")
+    if not 0 <= level <= 7:
+        raise ResourceError(f"IO 优先级必须是 0 ~ 7 的整数: {level}")
+    return IONICE_CLASSES[name], level
+
+
+class Resources:
+    """一个文件项的资源设置"""
+
+    def __init__(self, spec):
+        if not isinstance(spec, dict):
+            raise ResourceError("resources 必须是对象")
+        unknown = set(spec) - {'cpus', 'nice', 'ionice', 'cgroup'}
+        if unknown:
+            raise ResourceError(f"未知的资源设置: {', '.join(sorted(unknown))}")
+        self.cpus = parse_cpus(spec['cpus']) if spec.get('cpus') not in (None, '') else None
+        self.nice = None
+        if spec.get('nice') is not None:
+            try:
+                self.nice = int(spec['nice'])
+            except (TypeError, ValueError):
+                raise ResourceError(f"nice 必须是整数: {spec['nice']}")
+            if not -20 <= self.nice <= 19:
+                raise ResourceError(f"nice 必须在 -20 ~ 19 之间: {self.nice}")
+        self.ionice = parse_ionice(spec['ionice']) if spec.get('ionice') else None
+        self.cgroup = dict(spec.get('cgroup') or {})
+        unknown = set(self.cgroup) - set(CGROUP_PROPERTIES) - {'slice'}
+        if unknown:
+            raise ResourceError(f"未知的 cgroup 设置: {', '.join(sorted(unknown))}")
+
+    def _tool(self, name):
+        path = shutil.which(name)
+        if path is None:
+            raise ResourceError(f"找不到 {name} 命令，无法应用资源设置")
+        return path
+
+    def command(self, argv):
+        """在启动命令前加上应用资源设置的命令"""
+        if sys.platform != 'linux':
+            raise ResourceError("资源设置目前只支持 Linux")
+        prefix = []
+        if self.cgroup:
+            prefix += [self._tool('systemd-run'), '--user', '--scope', '--quiet']
+            if self.cgroup.get('slice'):
+                prefix.append(f"--slice={self.cgroup['slice']}")
+            for key, name in CGROUP_PROPERTIES.items():
+                if self.cgroup.get(key) not in (None, ''):
+                    prefix += ['-p', f"{name}={self.cgroup[key]}"]
+            prefix.append('--')
+        if self.cpus is not None:
+            prefix += [self._tool('taskset'), '-c', format_cpus(self.cpus)]
+        if self.nice is not None:
+            prefix += [self._tool('nice'), '-n', str(self.nice)]
+        if self.ionice is not None:
+            io_class, level = self.ionice
+            prefix += [self._tool('ionice'), '-c', str(io_class)]
+            if level is not None:
+                prefix += ['-n', str(level)]
+        return prefix + list(argv)
+
+    def describe(self):
+        parts = []
+        if self.cpus is not None:
+            parts.append(f"CPU {format_cpus(self.cpus)}")
+        if self.nice is not None:
+            parts.append(f"nice {self.nice}")
+        if self.ionice is not None:
+            io_class, level = self.ionice
+            name = next(key for key, value in IONICE_CLASSES.items() if value == io_class)
+            parts.append(f"IO {name}" + (f":{level}" if level is not None else ""))
+        if self.cgroup:
+            limits = [f"{key}={value}" for key, value in self.cgroup.items() if key != 'slice' and value not in (None, '')]
+            parts.append(f"cgroup {self.cgroup.get('slice') or ''} {' '.join(limits)}".rstrip())
+        return ', '.join(parts)
+
+
+def make_resources(spec):
+    """根据文件项中的 resources 字段创建 Resources，没有设置时返回 None"""
+    if not spec:
+        return None
+    return Resources(spec)
@@ -0,0 +1,255 @@
+"""基于绝对截止时间的启动调度器
+
+每个文件项在运行时换算成一个单调时钟上的绝对截止时间，
+放入按截止时间排序的优先队列。调度线程只等待最早的截止时间，
+因此启动本身耗费的时间不会累加到后续项的延迟上。
+截止时间可以在运行过程中由其他线程加入（例如依赖项就绪时）。
+所有等待都在条件变量上进行，暂停、跳过等待和停止在几毫秒内生效。
+"""
+import heapq
+import itertools
+import threading
+import time
+
+# 延迟从上一项的计划启动时间算起（与旧版逐个等待的行为一致）
+SEQUENTIAL = 'sequential'
+# 延迟从本次运行开始的时间算起
+OFFSET = 'offset'
+
+SCHEDULE_MODES = (SEQUENTIAL, OFFSET)
+
+
+class MonotonicClock:
+    """真实的单调时钟"""
+
+    def now(self):
+        return time.monotonic()
+
+    def wait(self, cond, timeout):
+        cond.wait(timeout)
+
+
+class LaunchItem:
+    """一次运行中的单个启动项"""
+
+    def __init__(self, index, entry):
+        self.index = index  # 在文件列表中的位置（从 1 开始）
+        self.entry = entry
+        self.path = entry['path']
+        self.delay = float(entry.get('delay', 0) or 0)
+        self.mode = entry.get('schedule', SEQUENTIAL)
+        if self.mode not in SCHEDULE_MODES:
+            raise ValueError(f"未知的调度方式: {self.mode}")
+        self.deadline = None  # 计划启动时间
+        self.actual = None  # 实际启动时间
+        self.launched = False
+        self.process = None  # 启动后对应的 ProcessInfo
+        self.check = None  # 启动前检查的结果（preflight.CheckResult）
+        self.blocked = None  # 依赖项启动失败、不能再启动时的原因
+        self.latest = None  # 按负载调节时最晚的启动时间，为 None 表示不调节
+        self.due = None  # 按负载调节时第一次到期的时间
+        self.throttle_reasons = []  # 最近一次被推迟时系统繁忙的原因
+
+    @property
+    def name(self):
+        return self.entry.get('id') or self.path
+
+    @property
+    def throttled(self):
+        """因为系统繁忙推迟了多久（秒）"""
+        if self.due is None or self.deadline is None:
+            return 0.0
+        return self.deadline - self.due
+
+    @property
+    def jitter(self):
+        """实际启动时间与计划时间之差（秒）"""
+        if self.deadline is None or self.actual is None:
+            return None
+        return self.actual - self.deadline
+
+
+class Scheduler:
+    """按截止时间出队的调度循环
+
+    launch_batch(items) 在截止时间到达时被调用，同一截止时间的项一起出队；
+    on_wait(item, remaining) 在开始等待某一项之前调用一次，可用于显示状态。
+    expect(n) 登记尚未排入队列的项，队列为空时调度循环会继续等待它们。
+
+    提供 throttle（throttle.Throttle）时，设置了 latest 的项到期后如果系统繁忙会被推迟，
+    每 throttle.interval 秒重新检查，最晚在 latest 启动；每次推迟都会调用 on_throttle(item, reasons)。
+    """
+
+    def __init__(self, launch_batch, on_wait=None, clock=None, throttle=None, on_throttle=None):
+        self.launch_batch = launch_batch
+        self.on_wait = on_wait
+        self.clock = clock or MonotonicClock()
+        self.throttle = throttle
+        self.on_throttle = on_throttle
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._expected = 0
+        self._paused_at = None  # 暂停的时刻
+        self._pause_mark = None  # 暂停时计数器的值，之后加入的项继续后不再顺延
+
+    def expect(self, count):
+        """登记 count 个稍后才会加入队列的项"""
+        with self._cond:
+            self._expected += count
+
+    def schedule(self, item, deadline):
+        """加入一个启动项，可在运行过程中从其他线程调用
+
+        同一项可以被多次加入（例如超时兜底和就绪通知），以最早出队的为准。
+        """
+        with self._cond:
+            heapq.heappush(self._heap, (deadline, next(self._counter), item))
+            self._cond.notify()
+
+    def stop(self):
+        """停止调度，尚未到期的项不再启动"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    @property
+    def stopped(self):
+        return self._stopped
+
+    @property
+    def paused(self):
+        return self._paused_at is not None
+
+    def pause(self):
+        """暂停调度，到期的项等到继续后再启动"""
+        with self._cond:
+            if self._paused_at is None:
+                self._paused_at = self.clock.now()
+                self._pause_mark = next(self._counter)
+            self._cond.notify_all()
+
+    def resume(self):
+        """继续调度，暂停前已在队列中的项按暂停的时长顺延，剩余的等待时间不变"""
+        with self._cond:
+            if self._paused_at is None:
+                return
+            shift = self.clock.now() - self._paused_at
+            heap = []
+            for deadline, count, item in self._heap:
+                if count < self._pause_mark:
+                    deadline += shift
+                    if item.latest is not None:
+                        item.latest += shift
+                heap.append((deadline, count, item))
+            heapq.heapify(heap)
+            self._heap = heap
+            self._paused_at = None
+            self._cond.notify_all()
+
+    def proceed(self):
+        """已经出队的项真正启动之前调用（可以在工作线程中）：暂停时等到继续，返回是否没有被停止"""
+        with self._cond:
+            while self._paused_at is not None and not self._stopped:
+                self.clock.wait(self._cond, None)
+            return not self._stopped
+
+    def skip(self):
+        """跳过当前的等待，让最早的一项马上到期，返回这一项（没有等待的项时返回 None）"""
+        with self._cond:
+            while self._heap and self._heap[0][2].launched:
+                heapq.heappop(self._heap)
+            if not self._heap:
+                return None
+            _, _, item = heapq.heappop(self._heap)
+            now = self.clock.now()
+            if item.latest is not None:
+                # 也不再等系统空闲
+                item.latest = now
+            heapq.heappush(self._heap, (now, next(self._counter), item))
+            self._cond.notify()
+            return item
+
+    def run(self):
+        """运行调度循环，直到所有项都已启动或被停止"""
+        announced = None
+        while True:
+            waiting = None
+            due = {}  # 已到期的项 -> 截止时间
+            with self._cond:
+                # 丢弃已经启动过的重复项
+                while self._heap and self._heap[0][2].launched:
+                    heapq.heappop(self._heap)
+                if self._stopped:
+                    return
+                if self._paused_at is not None:
+                    # 继续后重新显示等待状态
+                    announced = None
+                    self.clock.wait(self._cond, None)
+                    continue
+                if not self._heap:
+                    if self._expected <= 0:
+                        return
+                    self.clock.wait(self._cond, None)
+                    continue
+                deadline, _, head = self._heap[0]
+                now = self.clock.now()
+                if now < deadline:
+                    if self.on_wait is None or head is announced:
+                        self.clock.wait(self._cond, deadline - now)
+                        continue
+                    announced = head
+                    waiting = (head, deadline - now)
+                else:
+                    # 取出所有已到期的项，截止时间相同的项一起启动；同一项重复加入时以最早的为准
+                    while self._heap and self._heap[0][0] <= now:
+                        deadline, _, item = heapq.heappop(self._heap)
+                        if not item.launched:
+                            due.setdefault(item, deadline)
+            # 回调在锁外执行，避免界面操作阻塞其他线程加入新项
+            if waiting:
+                self.on_wait(*waiting)
+                continue
+            # 读取系统负载要访问 /proc，同样在锁外进行，暂停、跳过等待和加入新项不必等它
+            held = [item for item, deadline in due.items() if self._hold(item, deadline, now)]
+            batch = []
+            with self._cond:
+                for item, deadline in due.items():
+                    if item in held:
+                        heapq.heappush(self._heap, (min(now + self.throttle.interval, item.latest),
+                                                    next(self._counter), item))
+                        # 推迟期间不再显示"等待 N 秒"
+                        announced = item
+                        continue
+                    item.launched = True
+                    item.deadline = deadline
+                    batch.append(item)
+                    self._expected -= 1
+            if self.on_throttle is not None:
+                for item in held:
+                    self.on_throttle(item, item.throttle_reasons)
+            if batch:
+                self.launch_batch(batch)
+
+    def _hold(self, item, deadline, now):
+        """系统繁忙时是否推迟到期的项（在锁外调用）"""
+        if self.throttle is None or item.latest is None:
+            return False
+        if item.due is None:
+            item.due = deadline
+        if now >= item.latest:
+            return False
+        reasons = self.throttle.busy()
+        if not reasons:
+            return False
+        item.throttle_reasons = reasons
+        return True
+
+
+def jitter_summary(items):
+    """返回已启动项的 (平均偏差, 最大偏差)，单位秒"""
+    jitters = [item.jitter for item in items if item.jitter is not None]
+    if not jitters:
+        return 0.0, 0.0
+    return sum(jitters) / len(jitters), max(jitters)
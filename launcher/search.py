@@ -0,0 +1,221 @@
+"""历史记录的搜索索引
+
+记录名称和记录中的文件路径分别建立三元组索引（每个连续的三个字符 -> 包含它的文本），
+查询时取各三元组对应集合的交集，再逐个确认是否真的包含查询内容，
+几千条记录、几万个路径中的每次查询只需几毫秒。少于三个字符的查询直接扫描所有文本。
+不区分大小写，路径中的 \\ 和 / 视为相同。
+
+查询语法：
+
+    关键字 关键字 ...    每个关键字都要出现在记录名称或记录的某个文件路径中
+    path:路径            只查找文件路径中包含该内容的记录，之后的全部内容（包括空格）都属于路径；
+                         path: 要在开头或空格之后，xpath:foo 中的不算
+
+索引不加锁，只能在一个线程中修改。界面在后台线程中建好索引后交给 Tk 线程，之后只在 Tk 线程中修改，
+建好之前用 scan 逐条比较。索引模式加载的记录在用到之前没有读取文件列表，
+这些记录的路径从快照中读取后通过 set_paths 补上，补上之前只能按名称查到。
+"""
+import re
+
+from launcher.storage import LazyRecord
+
+PATH_PREFIX = 'path:'
+# 只认在开头或空白之后的 path:
+PATH_PATTERN = re.compile(r'(?:^|(?<=\s))' + re.escape(PATH_PREFIX), re.IGNORECASE)
+
+
+def normalize(text):
+    return text.replace('\\', '/').casefold()
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def record_paths(record):
+    """记录中的所有文件路径，文件列表尚未读取时返回 None（不会为此读取）"""
+    if isinstance(record, LazyRecord) and not record.loaded:
+        return None
+    return [file_item['path'] for file_item in record['files']]
+
+
+class TrigramIndex:
+    """一组文本的三元组索引，每个文本可以属于多个键"""
+
+    def __init__(self):
+        self.owners = {}  # 文本 -> 键的集合
+        self.grams = {}  # 三元组 -> 文本的集合
+
+    def __len__(self):
+        return len(self.owners)
+
+    def add(self, text, key):
+        owners = self.owners.get(text)
+        if owners is None:
+            owners = self.owners[text] = set()
+            for gram in trigrams(text):
+                self.grams.setdefault(gram, set()).add(text)
+        owners.add(key)
+
+    def remove(self, text, key):
+        owners = self.owners.get(text)
+        if owners is None:
+            return
+        owners.discard(key)
+        if owners:
+            return
+        del self.owners[text]
+        for gram in trigrams(text):
+            texts = self.grams[gram]
+            texts.discard(text)
+            if not texts:
+                del self.grams[gram]
+
+    def texts(self, query):
+        """包含 query 的所有文本"""
+        grams = trigrams(query)
+        if grams:
+            sets = sorted((self.grams.get(gram) or set() for gram in grams), key=len)
+            candidates = sets[0].intersection(*sets[1:]) if sets[0] else ()
+        else:
+            candidates = self.owners
+        return [text for text in candidates if query in text]
+
+    def keys(self, query):
+        """包含 query 的文本所属的所有键"""
+        keys = set()
+        for text in self.texts(query):
+            keys |= self.owners[text]
+        return keys
+
+
+def parse_query(query):
+    """返回 (名称或路径关键字列表, 路径关键字)，都已规范化"""
+    query = query.strip()
+    match = PATH_PATTERN.search(query)
+    path = None
+    if match:
+        path = normalize(query[match.end():].strip()) or None
+        query = query[:match.start()]
+    return [normalize(word) for word in query.split()], path
+
+
+class SearchIndex:
+    """历史记录名称和文件路径的搜索索引
+
+    记录以对象本身为准（按 id 区分，索引持有记录的引用，id 不会被复用）。
+    记录新增、改名、修改文件列表后调用 update(record)，删除后调用 remove(record)。
+    """
+
+    def __init__(self, records=()):
+        self.entries = {}  # id(记录) -> (记录, 规范化的名称, 规范化的路径集合或 None)
+        self.names = TrigramIndex()
+        self.paths = TrigramIndex()
+        self.reset(records)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def reset(self, records):
+        self.entries = {}
+        self.names = TrigramIndex()
+        self.paths = TrigramIndex()
+        for record in records:
+            self.update(record)
+
+    def update(self, record):
+        """加入或重新索引一条记录"""
+        paths = record_paths(record)
+        self._store(record, None if paths is None else {normalize(path) for path in paths})
+
+    def remove(self, record):
+        entry = self.entries.pop(id(record), None)
+        if entry is None:
+            return
+        _, name, paths = entry
+        self.names.remove(name, id(record))
+        for path in paths or ():
+            self.paths.remove(path, id(record))
+
+    def _store(self, record, paths):
+        self.remove(record)
+        key = id(record)
+        name = normalize(record['name'])
+        self.entries[key] = (record, name, paths)
+        self.names.add(name, key)
+        for path in paths or ():
+            self.paths.add(path, key)
+
+    def pending(self):
+        """路径尚未建立索引的记录"""
+        return [record for record, _, paths in self.entries.values() if paths is None]
+
+    def set_paths(self, results):
+        """补上后台读取到的路径，results 为 [(记录, 路径列表)]；期间被删除或已重新索引的记录跳过"""
+        for record, paths in results:
+            entry = self.entries.get(id(record))
+            if entry is not None and entry[0] is record and entry[2] is None:
+                self._store(record, {normalize(path) for path in paths})
+
+    @property
+    def complete(self):
+        """是否所有记录的路径都已建立索引"""
+        return all(paths is not None for _, _, paths in self.entries.values())
+
+    def search(self, query):
+        """符合查询的记录的 id 集合，查询为空时返回 None（表示不过滤）"""
+        words, path = parse_query(query)
+        if not words and path is None:
+            return None
+        matched = None
+        if path is not None:
+            matched = self.paths.keys(path)
+        for word in words:
+            keys = self.names.keys(word) | self.paths.keys(word)
+            matched = keys if matched is None else matched & keys
+            if not matched:
+                break
+        return matched
+
+
+def scan(records, query):
+    """不用索引逐条比较，结果与 SearchIndex.search 相同；索引建好之前使用
+
+    文件列表尚未读取的记录只比较名称（不会为此读取）。
+    """
+    words, path = parse_query(query)
+    if not words and path is None:
+        return None
+    matched = set()
+    for record in records:
+        paths = [normalize(file_path) for file_path in record_paths(record) or ()]
+        if path is not None and not any(path in file_path for file_path in paths):
+            continue
+        name = normalize(record['name'])
+        if all(word in name or any(word in file_path for file_path in paths) for word in words):
+            matched.add(id(record))
+    return matched
+
+
+def matching_positions(records, keys):
+    """records 中属于 keys 的记录的位置，keys 为 None 时返回 None"""
+    if keys is None:
+        return None
+    return {position for position, record in enumerate(records) if id(record) in keys}
+
+
+def matching_files(files, query):
+    """文件列表中路径符合查询的文件的位置；查询为空时返回 None（显示全部），没有符合的文件时返回空集合
+
+    文件列表通常只有几十项，直接逐个比较。
+    """
+    words, path = parse_query(query)
+    if not words and path is None:
+        return None
+    terms = words + ([path] if path is not None else [])
+    positions = set()
+    for position, file_item in enumerate(files):
+        normalized = normalize(file_item['path'])
+        if all(term in normalized for term in terms):
+            positions.add(position)
+    return positions
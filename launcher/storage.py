@@ -0,0 +1,581 @@
+"""历史记录的读写
+
+数据由三部分组成：
+
+- 快照 launcher_data.json：完整的记录列表，另带 journal_seq 字段。仍是普通的 JSON，
+  但每条记录单独占一行，便于按偏移量只读取其中一条。所有记录用到的文件项去重后保存在
+  file_entries 表中，记录的 files 只是文件项编号的列表
+- 索引 launcher_data.json.idx：每条记录的名称、文件数量、创建时间等信息及其在快照中的位置，
+  启动时只读取索引，记录的文件列表和文件项表在第一次用到时才从快照中读取
+- 日志 launcher_data.json.journal：快照之后的每一次修改，每行一条 JSON
+
+界面上的修改只追加到日志，由后台线程合并一段时间内的多次修改后一次写入并 fsync，
+日志累积到一定条数或程序退出时再原子地重写快照（先写临时文件再 os.replace），
+写到一半崩溃也不会丢失已有记录。旧版的数据文件（没有索引）会完整读取，下次重写快照时生成索引。
+
+内存中同一个文件项（路径和启动设置都相同）在所有记录中也只有一个 FileEntry 对象，
+数据文件和内存占用都与不同程序的数量成正比，而不是记录数 × 程序数。
+FileEntry 是只读的，修改前用 dict(entry) 复制一份（写时复制），一条记录的修改不会影响其他记录。
+"""
+import itertools
+import json
+import os
+import threading
+import time
+
+DEFAULT_DATA_FILE = "launcher_data.json"
+JOURNAL_SUFFIX = ".journal"
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 2
+# 只用于显示的字段，不参与去重也不保存（序号由文件在列表中的位置决定）
+TRANSIENT_KEYS = frozenset({'order'})
+
+# 最后一次修改之后等待多久再写入，期间的修改合并为一次写入
+DEFAULT_DEBOUNCE = 0.5
+# 距离第一次未写入的修改最多等待多久，避免连续修改时一直不落盘
+MAX_WRITE_DELAY = 2.0
+# 日志累积多少条修改后重写快照
+DEFAULT_COMPACT_AFTER = 500
+
+
+class LazyRecord(dict):
+    """文件列表尚未读取的历史记录
+
+    除 files 以外的字段在创建时就有；第一次访问 record['files'] 时才从快照中读取。
+    """
+
+    __slots__ = ('store', 'offset', 'length', 'count', 'dirty')
+
+    def __init__(self, header, store, offset, length, count):
+        super().__init__(header)
+        self.store = store
+        self.offset = offset
+        self.length = length
+        self.count = count
+        self.dirty = 0  # 创建后修改过的次数，未修改且未读取的记录重写快照时可以直接复制原文
+
+    @property
+    def loaded(self):
+        return dict.__contains__(self, 'files')
+
+    def __missing__(self, key):
+        if key != 'files':
+            raise KeyError(key)
+        files = self.store.read_files(self)
+        dict.__setitem__(self, 'files', files)
+        return files
+
+    def __contains__(self, key):
+        return key == 'files' or dict.__contains__(self, key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __setitem__(self, key, value):
+        self.dirty += 1
+        dict.__setitem__(self, key, value)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+
+class FileEntry(dict):
+    """多条记录共用的只读文件项，由 EntryPool 创建"""
+
+    __slots__ = ('id',)
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("共用的文件项不能修改，请先用 dict(entry) 复制一份")
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        # copy、deepcopy 和 pickle 得到可以修改的普通 dict
+        return dict, (dict(self),)
+
+
+def entry_key(fields):
+    """按内容去重用的键；常见的文件项只有路径、延迟这类简单值，不必序列化
+
+    键中带上值的类型：True == 1 == 1.0，只比较值会把 "delay": 1 和 "delay": 1.0 当成同一项。
+    """
+    key = tuple(sorted((name, type(value), value) for name, value in fields.items()))
+    try:
+        hash(key)
+    except TypeError:
+        # 资源设置、就绪探测等嵌套的值
+        key = json.dumps(fields, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return key
+
+
+class EntryPool:
+    """按内容去重的文件项，每个不同的文件项分配一个编号
+
+    按索引加载时文件项表由 loader 在第一次用到时才读取，只显示记录名称时不需要读它。
+    lock 与 RecordStore 共用，读取文件项表和修改记录不会互相等待对方的锁。
+    """
+
+    def __init__(self, lock=None):
+        self.by_id = {}
+        self.by_key = None  # 内容 -> 文件项，第一次 intern 时才建立
+        self._loader = None  # 尚未读取的文件项表
+        self._ids = itertools.count(1)
+        self._lock = lock or threading.RLock()
+
+    def __len__(self):
+        with self._lock:
+            self._load()
+            return len(self.by_id)
+
+    def load(self, table=None, loader=None):
+        """读入快照中的 file_entries 表 [[编号, 文件项], ...]，或者提供稍后读取它的 loader()"""
+        with self._lock:
+            self.by_id = {}
+            self.by_key = None
+            self._loader = loader
+            self._fill(table or [])
+
+    def _fill(self, table):
+        for entry_id, fields in table:
+            entry = FileEntry(fields)
+            entry.id = entry_id
+            self.by_id[entry_id] = entry
+        self._ids = itertools.count(max(self.by_id, default=0) + 1)
+
+    def _load(self):
+        if self._loader is not None:
+            loader, self._loader = self._loader, None
+            self._fill(loader())
+
+    def _intern(self, entry):
+        if isinstance(entry, FileEntry) and self.by_id.get(entry.id) is entry:
+            return entry
+        fields = entry
+        if not TRANSIENT_KEYS.isdisjoint(entry):
+            fields = {key: value for key, value in entry.items() if key not in TRANSIENT_KEYS}
+        key = entry_key(fields)
+        if self.by_key is None:
+            self._load()
+            self.by_key = {entry_key(existing): existing for existing in self.by_id.values()}
+        found = self.by_key.get(key)
+        if found is None:
+            found = self.by_key[key] = FileEntry(fields)
+            found.id = next(self._ids)
+            self.by_id[found.id] = found
+        return found
+
+    def intern(self, entry):
+        """返回与 entry 内容相同的共用文件项"""
+        with self._lock:
+            return self._intern(entry)
+
+    def resolve(self, files):
+        """把快照或日志中的文件列表（编号，或旧版格式中的完整文件项）转换为共用的文件项"""
+        with self._lock:
+            self._load()
+            return [self.by_id[ref] if isinstance(ref, int) else self._intern(ref) for ref in files]
+
+    def table(self, ids):
+        """编号在 ids 中的文件项，写入快照的 file_entries 表"""
+        with self._lock:
+            self._load()
+            return [[entry_id, dict(self.by_id[entry_id])] for entry_id in sorted(ids)]
+
+
+def file_count(record):
+    """记录中的文件数量，不会为此读取文件列表"""
+    if isinstance(record, LazyRecord) and not record.loaded:
+        return record.count
+    return len(record['files'])
+
+
+def record_header(record):
+    """记录中除文件列表以外的字段"""
+    return {key: value for key, value in dict.items(record) if key != 'files'}
+
+
+def _fsync_dir(path):
+    """让目录项的变化（新建、改名）落盘，Windows 上不支持时忽略"""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_temp(path, data):
+    """写入 path 对应的临时文件并 fsync，返回临时文件路径"""
+    temp_file = path + ".tmp"
+    with open(temp_file, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    return temp_file
+
+
+def write_atomic(path, data):
+    """先写临时文件再用 os.replace 替换，保证文件要么是旧内容要么是新内容"""
+    os.replace(write_temp(path, data), path)
+    _fsync_dir(path)
+
+
+def apply_op(records, op, entries):
+    """把一条日志中的修改应用到记录列表，文件列表转换为 entries 中的共用文件项"""
+    kind = op['op']
+    if 'files' in op.get('record', op.get('fields', {})):
+        target = op.get('record', op.get('fields'))
+        target['files'] = entries.resolve(target['files'])
+    if kind == 'insert':
+        records.insert(op['index'], op['record'])
+    elif kind == 'delete':
+        records.pop(op['index'])
+    elif kind == 'move':
+        records.insert(op['to'], records.pop(op['from']))
+    elif kind == 'update':
+        records[op['index']].update(op['fields'])
+    else:
+        raise ValueError(f"未知的日志操作: {kind}")
+
+
+class RecordStore:
+    """历史记录列表及其持久化
+
+    records 属性是记录列表本身，可以直接读取；修改必须通过 insert、append、
+    delete、move、update 进行，这些方法会同步修改列表并把变化排入后台写入队列。
+    on_error(exception) 在后台写入失败时调用。
+    """
+
+    def __init__(self, data_file=DEFAULT_DATA_FILE, debounce=DEFAULT_DEBOUNCE,
+                 compact_after=DEFAULT_COMPACT_AFTER, on_error=None):
+        self.data_file = data_file
+        self.journal_file = data_file + JOURNAL_SUFFIX
+        self.index_file = data_file + INDEX_SUFFIX
+        self.debounce = debounce
+        self.compact_after = compact_after
+        self.on_error = on_error
+        self.records = []
+        self.indexed = False  # 是否通过索引加载（否则下次重写快照时生成索引）
+        self._seq = 0  # 最后一条修改的序号
+        self._journal_ops = 0  # 日志中尚未合并进快照的修改条数
+        self._pending = []  # 尚未写入日志的修改
+        self._first_pending = None
+        self._last_change = None
+        self._compact_requested = False
+        self._cond = threading.Condition(threading.RLock())
+        self.entries = EntryPool(self._cond)  # 所有记录共用的文件项
+        self._entries_span = None  # 文件项表在快照中的位置 (偏移量, 长度)
+        self._writer = None
+        self._closed = False
+        self._journal_valid_size = None  # 日志末尾有残缺行时，有效内容的长度
+
+    # ---- 读取 ----
+
+    def exists(self):
+        return os.path.exists(self.data_file) or os.path.exists(self.journal_file)
+
+    def load(self):
+        """读取索引（或完整快照）并重放日志，数据文件不存在时返回 False"""
+        if not self.exists():
+            return False
+        records = []
+        snapshot_seq = 0
+        self.indexed = False
+        if os.path.exists(self.data_file):
+            loaded = self._load_index()
+            if loaded is not None:
+                records, snapshot_seq = loaded
+                self.indexed = True
+            else:
+                with open(self.data_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.entries.load(data.get('file_entries', []))
+                records = data.get('history_records', [])
+                for record in records:
+                    record['files'] = self.entries.resolve(record.get('files', []))
+                snapshot_seq = data.get('journal_seq', 0)
+        self._seq = snapshot_seq
+        self._journal_ops = 0
+        self._journal_valid_size = None
+        if os.path.exists(self.journal_file):
+            valid_size = 0
+            with open(self.journal_file, 'rb') as f:
+                for line in f:
+                    try:
+                        # 最后一行可能在写入时中断，之后的内容不可信
+                        if not line.endswith(b'\n'):
+                            raise ValueError
+                        op = json.loads(line)
+                    except ValueError:
+                        self._journal_valid_size = valid_size
+                        break
+                    valid_size += len(line)
+                    if op['seq'] <= snapshot_seq:
+                        continue
+                    apply_op(records, op, self.entries)
+                    self._seq = op['seq']
+                    self._journal_ops += 1
+        self.records[:] = records
+        return True
+
+    def _load_index(self):
+        """读取索引，索引不存在或与快照不一致（例如快照被手动编辑过）时返回 None"""
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            stat = os.stat(self.data_file)
+        except (OSError, ValueError):
+            return None
+        if (index.get('version') != INDEX_VERSION or index.get('snapshot_size') != stat.st_size
+                or index.get('snapshot_mtime_ns') != stat.st_mtime_ns):
+            return None
+        self._entries_span = index['file_entries_span']
+        self.entries.load(loader=self._read_entries)
+        records = [LazyRecord(header, self, offset, length, count)
+                   for offset, length, count, header in index['records']]
+        return records, index['journal_seq']
+
+    def _read_entries(self):
+        """从快照中读取文件项表（在 EntryPool 中第一次用到文件项时调用）"""
+        with self._cond:
+            with open(self.data_file, 'rb') as f:
+                f.seek(self._entries_span[0])
+                return json.loads(f.read(self._entries_span[1]))
+
+    def read_files(self, record):
+        """从快照中读取一条记录的文件列表"""
+        with self._cond:
+            with open(self.data_file, 'rb') as f:
+                f.seek(record.offset)
+                data = f.read(record.length)
+        return self.entries.resolve(json.loads(data).get('files', []))
+
+    def peek_files(self, record):
+        """记录的文件列表；尚未读取的记录从快照中读取，但不保存到记录中（建立搜索索引时使用）"""
+        if isinstance(record, LazyRecord) and not record.loaded:
+            return self.read_files(record)
+        return record['files']
+
+    # ---- 修改 ----
+
+    def insert(self, index, record):
+        """插入一条记录，记录的文件列表会被替换为共用的文件项"""
+        with self._cond:
+            if 'files' in record:
+                record['files'] = self.entries.resolve(record['files'])
+            self.records.insert(index, record)
+            self._queue({'op': 'insert', 'index': index, 'record': record})
+
+    def append(self, record):
+        with self._cond:
+            self.insert(len(self.records), record)
+
+    def delete(self, index):
+        with self._cond:
+            record = self.records.pop(index)
+            self._queue({'op': 'delete', 'index': index})
+        return record
+
+    def move(self, source, target):
+        with self._cond:
+            self.records.insert(target, self.records.pop(source))
+            self._queue({'op': 'move', 'from': source, 'to': target})
+
+    def update(self, index, **fields):
+        with self._cond:
+            if 'files' in fields:
+                fields['files'] = self.entries.resolve(fields['files'])
+            self.records[index].update(fields)
+            self._queue({'op': 'update', 'index': index, 'fields': fields})
+
+    def _queue(self, op):
+        # 调用方持有锁：修改列表和登记日志必须是一个整体，否则后台重写快照时可能看到不一致的状态
+        self._seq += 1
+        # 日志行在加入队列时就序列化，之后记录再被修改也不影响已排队的内容
+        op['seq'] = self._seq
+        self._pending.append(json.dumps(op, ensure_ascii=False))
+        now = time.monotonic()
+        if self._first_pending is None:
+            self._first_pending = now
+        self._last_change = now
+        self._ensure_writer()
+        self._cond.notify()
+
+    # ---- 写入 ----
+
+    def _ensure_writer(self):
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name='record-store', daemon=True)
+            self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            with self._cond:
+                while not self._closed and not self._pending and not self._compact_requested:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                if self._pending and not self._compact_requested:
+                    now = time.monotonic()
+                    due = min(self._last_change + self.debounce, self._first_pending + MAX_WRITE_DELAY)
+                    if now < due:
+                        self._cond.wait(due - now)
+                        continue
+            try:
+                self.flush()
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(e)
+                # 出错后等待下一次修改再重试，避免不停地重复报错
+                with self._cond:
+                    self._compact_requested = False
+                    if self._pending:
+                        self._cond.wait(MAX_WRITE_DELAY)
+
+    def flush(self):
+        """立即把排队的修改写入日志，必要时重写快照"""
+        with self._cond:
+            lines = self._pending
+            self._pending = []
+            self._first_pending = None
+            compact = self._compact_requested or self._journal_ops + len(lines) >= self.compact_after
+            if compact:
+                # 快照已包含所有修改，排队的日志行不必再写
+                snapshot = self._build_snapshot()
+                self._compact_requested = False
+        try:
+            if compact:
+                self._write_snapshot(*snapshot)
+            elif lines:
+                if self._journal_valid_size is not None:
+                    # 截掉上次崩溃留下的残缺行，否则之后追加的内容在重放时会被忽略
+                    os.truncate(self.journal_file, self._journal_valid_size)
+                    self._journal_valid_size = None
+                with open(self.journal_file, 'a', encoding='utf-8') as f:
+                    f.write('\n'.join(lines) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                with self._cond:
+                    self._journal_ops += len(lines)
+        except Exception:
+            # 写入失败时放回队列，下次重试
+            with self._cond:
+                self._pending[:0] = lines
+                if self._first_pending is None and self._pending:
+                    self._first_pending = time.monotonic()
+            raise
+
+    def _build_snapshot(self):
+        """在持有锁时生成快照内容和索引，返回 (快照, 索引项, 序号, [(记录, 修改计数)], 文件项表的位置)"""
+        seq = self._seq
+        lines = []
+        used = set()  # 记录用到的文件项编号
+        source = None
+        try:
+            for record in self.records:
+                if isinstance(record, LazyRecord) and not record.loaded and not record.dirty:
+                    # 未读取也未修改的记录直接复制快照中的原文，只解析出用到的文件项编号
+                    if source is None:
+                        source = open(self.data_file, 'rb')
+                    source.seek(record.offset)
+                    line = source.read(record.length)
+                    used.update(json.loads(line).get('files', []))
+                    count = record.count
+                else:
+                    # 先取 files，修改过但未读取文件列表的记录会在这里读入
+                    ids = [entry.id for entry in self.entries.resolve(record['files'])]
+                    used.update(ids)
+                    count = len(ids)
+                    line = json.dumps(dict(record, files=ids), ensure_ascii=False).encode('utf-8')
+                lines.append((record, line, count))
+        finally:
+            if source is not None:
+                source.close()
+        prefix = f'{{"journal_seq": {seq}, "file_entries": '.encode('utf-8')
+        table = json.dumps(self.entries.table(used), ensure_ascii=False).encode('utf-8')
+        span = [len(prefix), len(table)]
+        head = prefix + table + b', "history_records": [\n'
+        chunks = [head]
+        offset = len(head)
+        entries = []
+        versions = []
+        for i, (record, line, count) in enumerate(lines):
+            entries.append([offset, len(line), count, record_header(record)])
+            versions.append((record, record.dirty if isinstance(record, LazyRecord) else None))
+            separator = b',\n' if i < len(lines) - 1 else b'\n'
+            chunks.append(line)
+            chunks.append(separator)
+            offset += len(line) + len(separator)
+        chunks.append(b']}\n')
+        return b''.join(chunks), entries, seq, versions, span
+
+    def _write_snapshot(self, data, entries, seq, versions, span):
+        temp_file = write_temp(self.data_file, data)
+        with self._cond:
+            # 替换快照和更新记录位置要在锁内完成，避免读取文件列表时用旧偏移量读新文件
+            os.replace(temp_file, self.data_file)
+            _fsync_dir(self.data_file)
+            stat = os.stat(self.data_file)
+            self._entries_span = span
+            for (record, version), (offset, length, _, _) in zip(versions, entries):
+                if isinstance(record, LazyRecord):
+                    record.offset = offset
+                    record.length = length
+                    if record.dirty == version:
+                        record.dirty = 0
+            self.indexed = True
+        index = {
+            'version': INDEX_VERSION,
+            'journal_seq': seq,
+            'snapshot_size': stat.st_size,
+            'snapshot_mtime_ns': stat.st_mtime_ns,
+            'file_entries_span': span,
+            'records': entries
+        }
+        write_atomic(self.index_file, json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        # 快照带有 journal_seq，即使截断日志前崩溃，重放时也会跳过旧修改
+        with open(self.journal_file, 'w', encoding='utf-8'):
+            pass
+        self._journal_valid_size = None
+        with self._cond:
+            self._journal_ops = 0
+
+    def compact(self):
+        """请求在后台重写快照"""
+        with self._cond:
+            self._compact_requested = True
+            self._ensure_writer()
+            self._cond.notify()
+
+    def close(self):
+        """写入所有修改并重写快照，程序退出前调用"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        if self._pending or self._journal_ops or (not self.indexed and os.path.exists(self.data_file)):
+            self._compact_requested = True
+            self.flush()
+
+
+def load_records(data_file=DEFAULT_DATA_FILE):
+    """读取全部历史记录，数据文件不存在时返回 None"""
+    store = RecordStore(data_file)
+    if not store.load():
+        return None
+    return store.records
+
+
+def find_record(records, name):
+    """按名称查找历史记录，找不到时返回 None"""
+    for record in records:
+        if record['name'] == name:
+            return record
+    return None
@@ -0,0 +1,449 @@
+"""进程守护
+
+文件项可以用 supervise 字段让启动器在程序退出后自动重新启动：
+
+    "supervise": {
+        "restart": "on-failure",    on-failure：退出码不为 0 时重启（默认）；always：任何退出都重启
+        "backoff": 1,               第一次重启前等待的秒数，之后每次翻倍
+        "max_backoff": 60,          等待时间的上限
+        "max_restarts": 5,          window 秒内最多重启几次，超过后放弃并标记为失败
+        "window": 300,
+        "health": {                 可选的健康检查命令，退出码为 0 表示健康
+            "command": "curl -fs http://127.0.0.1:8080/health",
+            "interval": 30, "timeout": 5, "retries": 3
+        }
+    }
+
+"supervise": true 表示全部使用默认值。健康检查连续失败 retries 次时结束程序（不响应 SIGTERM 时强制结束），再按退避时间重新启动。
+重启等待时间按 window 秒内已经重启的次数计算，程序稳定运行一段时间后自动恢复为 backoff。
+
+子进程退出通过 pidfd（Linux 5.3+）在一个 selectors 事件循环中等待，重启前的等待、健康检查的间隔和超时
+也由同一个循环的定时器驱动，守护几十个程序时没有任何轮询。不支持 pidfd 的系统（Windows、macOS）上
+每个子进程用一个线程等待退出，再把回调交给事件循环执行。
+事件循环用 socket.socketpair() 唤醒：Windows 上的 select() 只接受套接字，不能用 os.pipe()。
+守护只在启动器进程（图形界面、--run 或 --daemon）运行期间有效。
+"""
+import collections
+import heapq
+import itertools
+import os
+import selectors
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+import time
+import traceback
+
+RUNNING = 'running'
+RESTARTING = 'restarting'
+STOPPED = 'stopped'
+FAILED = 'failed'
+
+STATE_NAMES = {RUNNING: "运行中", RESTARTING: "等待重启", STOPPED: "已退出", FAILED: "已放弃"}
+
+RESTART_POLICIES = ('on-failure', 'always')
+DEFAULTS = {
+    'restart': 'on-failure',
+    'backoff': 1.0,
+    'max_backoff': 60.0,
+    'max_restarts': 5,
+    'window': 300.0,
+}
+HEALTH_DEFAULTS = {'interval': 30.0, 'timeout': 5.0, 'retries': 3}
+
+
+class SuperviseError(ValueError):
+    """守护配置错误"""
+
+
+def _number(spec, key, default, cast=float, minimum=0):
+    value = spec.get(key, default)
+    try:
+        value = cast(value)
+    except (TypeError, ValueError):
+        raise SuperviseError(f"supervise.{key} 必须是数字: {value}")
+    if value < minimum:
+        raise SuperviseError(f"supervise.{key} 不能小于 {minimum}: {value}")
+    return value
+
+
+class SupervisePolicy:
+    """一个文件项的重启策略"""
+
+    def __init__(self, spec):
+        if not isinstance(spec, dict):
+            raise SuperviseError("supervise 必须是 true 或对象")
+        unknown = set(spec) - set(DEFAULTS) - {'health'}
+        if unknown:
+            raise SuperviseError(f"未知的守护设置: {', '.join(sorted(unknown))}")
+        self.restart = spec.get('restart', DEFAULTS['restart'])
+        if self.restart not in RESTART_POLICIES:
+            raise SuperviseError(f"未知的重启策略: {self.restart}（可用: {', '.join(RESTART_POLICIES)}）")
+        self.backoff = _number(spec, 'backoff', DEFAULTS['backoff'])
+        self.max_backoff = max(self.backoff, _number(spec, 'max_backoff', DEFAULTS['max_backoff']))
+        self.max_restarts = _number(spec, 'max_restarts', DEFAULTS['max_restarts'], int)
+        self.window = _number(spec, 'window', DEFAULTS['window'])
+        self.health = None
+        if spec.get('health'):
+            health = spec['health']
+            if not isinstance(health, dict) or not health.get('command'):
+                raise SuperviseError("supervise.health 需要 command")
+            self.health = {
+                'command': health['command'],
+                'interval': _number(health, 'interval', HEALTH_DEFAULTS['interval'], minimum=0.1),
+                'timeout': _number(health, 'timeout', HEALTH_DEFAULTS['timeout'], minimum=0.1),
+                'retries': _number(health, 'retries', HEALTH_DEFAULTS['retries'], int, minimum=1),
+            }
+
+    def delay(self, restarts):
+        """已经重启 restarts 次之后，下一次重启前等待的秒数"""
+        return min(self.max_backoff, self.backoff * 2 ** restarts)
+
+    def describe(self):
+        text = f"{'总是' if self.restart == 'always' else '异常退出时'}重启，{self.window:g} 秒内最多 {self.max_restarts} 次"
+        if self.health:
+            text += f"，每 {self.health['interval']:g} 秒健康检查"
+        return text
+
+
+def make_policy(spec):
+    """根据文件项中的 supervise 字段创建 SupervisePolicy，没有设置时返回 None"""
+    if not spec:
+        return None
+    return SupervisePolicy({} if spec is True else spec)
+
+
+def _pidfd(pid):
+    """打开进程的 pidfd，系统不支持时返回 None"""
+    if not hasattr(os, 'pidfd_open'):
+        return None
+    try:
+        return os.pidfd_open(pid)
+    except OSError:
+        return None
+
+
+class EventLoop:
+    """在一个后台线程中等待子进程退出、管道可读和定时器
+
+    所有回调都在这个线程中执行，其他线程通过 call_soon / call_later / watch_exit / watch_read 提交。
+    """
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._timers = []  # 堆：[时刻, 序号, 回调]，回调为 None 表示已取消
+        self._counter = itertools.count()
+        self._pending = collections.deque()
+        self._lock = threading.Lock()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+        self._thread = None
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b'\0')
+        except (BlockingIOError, InterruptedError):
+            # 缓冲区已满说明循环已经会被唤醒
+            pass
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='event-loop', daemon=True)
+                self._thread.start()
+
+    def call_soon(self, callback):
+        with self._lock:
+            self._pending.append(callback)
+        self._ensure_thread()
+        self._wake()
+
+    def call_later(self, delay, callback):
+        """delay 秒后执行 callback，返回可传给 cancel() 的句柄"""
+        timer = [time.monotonic() + delay, next(self._counter), callback]
+        with self._lock:
+            heapq.heappush(self._timers, timer)
+        self._ensure_thread()
+        self._wake()
+        return timer
+
+    def cancel(self, timer):
+        if timer is not None:
+            timer[2] = None
+
+    def watch_exit(self, popen, callback):
+        """子进程退出后在循环线程中执行 callback(退出码)"""
+        fd = _pidfd(popen.pid)
+        if fd is None:
+            def wait():
+                code = popen.wait()
+                self.call_soon(lambda: callback(code))
+
+            threading.Thread(target=wait, daemon=True).start()
+            return
+        def exited():
+            self._selector.unregister(fd)
+            os.close(fd)
+            # 进程已经退出，wait() 只回收状态，不会阻塞
+            callback(popen.wait())
+
+        # pidfd 在进程退出后一直可读，注册前就已退出也不会错过
+        self.call_soon(lambda: self._selector.register(fd, selectors.EVENT_READ, exited))
+
+    def watch_read(self, fd, callback):
+        """fd 可读时在循环线程中执行 callback()，直到调用 unwatch(fd)（只支持 POSIX 的管道）"""
+        self.call_soon(lambda: self._selector.register(fd, selectors.EVENT_READ, callback))
+
+    def unwatch(self, fd):
+        """在循环线程中调用，不再等待 fd"""
+        self._selector.unregister(fd)
+
+    def _run_callback(self, callback, *args):
+        try:
+            callback(*args)
+        except Exception:
+            traceback.print_exc()
+
+    def _next_timeout(self):
+        with self._lock:
+            while self._timers and self._timers[0][2] is None:
+                heapq.heappop(self._timers)
+            if not self._timers:
+                return None
+            return max(0.0, self._timers[0][0] - time.monotonic())
+
+    def _run(self):
+        while True:
+            for key, _ in self._selector.select(self._next_timeout()):
+                if key.data is None:
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except (BlockingIOError, InterruptedError):
+                        pass
+                    continue
+                self._run_callback(key.data)
+            now = time.monotonic()
+            due = []
+            with self._lock:
+                while self._timers and self._timers[0][0] <= now:
+                    timer = heapq.heappop(self._timers)
+                    if timer[2] is not None:
+                        due.append(timer[2])
+                due.extend(self._pending)
+                self._pending.clear()
+            for callback in due:
+                self._run_callback(callback)
+
+
+class Supervised:
+    """一个被守护的文件项"""
+
+    def __init__(self, item, policy, resources, listener, run=None):
+        self.item = item
+        self.run = run  # 启动它的 LaunchRun
+        self.path = item.path
+        self.policy = policy
+        self.resources = resources
+        self.listener = listener
+        self.process = None  # 当前的 ProcessInfo
+        self.state = RUNNING
+        self.detail = ""
+        self.restarts = collections.deque()  # window 内每次重启的时刻
+        self.total_restarts = 0
+        self.exit_code = None
+        self.health_failures = 0
+        self.unhealthy = False  # 因健康检查失败被结束
+        self.stopped = False  # 已停止守护
+        self.timer = None
+
+    @property
+    def active(self):
+        """是否仍在守护中"""
+        return self.state in (RUNNING, RESTARTING) and not self.stopped
+
+    def describe(self):
+        text = STATE_NAMES[self.state]
+        if self.detail:
+            text += f"（{self.detail}）"
+        if self.total_restarts and self.state == RUNNING:
+            text += f"，已重启 {self.total_restarts} 次"
+        return text
+
+
+class Supervisor:
+    """按重启策略守护启动引擎启动的程序"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.loop = engine.event_loop()
+        self.entries = []
+        self.stopped = False
+        self._cond = threading.Condition()
+
+    def add(self, info, policy, resources, listener, run=None):
+        """开始守护刚启动的进程，返回 Supervised"""
+        supervised = Supervised(info.item, policy, resources, listener, run)
+        supervised.process = info
+        supervised.stopped = self.stopped
+        with self._cond:
+            self.entries.append(supervised)
+        self._schedule_health(supervised)
+        self._changed(supervised)
+        return supervised
+
+    def active(self):
+        with self._cond:
+            return [supervised for supervised in self.entries if supervised.active]
+
+    def prune(self):
+        """丢弃已经不再守护的项"""
+        with self._cond:
+            self.entries = [supervised for supervised in self.entries if supervised.active]
+
+    def wait(self, timeout=None):
+        """阻塞到没有需要守护的程序，返回是否已经全部结束"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not any(s.active for s in self.entries), timeout)
+
+    def stop(self, run=None):
+        """不再重启和健康检查，已经运行的程序保持运行；指定 run 时只停止这次运行启动的项"""
+        with self._cond:
+            if run is None:
+                self.stopped = True
+            entries = [supervised for supervised in self.entries if run is None or supervised.run is run]
+        for supervised in entries:
+            supervised.stopped = True
+            self.loop.cancel(supervised.timer)
+            if supervised.state == RESTARTING:
+                supervised.detail = "已停止守护"
+                self._set_state(supervised, STOPPED)
+        with self._cond:
+            self._cond.notify_all()
+
+    def _set_state(self, supervised, state):
+        supervised.state = state
+        self._changed(supervised)
+
+    def _changed(self, supervised):
+        with self._cond:
+            self._cond.notify_all()
+        supervised.listener.on_supervise(supervised)
+
+    # 以下方法都在事件循环线程中执行
+
+    def exited(self, supervised, info):
+        """被守护的进程退出"""
+        if info is not supervised.process:
+            return
+        self.loop.cancel(supervised.timer)
+        supervised.exit_code = info.exit_code
+        failed = info.exit_code != 0 or supervised.unhealthy
+        if supervised.stopped:
+            supervised.detail = f"退出码 {info.exit_code}"
+            self._set_state(supervised, STOPPED)
+            return
+        if not failed and supervised.policy.restart != 'always':
+            supervised.detail = "正常退出"
+            self._set_state(supervised, STOPPED)
+            return
+        self._plan_restart(supervised, "健康检查失败" if supervised.unhealthy else f"退出码 {info.exit_code}")
+
+    def _plan_restart(self, supervised, reason):
+        policy = supervised.policy
+        now = time.monotonic()
+        while supervised.restarts and now - supervised.restarts[0] > policy.window:
+            supervised.restarts.popleft()
+        if len(supervised.restarts) >= policy.max_restarts:
+            supervised.detail = f"{reason}，{policy.window:g} 秒内已重启 {len(supervised.restarts)} 次"
+            self._set_state(supervised, FAILED)
+            return
+        delay = policy.delay(len(supervised.restarts))
+        supervised.detail = f"{reason}，{delay:g} 秒后重启"
+        supervised.timer = self.loop.call_later(delay, lambda: self._restart(supervised))
+        self._set_state(supervised, RESTARTING)
+
+    def _restart(self, supervised):
+        if supervised.stopped:
+            return
+        supervised.restarts.append(time.monotonic())
+        supervised.total_restarts += 1
+        supervised.unhealthy = False
+        supervised.health_failures = 0
+        try:
+            info = self.engine.respawn(supervised)
+        except Exception as e:
+            supervised.listener.on_error(supervised.item, f"重新启动失败 {supervised.path}: {e}")
+            self._plan_restart(supervised, "重新启动失败")
+            return
+        supervised.process = info
+        supervised.detail = ""
+        self._schedule_health(supervised)
+        self._set_state(supervised, RUNNING)
+
+    # ---- 健康检查 ----
+
+    def _schedule_health(self, supervised):
+        health = supervised.policy.health
+        if health is not None and not supervised.stopped:
+            supervised.timer = self.loop.call_later(health['interval'], lambda: self._check_health(supervised))
+
+    def _check_health(self, supervised):
+        if supervised.stopped or supervised.state != RUNNING:
+            return
+        command = supervised.policy.health['command']
+        if isinstance(command, str) and sys.platform != 'win32':
+            command = shlex.split(command)
+        try:
+            popen = subprocess.Popen(command, stdin=subprocess.DEVNULL,
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except OSError:
+            self._health_result(supervised, False)
+            return
+        process = supervised.process
+        timeout = self.loop.call_later(supervised.policy.health['timeout'], popen.kill)
+
+        def finished(code):
+            self.loop.cancel(timeout)
+            if supervised.process is process:
+                self._health_result(supervised, code == 0)
+
+        self.loop.watch_exit(popen, finished)
+
+    def _health_result(self, supervised, ok):
+        if supervised.state != RUNNING:
+            return
+        health = supervised.policy.health
+        if ok:
+            supervised.health_failures = 0
+        else:
+            supervised.health_failures += 1
+            if supervised.health_failures >= health['retries']:
+                # 结束进程，退出后按重启策略处理
+                supervised.unhealthy = True
+                supervised.detail = f"健康检查连续失败 {supervised.health_failures} 次"
+                self._changed(supervised)
+                self._terminate(supervised)
+                return
+        self._schedule_health(supervised)
+
+    def _terminate(self, supervised):
+        """与结束运行时一样先发 SIGTERM，STOP_GRACE 秒后仍未退出的连同子进程一起强制结束
+
+        卡死的程序可能不响应 SIGTERM，不强制结束的话它永远不会退出，也就不会被重启。
+        退出时 exited() 会取消 supervised.timer，已经退出的程序不会再收到 SIGKILL。
+        """
+        from launcher.engine import STOP_GRACE, signal_group
+
+        process = supervised.process
+        signal_group(process)
+
+        def kill():
+            if supervised.process is process and process.exit_code is None:
+                signal_group(process, kill=True)
+
+        supervised.timer = self.loop.call_later(STOP_GRACE, kill)
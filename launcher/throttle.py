@@ -0,0 +1,148 @@
+"""按系统负载调节启动节奏
+
+固定的延迟在空闲的机器上太长，在后台有更新或备份时又太短。开启调节后，
+顺序启动的项的 delay 变为等待的上限：
+
+- 到达下限（min_delay，默认 1 秒且不超过 delay）之后，只要系统不忙就立即启动
+- 系统繁忙时继续等待，每 interval 秒重新检查一次，最多等到 delay 秒
+
+"繁忙"指以下任意一项超过阈值：
+
+    cpu     /proc/pressure/cpu 的 some 比例（%）
+    memory  /proc/pressure/memory 的 some 比例（%）
+    io      /proc/pressure/io 的 some 比例（%）
+    load    可运行的进程数 / CPU 核数（读取 /proc/loadavg，没有时用 os.getloadavg()）
+    memory_available  可用内存占总内存的比例（%），低于阈值视为繁忙
+
+压力比例由两次采样之间 total 字段（累计等待微秒数）的增量算出，比 avg10 反应更快。
+读取不到的指标（非 Linux 系统、旧内核）直接忽略。
+"""
+import os
+import time
+
+DEFAULT_THRESHOLDS = {
+    'cpu': 40.0,
+    'memory': 10.0,
+    'io': 30.0,
+    'load': 1.5,
+    'memory_available': 10.0,
+}
+DEFAULT_MIN_DELAY = 1.0
+DEFAULT_INTERVAL = 0.5
+# 两次采样至少间隔多久，间隔太短时压力比例误差很大
+MIN_SAMPLE_GAP = 0.2
+
+PRESSURE_NAMES = {'cpu': "CPU 压力", 'memory': "内存压力", 'io': "IO 压力"}
+
+
+def _pressure_total(resource):
+    """/proc/pressure/<resource> 中 some 行的 total（微秒），读取失败返回 None"""
+    try:
+        with open(f'/proc/pressure/{resource}') as f:
+            for line in f:
+                if line.startswith('some '):
+                    return int(line.rsplit('total=', 1)[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def runnable_per_cpu():
+    """每个 CPU 核上的可运行进程数"""
+    cpus = os.cpu_count() or 1
+    try:
+        with open('/proc/loadavg') as f:
+            running = int(f.read().split()[3].split('/')[0])
+        # 读取 /proc/loadavg 的本进程也算在内
+        return max(0, running - 1) / cpus
+    except (OSError, ValueError, IndexError):
+        pass
+    if hasattr(os, 'getloadavg'):
+        return os.getloadavg()[0] / cpus
+    return None
+
+
+def memory_available():
+    """可用内存占总内存的百分比"""
+    values = {}
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in ('MemTotal', 'MemAvailable'):
+                    values[key] = int(rest.split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    if not values.get('MemTotal') or 'MemAvailable' not in values:
+        return None
+    return values['MemAvailable'] * 100 / values['MemTotal']
+
+
+class Throttle:
+    """判断系统当前是否繁忙"""
+
+    def __init__(self, thresholds=None, min_delay=DEFAULT_MIN_DELAY, interval=DEFAULT_INTERVAL):
+        self.thresholds = dict(DEFAULT_THRESHOLDS)
+        if thresholds:
+            unknown = set(thresholds) - set(DEFAULT_THRESHOLDS)
+            if unknown:
+                raise ValueError(f"未知的负载阈值: {', '.join(sorted(unknown))}")
+            self.thresholds.update(thresholds)
+        self.min_delay = min_delay
+        self.interval = interval
+        self._last = None  # (采样时刻, {资源: total})
+        self._reasons = []
+
+    @classmethod
+    def from_config(cls, config):
+        """根据记录中的 throttle 字段创建，True 表示使用默认阈值，假值表示不调节"""
+        if not config:
+            return None
+        if config is True:
+            return cls()
+        config = dict(config)
+        min_delay = float(config.pop('min_delay', DEFAULT_MIN_DELAY))
+        interval = float(config.pop('interval', DEFAULT_INTERVAL))
+        return cls(config, min_delay, interval)
+
+    def earliest(self, item):
+        """某一项最早可以在 delay 之前多久启动（返回相对于基准时刻的秒数）"""
+        return min(item.delay, float(item.entry.get('min_delay', self.min_delay)))
+
+    def sample(self):
+        """读取各项指标，返回 {指标: 数值}，压力比例在第一次采样时没有数值"""
+        now = time.monotonic()
+        totals = {resource: _pressure_total(resource) for resource in PRESSURE_NAMES}
+        values = {}
+        if self._last is not None:
+            last_time, last_totals = self._last
+            elapsed = (now - last_time) * 1_000_000
+            for resource, total in totals.items():
+                if total is not None and last_totals.get(resource) is not None and elapsed > 0:
+                    values[resource] = (total - last_totals[resource]) * 100 / elapsed
+        self._last = (now, totals)
+        load = runnable_per_cpu()
+        if load is not None:
+            values['load'] = load
+        available = memory_available()
+        if available is not None:
+            values['memory_available'] = available
+        return values
+
+    def busy(self):
+        """系统繁忙的原因列表，不忙时返回空列表；采样间隔过短时沿用上次的结果"""
+        if self._last is not None and time.monotonic() - self._last[0] < MIN_SAMPLE_GAP:
+            return self._reasons
+        values = self.sample()
+        reasons = []
+        for resource, name in PRESSURE_NAMES.items():
+            value = values.get(resource)
+            if value is not None and value > self.thresholds[resource]:
+                reasons.append(f"{name} {value:.0f}%")
+        if values.get('load') is not None and values['load'] > self.thresholds['load']:
+            reasons.append(f"负载 {values['load']:.1f}")
+        available = values.get('memory_available')
+        if available is not None and available < self.thresholds['memory_available']:
+            reasons.append(f"可用内存 {available:.0f}%")
+        self._reasons = reasons
+        return reasons
@@ -0,0 +1,141 @@
+"""Treeview 行与数据列表的对应关系
+
+界面上的增删改和移动只同步发生变化的行，不再清空后整体重建；
+每一行有固定的 iid，并保存 iid 到位置的映射，查找选中项的位置为 O(1)。
+搜索过滤时不符合的行从 Treeview 中摘下（detach），行和位置的对应关系不变。
+"""
+import itertools
+
+
+class TreeRows:
+    """维护 Treeview 中一组行与数据列表的一一对应
+
+    values(obj, position) 返回某一行各列的值；
+    tags(obj) 返回某一行的标签（用于设置颜色等），可以不提供；
+    position_columns 为 True 表示行的显示内容依赖位置（如序号列），
+    位置变化时需要同步更新显示。
+    """
+
+    def __init__(self, tree, values, prefix='row', position_columns=False, tags=None):
+        self.tree = tree
+        self.values = values
+        self.tags = tags
+        self.prefix = prefix
+        self.position_columns = position_columns
+        self.iids = []  # 按位置排列的 iid
+        self.positions = {}  # iid -> 位置
+        self.hidden = set()  # 被过滤掉、暂时摘下的行的 iid
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self.iids)
+
+    def _new_iid(self):
+        return f"{self.prefix}{next(self._counter)}"
+
+    def _options(self, obj, position):
+        options = {'values': self.values(obj, position)}
+        if self.tags is not None:
+            options['tags'] = self.tags(obj)
+        return options
+
+    def reset(self, objs):
+        """整体重建，只在切换数据源（加载记录、读取文件）时使用"""
+        if self.iids:
+            self.tree.delete(*self.iids)
+        self.iids = []
+        self.positions = {}
+        self.hidden = set()
+        for position, obj in enumerate(objs):
+            iid = self._new_iid()
+            self.tree.insert('', 'end', iid=iid, **self._options(obj, position))
+            self.iids.append(iid)
+            self.positions[iid] = position
+
+    def position_of(self, iid):
+        """返回某一行在列表中的位置"""
+        return self.positions[iid]
+
+    def iid_at(self, position):
+        return self.iids[position]
+
+    def _tree_index(self, position):
+        """position 处的行在 Treeview 中的位置（不计被过滤掉的行）"""
+        if not self.hidden:
+            return position
+        return sum(1 for iid in self.iids[:position] if iid not in self.hidden)
+
+    def filter(self, positions):
+        """只显示 positions 中的行，positions 为 None 时显示全部
+
+        只摘下或放回显示状态发生变化的行，其余的行不产生 Tk 调用。
+        """
+        shown = 0
+        for position, iid in enumerate(self.iids):
+            if positions is None or position in positions:
+                if iid in self.hidden:
+                    self.tree.move(iid, '', shown)
+                    self.hidden.discard(iid)
+                shown += 1
+            elif iid not in self.hidden:
+                self.tree.detach(iid)
+                self.hidden.add(iid)
+
+    @property
+    def shown(self):
+        return len(self.iids) - len(self.hidden)
+
+    def insert(self, position, obj, objs=None):
+        """在 position 处插入一行，objs 为插入后的完整列表（需要刷新序号时传入）"""
+        iid = self._new_iid()
+        self.tree.insert('', self._tree_index(position), iid=iid, **self._options(obj, position))
+        self.iids.insert(position, iid)
+        self._reindex(position + 1, objs)
+        self.positions[iid] = position
+        return iid
+
+    def append(self, obj):
+        return self.insert(len(self.iids), obj)
+
+    def delete(self, position, objs=None):
+        """删除 position 处的一行，objs 为删除后的完整列表（需要刷新序号时传入）"""
+        iid = self.iids.pop(position)
+        del self.positions[iid]
+        self.hidden.discard(iid)
+        self.tree.delete(iid)
+        self._reindex(position, objs)
+
+    def update(self, position, obj):
+        """更新一行的显示内容"""
+        self.tree.item(self.iids[position], **self._options(obj, position))
+
+    def swap(self, first, second, objs):
+        """交换两行，objs 为交换后的完整列表"""
+        iids = self.iids
+        iids[first], iids[second] = iids[second], iids[first]
+        self.positions[iids[first]] = first
+        self.positions[iids[second]] = second
+        low, high = sorted((first, second))
+        # 被过滤掉的行保持摘下的状态
+        for position in (low, high):
+            if iids[position] not in self.hidden:
+                self.tree.move(iids[position], '', self._tree_index(position))
+        if self.position_columns:
+            self.update(first, objs[first])
+            self.update(second, objs[second])
+
+    def select(self, position):
+        """选中一行，被过滤掉的行无法选中，返回是否选中"""
+        iid = self.iids[position]
+        if iid in self.hidden:
+            return False
+        self.tree.selection_set(iid)
+        self.tree.see(iid)
+        return True
+
+    def _reindex(self, start, objs):
+        for position in range(start, len(self.iids)):
+            iid = self.iids[position]
+            self.positions[iid] = position
+            if self.position_columns and objs is not None:
+                self.tree.item(iid, values=self.values(objs[position], position))
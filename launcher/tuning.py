@@ -0,0 +1,209 @@
+"""根据实测就绪时间自动调整延迟
+
+手动填写的延迟大多是留出的余量。启动耗时统计（launcher/metrics.py）记录了每个程序从启动到就绪的时间：
+有 probe 的以探测成功为准，没有 probe 的以 CPU 占用降下来（或进程退出）为准。按路径保留最近 HISTORY 次的就绪时间，
+顺序启动的项只需要等上一项就绪，因此建议的延迟就是上一项就绪时间的第 percentile 百分位数：
+percentile 为 95 表示大约 95% 的运行中上一项在此之前已经就绪。
+
+只调整顺序启动（schedule 为 sequential、没有 after）且前面有项的文件；
+按运行开始计时的项和依赖图中的项（delay 只是兜底超时）保持不变。
+样本少于 MIN_SAMPLES 次的路径也保持不变。
+
+simulate() 用虚拟时钟运行真正的调度器和依赖图，不启动任何程序、不真正等待，
+预测一条记录在当前延迟和调整后延迟下的总启动时间。
+"""
+import heapq
+import itertools
+import math
+import os
+
+from launcher.graph import LaunchPlan
+from launcher.metrics import percentile
+from launcher.scheduler import OFFSET, Scheduler
+
+DEFAULT_PERCENTILE = 95
+HISTORY = 20
+MIN_SAMPLES = 3
+MAX_DELAY = 3600
+
+
+def readiness(event):
+    """一次启动到就绪的秒数，没有测到时返回 None"""
+    if event.get('error'):
+        return None
+    if event.get('ready') is not None:
+        return event['ready']
+    if event.get('idle') is not None:
+        return event['idle']
+    # 观察期内就退出的程序（如只负责拉起其他进程的启动器）以退出时间为准
+    return event.get('exit')
+
+
+class ReadinessEstimates:
+    """每个路径最近 HISTORY 次的就绪时间"""
+
+    def __init__(self, events=(), history=HISTORY):
+        self.history = history
+        self.samples = {}
+        for event in events:
+            self.add(event['path'], readiness(event))
+
+    def add(self, path, seconds):
+        if seconds is None:
+            return
+        samples = self.samples.setdefault(path, [])
+        samples.append(seconds)
+        if len(samples) > self.history:
+            del samples[0]
+
+    def estimate(self, path, q=DEFAULT_PERCENTILE):
+        """path 就绪时间的第 q 百分位数，样本不足时返回 None"""
+        samples = self.samples.get(path, ())
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return percentile(samples, q)
+
+
+def _adjustable(files, position):
+    entry = files[position]
+    return (position > 0 and entry.get('after') is None
+            and entry.get('schedule', 'sequential') != OFFSET)
+
+
+def suggest(files, estimates, q=DEFAULT_PERCENTILE):
+    """返回 [(位置, 当前延迟, 建议延迟)]，只包含建议值与当前值不同的项"""
+    suggestions = []
+    for position, entry in enumerate(files):
+        if not _adjustable(files, position):
+            continue
+        estimate = estimates.estimate(files[position - 1]['path'], q)
+        if estimate is None:
+            continue
+        # 向上取整到 0.1 秒
+        delay = min(MAX_DELAY, math.ceil(estimate * 10) / 10)
+        current = float(entry.get('delay', 0) or 0)
+        if delay != current:
+            suggestions.append((position, current, delay))
+    return suggestions
+
+
+def tuned_files(files, estimates, q=DEFAULT_PERCENTILE):
+    """返回使用建议延迟的文件列表副本，原列表不变"""
+    tuned = list(files)
+    for position, current, delay in suggest(files, estimates, q):
+        tuned[position] = dict(files[position], delay=delay)
+    return tuned
+
+
+class VirtualClock:
+    """模拟用的时钟，等待时直接跳到下一个事件或超时时刻"""
+
+    def __init__(self):
+        self.time = 0.0
+        self._events = []
+        self._counter = itertools.count()
+
+    def now(self):
+        return self.time
+
+    def at(self, when, callback):
+        """在虚拟时刻 when 执行 callback"""
+        heapq.heappush(self._events, (when, next(self._counter), callback))
+
+    def wait(self, cond, timeout):
+        target = math.inf if timeout is None else self.time + timeout
+        if self._events and self._events[0][0] <= target:
+            when, _, callback = heapq.heappop(self._events)
+            self.time = max(self.time, when)
+            # 调度器的 Condition 使用可重入锁，回调中可以再加入新项
+            callback()
+        elif timeout is None:
+            raise RuntimeError("模拟无法继续：没有待处理的事件")
+        else:
+            self.time = target
+
+
+class SimulatedPlan(LaunchPlan):
+    """按预计的就绪时间标记就绪，不运行真正的探测
+
+    make_probe 只解析配置，不会访问网络或文件。
+    """
+
+    def __init__(self, entries, ready_after):
+        super().__init__(entries)
+        self.ready_after = ready_after
+        self.ready_at = {}
+
+    def _watch(self, item, ok):
+        clock = self.scheduler.clock
+        when = clock.now() + self.ready_after(item)
+        self.ready_at[item] = when
+        if self.probes[item] is None:
+            # 与真实运行一致：没有 probe 的项启动即算就绪，依赖它的项不会等待
+            self._mark_ready(item, True)
+        else:
+            clock.at(when, lambda: self._mark_ready(item, True))
+
+
+class Simulation:
+    """一次模拟的结果"""
+
+    def __init__(self, plan):
+        self.items = plan.items
+        self.launched_at = {item: item.actual for item in plan.items}
+        self.ready_at = plan.ready_at
+
+    @property
+    def last_launch(self):
+        """最后一项的启动时刻"""
+        return max(self.launched_at.values(), default=0.0)
+
+    @property
+    def all_ready(self):
+        """所有项都就绪的时刻"""
+        return max(self.ready_at.values(), default=0.0)
+
+    def early(self):
+        """启动时上一项预计还没有就绪的项"""
+        return [item for previous, item in zip(self.items, self.items[1:])
+                if item.entry.get('after') is None and item.mode != OFFSET
+                and self.launched_at[item] < self.ready_at[previous]]
+
+
+def simulate(files, estimates, q=DEFAULT_PERCENTILE):
+    """在虚拟时钟上运行文件列表，就绪时间取各路径的第 q 百分位数（没有样本时视为立即就绪）"""
+    def ready_after(item):
+        return estimates.estimate(item.path, q) or 0.0
+
+    plan = SimulatedPlan(files, ready_after)
+    clock = VirtualClock()
+
+    def launch_batch(batch):
+        for item in batch:
+            item.actual = clock.now()
+            plan.launched(item)
+
+    scheduler = Scheduler(launch_batch, clock=clock)
+    plan.start(scheduler)
+    scheduler.run()
+    return Simulation(plan)
+
+
+def report(files, estimates, q=DEFAULT_PERCENTILE):
+    """建议的延迟和模拟结果的文字说明，返回 (建议列表, 文字行列表)"""
+    suggestions = suggest(files, estimates, q)
+    lines = []
+    for position, current, delay in suggestions:
+        name = os.path.basename(files[position]['path'])
+        lines.append(f"第 {position + 1} 项 {name}: {current:g} 秒 -> {delay:g} 秒")
+    if not suggestions:
+        lines.append(f"没有可以调整的延迟（每个程序至少需要 {MIN_SAMPLES} 次就绪时间记录）")
+        return suggestions, lines
+    before = simulate(files, estimates, q)
+    after = simulate(tuned_files(files, estimates, q), estimates, q)
+    lines.append(f"预计全部启动用时: {before.last_launch:.1f} 秒 -> {after.last_launch:.1f} 秒")
+    lines.append(f"预计全部就绪用时: {before.all_ready:.1f} 秒 -> {after.all_ready:.1f} 秒")
+    early = len(before.early())
+    if early:
+        lines.append(f"当前延迟下有 {early} 项启动时上一项可能尚未就绪（按第 {q:g} 百分位数估计）")
+    return suggestions, lines
@@ -0,0 +1,41 @@
+"""后台线程到界面的消息通道
+
+Tk 不是线程安全的，后台线程（启动引擎、数据写入等）不能直接操作界面。
+后台线程把消息放入 UiChannel，由 Tk 线程通过 after() 定期取出处理：
+
+- 状态文本只保留最新的一条，每次取出最多刷新一次状态栏
+- 错误信息按顺序收集，由界面汇总显示，不再一条一个模态对话框
+- call() 可以把任意函数交给 Tk 线程执行
+"""
+import threading
+
+
+class UiChannel:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._status = None
+        self._errors = []
+        self._calls = []
+
+    def status(self, text):
+        """更新状态栏文本，未取出的旧文本直接被覆盖"""
+        with self._lock:
+            self._status = text
+
+    def error(self, message):
+        """报告一条错误"""
+        with self._lock:
+            self._errors.append(message)
+
+    def call(self, func, *args):
+        """在 Tk 线程中执行 func(*args)"""
+        with self._lock:
+            self._calls.append((func, args))
+
+    def drain(self):
+        """取出所有待处理的消息，返回 (状态文本或 None, 错误列表, 调用列表)"""
+        with self._lock:
+            status, self._status = self._status, None
+            errors, self._errors = self._errors, []
+            calls, self._calls = self._calls, []
+        return status, errors, calls
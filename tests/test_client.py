@@ -0,0 +1,62 @@
+import os
+import shutil
+import socket
+import tempfile
+import threading
+
+import pytest
+
+from launcher.client import DaemonClient, DaemonError
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="需要 Unix 套接字")
+
+
+def serve_ping(path, ready):
+    """在 path 上监听，每个连接回复一次 ping"""
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    ready()
+    conn, _ = server.accept()
+    with conn, conn.makefile('rb') as reader:
+        if reader.readline():
+            conn.sendall(b'{"ok": true}\n')
+    server.close()
+
+
+def test_accepts_own_daemon(tmp_path):
+    path = str(tmp_path / 'own.sock')
+    ready = threading.Event()
+    thread = threading.Thread(target=serve_ping, args=(path, ready.set), daemon=True)
+    thread.start()
+    assert ready.wait(5)
+    with DaemonClient(path) as client:
+        assert client.request('ping') == {'ok': True}
+    thread.join(5)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork') or os.geteuid() != 0, reason="需要以 root 运行才能切换到其他用户")
+def test_rejects_daemon_of_other_user():
+    # pytest 的 tmp_path 只有 root 能进入，另建一个其他用户可以写入的目录
+    directory = tempfile.mkdtemp()
+    os.chmod(directory, 0o777)
+    path = os.path.join(directory, 'other.sock')
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(read_fd)
+            os.setuid(65534)
+            serve_ping(path, lambda: os.write(write_fd, b'x'))
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    try:
+        assert os.read(read_fd, 1) == b'x'
+        with pytest.raises(DaemonError, match="其他用户"):
+            DaemonClient(path).connect()
+    finally:
+        os.close(read_fd)
+        # 被拒绝后连接已关闭，子进程的 readline 读到结束，随即退出
+        os.waitpid(pid, 0)
+        shutil.rmtree(directory)
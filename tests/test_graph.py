@@ -0,0 +1,95 @@
+import pytest
+
+from launcher.graph import DependencyCycleError, DependencyError, LaunchPlan, find_cycle
+from launcher.scheduler import Scheduler
+from launcher.tuning import VirtualClock
+
+
+def test_cycle_is_reported_with_its_chain():
+    with pytest.raises(DependencyCycleError) as raised:
+        LaunchPlan([
+            {'id': 'a', 'path': '/a', 'after': ['c']},
+            {'id': 'b', 'path': '/b', 'after': ['a']},
+            {'id': 'c', 'path': '/c', 'after': ['b']},
+        ])
+    names = [item.name for item in raised.value.cycle]
+    assert names[0] == names[-1]
+    assert set(names) == {'a', 'b', 'c'}
+
+
+def test_self_dependency_is_a_cycle():
+    with pytest.raises(DependencyCycleError):
+        LaunchPlan([{'id': 'a', 'path': '/a', 'after': 'a'}])
+
+
+def test_acyclic_graph_has_no_cycle():
+    plan = LaunchPlan([
+        {'id': 'db', 'path': '/db'},
+        {'path': '/api', 'after': ['db']},
+        {'path': '/web', 'after': ['db', '/api']},
+    ])
+    assert find_cycle(plan.deps) is None
+
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(DependencyError, match="不存在"):
+        LaunchPlan([{'path': '/a', 'after': ['missing']}])
+
+
+def test_ambiguous_dependency_is_rejected():
+    with pytest.raises(DependencyError, match="多个文件项"):
+        LaunchPlan([{'path': '/a'}, {'path': '/a'}, {'path': '/b', 'after': ['/a']}])
+
+
+def run_plan(entries, broken):
+    """在虚拟时钟上运行，broken 中的路径启动失败；返回 ({路径: 启动时刻}, [失败的路径])"""
+    plan = LaunchPlan(entries)
+    clock = VirtualClock()
+    launched = {}
+    failed = []
+
+    def launch_batch(batch):
+        for item in batch:
+            item.actual = clock.now()
+            # 与 LaunchEngine.launch 一致：依赖失败而不能启动的项和启动失败的项都算失败
+            if item.blocked or item.path in broken:
+                failed.append(item.path)
+                plan.launched(item, ok=False)
+            else:
+                launched[item.path] = clock.now()
+                plan.launched(item)
+
+    scheduler = Scheduler(launch_batch, clock=clock)
+    plan.start(scheduler)
+    scheduler.run()
+    return launched, failed
+
+
+def test_dependents_start_when_dependency_is_ready():
+    launched, failed = run_plan([
+        {'id': 'db', 'path': '/db', 'delay': 2},
+        {'path': '/api', 'delay': 30, 'after': ['db']},
+    ], broken=())
+    assert failed == []
+    assert launched == {'/db': 2.0, '/api': 2.0}
+
+
+def test_failed_dependency_falls_back_to_delay():
+    launched, failed = run_plan([
+        {'id': 'db', 'path': '/db', 'delay': 1},
+        {'path': '/api', 'delay': 5, 'after': ['db']},
+    ], broken={'/db'})
+    assert failed == ['/db']
+    # 依赖没有就绪，等到依赖启动 5 秒后的兜底时间
+    assert launched == {'/api': 6.0}
+
+
+def test_failed_dependency_without_fallback_cascades():
+    launched, failed = run_plan([
+        {'id': 'db', 'path': '/db'},
+        {'id': 'api', 'path': '/api', 'delay': 0, 'after': ['db']},
+        {'path': '/web', 'delay': 0, 'after': ['api']},
+        {'path': '/other', 'delay': 1, 'after': []},
+    ], broken={'/db'})
+    assert failed == ['/db', '/api', '/web']
+    assert launched == {'/other': 1.0}
@@ -0,0 +1,163 @@
+import threading
+
+from launcher.scheduler import LaunchItem, Scheduler
+from launcher.tuning import VirtualClock
+
+
+def make_scheduler(throttle=None, on_throttle=None):
+    clock = VirtualClock()
+    batches = []
+
+    def launch_batch(batch):
+        batches.append((clock.now(), [item.path for item in batch]))
+
+    return Scheduler(launch_batch, clock=clock, throttle=throttle, on_throttle=on_throttle), clock, batches
+
+
+def item(path, index=1):
+    return LaunchItem(index, {'path': path})
+
+
+def test_items_launch_in_deadline_order():
+    scheduler, _, batches = make_scheduler()
+    scheduler.schedule(item('c'), 3.0)
+    scheduler.schedule(item('a'), 1.0)
+    scheduler.schedule(item('b'), 2.0)
+    scheduler.run()
+    assert batches == [(1.0, ['a']), (2.0, ['b']), (3.0, ['c'])]
+
+
+def test_items_with_same_deadline_launch_together():
+    scheduler, _, batches = make_scheduler()
+    scheduler.schedule(item('a'), 1.0)
+    scheduler.schedule(item('b'), 1.0)
+    scheduler.schedule(item('c'), 2.0)
+    scheduler.run()
+    assert batches == [(1.0, ['a', 'b']), (2.0, ['c'])]
+
+
+def test_duplicate_schedule_launches_once_at_earliest_deadline():
+    scheduler, _, batches = make_scheduler()
+    a = item('a')
+    scheduler.schedule(a, 5.0)
+    scheduler.schedule(a, 2.0)
+    scheduler.run()
+    assert batches == [(2.0, ['a'])]
+    assert a.deadline == 2.0
+
+
+def test_expected_items_added_later_are_waited_for():
+    scheduler, clock, batches = make_scheduler()
+    scheduler.expect(1)
+    late = item('late')
+    clock.at(4.0, lambda: scheduler.schedule(late, clock.now()))
+    scheduler.run()
+    assert batches == [(4.0, ['late'])]
+
+
+def test_resume_shifts_deadlines_by_pause_length():
+    scheduler, clock, batches = make_scheduler()
+    scheduler.schedule(item('a'), 10.0)
+    clock.at(2.0, scheduler.pause)
+    clock.at(5.0, scheduler.resume)
+    scheduler.run()
+    # 暂停了 3 秒，剩余的等待时间不变
+    assert batches == [(13.0, ['a'])]
+
+
+def test_items_added_while_paused_are_not_shifted():
+    scheduler, clock, batches = make_scheduler()
+    scheduler.expect(1)
+    scheduler.schedule(item('a'), 10.0)
+    clock.at(2.0, scheduler.pause)
+    clock.at(3.0, lambda: scheduler.schedule(item('b'), 6.0))
+    clock.at(5.0, scheduler.resume)
+    scheduler.run()
+    assert batches == [(6.0, ['b']), (13.0, ['a'])]
+
+
+def test_due_item_waits_while_paused():
+    scheduler, clock, batches = make_scheduler()
+    scheduler.schedule(item('a'), 1.0)
+    clock.at(0.5, scheduler.pause)
+    clock.at(4.0, scheduler.resume)
+    scheduler.run()
+    assert batches == [(4.5, ['a'])]
+
+
+def test_skip_makes_head_due_now():
+    scheduler, clock, batches = make_scheduler()
+    scheduler.schedule(item('a'), 10.0)
+    scheduler.schedule(item('b'), 20.0)
+    clock.at(1.0, scheduler.skip)
+    scheduler.run()
+    assert batches == [(1.0, ['a']), (20.0, ['b'])]
+
+
+def test_stop_drops_pending_items():
+    scheduler, clock, batches = make_scheduler()
+    scheduler.schedule(item('a'), 1.0)
+    scheduler.schedule(item('b'), 10.0)
+    clock.at(5.0, scheduler.stop)
+    scheduler.run()
+    assert batches == [(1.0, ['a'])]
+
+
+class BusyThrottle:
+    """前 busy_checks 次检查报告繁忙"""
+
+    interval = 0.5
+
+    def __init__(self, busy_checks, on_check=None):
+        self.busy_checks = busy_checks
+        self.on_check = on_check
+        self.checks = 0
+
+    def busy(self):
+        self.checks += 1
+        if self.on_check:
+            self.on_check()
+        return ["CPU 压力 90%"] if self.checks <= self.busy_checks else []
+
+
+def throttled_item(path, latest):
+    result = item(path)
+    result.latest = latest
+    return result
+
+
+def test_busy_system_delays_item_until_idle():
+    held = []
+    throttle = BusyThrottle(busy_checks=2)
+    scheduler, _, batches = make_scheduler(throttle, lambda item, reasons: held.append((item.path, reasons)))
+    a = throttled_item('a', latest=10.0)
+    scheduler.schedule(a, 1.0)
+    scheduler.run()
+    assert batches == [(2.0, ['a'])]
+    assert held == [('a', ["CPU 压力 90%"])] * 2
+    assert a.throttled == 1.0
+
+
+def test_busy_system_delays_item_at_most_until_latest():
+    scheduler, _, batches = make_scheduler(BusyThrottle(busy_checks=100))
+    scheduler.schedule(throttled_item('a', latest=2.2), 1.0)
+    scheduler.run()
+    assert batches == [(2.2, ['a'])]
+
+
+def test_load_is_checked_outside_scheduler_lock():
+    added = []
+
+    def add_from_other_thread():
+        if added:
+            return
+        # 调度线程持有锁时，这里会一直等到超时
+        thread = threading.Thread(target=lambda: added.append(scheduler.schedule(item('b'), 5.0)))
+        thread.start()
+        thread.join(2)
+        assert added, "检查负载时仍持有调度器的锁"
+
+    scheduler, _, batches = make_scheduler(BusyThrottle(busy_checks=1, on_check=add_from_other_thread))
+    scheduler.schedule(throttled_item('a', latest=10.0), 1.0)
+    scheduler.run()
+    assert batches == [(1.5, ['a']), (5.0, ['b'])]
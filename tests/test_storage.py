@@ -0,0 +1,140 @@
+import copy
+import json
+import os
+
+import pytest
+
+from launcher.storage import EntryPool, FileEntry, LazyRecord, RecordStore
+
+
+def record(name, *paths):
+    return {'name': name, 'files': [{'path': path, 'delay': 1} for path in paths]}
+
+
+def reopen(data_file):
+    store = RecordStore(str(data_file))
+    assert store.load()
+    return store
+
+
+def as_plain(records):
+    return [dict(dict(r), files=[dict(entry) for entry in r['files']]) for r in records]
+
+
+def test_journal_is_replayed_on_load(tmp_path):
+    data_file = tmp_path / 'data.json'
+    store = RecordStore(str(data_file))
+    store.append(record('a', '/a'))
+    store.append(record('b', '/b'))
+    store.insert(0, record('c', '/c'))
+    store.move(0, 2)
+    store.update(0, files=[{'path': '/a2', 'delay': 2}])
+    store.delete(1)
+    store.flush()
+    # 只写了日志，还没有快照
+    assert not data_file.exists()
+    expected = as_plain(store.records)
+
+    assert as_plain(reopen(data_file).records) == expected
+    assert [r['name'] for r in expected] == ['a', 'c']
+
+
+def test_truncated_last_journal_line_is_ignored(tmp_path):
+    data_file = tmp_path / 'data.json'
+    store = RecordStore(str(data_file))
+    store.append(record('a', '/a'))
+    store.flush()
+    with open(str(data_file) + '.journal', 'a', encoding='utf-8') as f:
+        f.write('{"op": "insert", "index": 1, "rec')
+
+    loaded = reopen(data_file)
+    assert [r['name'] for r in loaded.records] == ['a']
+    # 之后追加的修改不会接在残缺行后面
+    loaded.append(record('b', '/b'))
+    loaded.flush()
+    assert [r['name'] for r in reopen(data_file).records] == ['a', 'b']
+
+
+def test_compaction_writes_snapshot_and_clears_journal(tmp_path):
+    data_file = tmp_path / 'data.json'
+    store = RecordStore(str(data_file), compact_after=3)
+    store.append(record('a', '/a', '/shared'))
+    store.append(record('b', '/b', '/shared'))
+    store.flush()
+    assert not data_file.exists()
+    store.update(1, name='b2')
+    store.flush()
+
+    assert os.path.getsize(str(data_file) + '.journal') == 0
+    snapshot = json.loads(data_file.read_text(encoding='utf-8'))
+    assert snapshot['journal_seq'] == 3
+    # 两条记录共用的文件项只保存一次
+    assert len(snapshot['file_entries']) == 3
+
+    loaded = reopen(data_file)
+    assert loaded.indexed
+    assert all(isinstance(r, LazyRecord) and not r.loaded for r in loaded.records)
+    assert as_plain(loaded.records) == as_plain(store.records)
+
+
+def test_changes_after_compaction_are_replayed_over_snapshot(tmp_path):
+    data_file = tmp_path / 'data.json'
+    store = RecordStore(str(data_file))
+    store.append(record('a', '/a'))
+    store.close()
+    store = reopen(data_file)
+    store.append(record('b', '/b'))
+    store.delete(0)
+    store.flush()
+
+    loaded = reopen(data_file)
+    assert [r['name'] for r in loaded.records] == ['b']
+    assert [entry['path'] for entry in loaded.records[0]['files']] == ['/b']
+
+
+def test_file_entry_is_read_only():
+    entry = EntryPool().intern({'path': '/a', 'delay': 1})
+    assert isinstance(entry, FileEntry)
+    for change in (lambda: entry.__setitem__('delay', 2),
+                   lambda: entry.__delitem__('delay'),
+                   lambda: entry.update(delay=2),
+                   lambda: entry.pop('delay'),
+                   lambda: entry.setdefault('x', 1),
+                   entry.clear,
+                   entry.popitem):
+        with pytest.raises(TypeError):
+            change()
+    with pytest.raises(TypeError):
+        entry |= {'delay': 2}
+    assert dict(entry) == {'path': '/a', 'delay': 1}
+
+
+def test_copies_of_file_entry_are_writable():
+    entry = EntryPool().intern({'path': '/a', 'delay': 1})
+    for copied in (dict(entry), copy.copy(entry), copy.deepcopy(entry)):
+        assert type(copied) is dict
+        copied['delay'] = 2
+    assert entry['delay'] == 1
+
+
+def test_pool_dedups_equal_entries():
+    pool = EntryPool()
+    first = pool.intern({'path': '/a', 'delay': 1, 'order': 1})
+    # 只用于显示的 order 不参与去重
+    assert pool.intern({'delay': 1, 'path': '/a', 'order': 7}) is first
+    assert 'order' not in first
+    assert pool.intern({'path': '/b', 'delay': 1}) is not first
+    assert len(pool) == 2
+
+
+def test_pool_keeps_values_of_different_types_apart():
+    pool = EntryPool()
+    entries = [pool.intern({'path': '/a', 'delay': value}) for value in (1, 1.0, True)]
+    assert len({id(entry) for entry in entries}) == 3
+    assert [type(entry['delay']) for entry in entries] == [int, float, bool]
+
+
+def test_pool_dedups_nested_values():
+    pool = EntryPool()
+    first = pool.intern({'path': '/a', 'probe': {'type': 'port', 'port': 80}})
+    assert pool.intern({'probe': {'port': 80, 'type': 'port'}, 'path': '/a'}) is first
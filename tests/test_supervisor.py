@@ -0,0 +1,134 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from launcher import supervisor
+from launcher.scheduler import LaunchItem
+from launcher.supervisor import (FAILED, RESTARTING, EventLoop, SuperviseError, Supervised, Supervisor,
+                                 make_policy)
+
+
+def wait_for(event):
+    assert event.wait(5), "事件循环没有执行回调"
+
+
+def test_call_soon_and_call_later_run_in_loop_thread():
+    loop = EventLoop()
+    done = threading.Event()
+    threads = []
+    loop.call_soon(lambda: threads.append(threading.current_thread().name))
+    loop.call_later(0.05, done.set)
+    wait_for(done)
+    assert threads == ['event-loop']
+
+
+def test_cancelled_timer_does_not_run():
+    loop = EventLoop()
+    calls = []
+    done = threading.Event()
+    timer = loop.call_later(0.05, lambda: calls.append('cancelled'))
+    loop.cancel(timer)
+    loop.call_later(0.1, done.set)
+    wait_for(done)
+    assert calls == []
+
+
+@pytest.mark.parametrize('pidfd', [False, True])
+def test_watch_exit_reports_exit_code(monkeypatch, pidfd):
+    if pidfd and not hasattr(os, 'pidfd_open'):
+        pytest.skip("系统不支持 pidfd")
+    if not pidfd:
+        # Windows、macOS 上的做法：每个子进程一个线程等待退出，回调交给事件循环
+        monkeypatch.setattr(supervisor, '_pidfd', lambda pid: None)
+    loop = EventLoop()
+    done = threading.Event()
+    codes = []
+
+    def exited(code):
+        codes.append((code, threading.current_thread().name))
+        done.set()
+
+    popen = subprocess.Popen([sys.executable, '-c', 'import sys; sys.exit(3)'])
+    loop.watch_exit(popen, exited)
+    wait_for(done)
+    assert codes == [(3, 'event-loop')]
+
+
+def test_backoff_doubles_up_to_max():
+    policy = make_policy({'backoff': 0.5, 'max_backoff': 3})
+    assert [policy.delay(n) for n in range(5)] == [0.5, 1.0, 2.0, 3.0, 3.0]
+
+
+def test_max_backoff_is_at_least_backoff():
+    policy = make_policy({'backoff': 10, 'max_backoff': 1})
+    assert policy.delay(0) == 10
+
+
+def test_invalid_policy_is_rejected():
+    assert make_policy(None) is None
+    assert make_policy(True).restart == 'on-failure'
+    with pytest.raises(SuperviseError):
+        make_policy({'restart': 'sometimes'})
+    with pytest.raises(SuperviseError):
+        make_policy({'retry': 3})
+
+
+class FakeLoop:
+    """记录 call_later 的等待时间，不真正执行"""
+
+    def __init__(self):
+        self.delays = []
+
+    def call_later(self, delay, callback):
+        self.delays.append(delay)
+        return callback
+
+    def cancel(self, timer):
+        pass
+
+
+class FakeEngine:
+    def __init__(self):
+        self.loop = FakeLoop()
+
+    def event_loop(self):
+        return self.loop
+
+
+class QuietListener:
+    def on_supervise(self, supervised):
+        pass
+
+
+def make_supervised(spec):
+    owner = Supervisor(FakeEngine())
+    supervised = Supervised(LaunchItem(1, {'path': '/app'}), make_policy(spec), None, QuietListener())
+    return owner, supervised
+
+
+def test_restart_delay_grows_with_recent_restarts(monkeypatch):
+    owner, supervised = make_supervised({'backoff': 1, 'max_restarts': 3, 'window': 60})
+    now = 1000.0
+    monkeypatch.setattr(supervisor.time, 'monotonic', lambda: now)
+    for _ in range(3):
+        owner._plan_restart(supervised, "退出码 1")
+        assert supervised.state == RESTARTING
+        supervised.restarts.append(now)
+    assert owner.loop.delays == [1, 2, 4]
+    # window 内已经重启 max_restarts 次，不再重启
+    owner._plan_restart(supervised, "退出码 1")
+    assert supervised.state == FAILED
+    assert owner.loop.delays == [1, 2, 4]
+
+
+def test_restarts_outside_window_are_forgotten(monkeypatch):
+    owner, supervised = make_supervised({'backoff': 1, 'max_restarts': 2, 'window': 60})
+    supervised.restarts.extend([100.0, 130.0])
+    monkeypatch.setattr(supervisor.time, 'monotonic', lambda: 170.0)
+    owner._plan_restart(supervised, "退出码 1")
+    assert supervised.state == RESTARTING
+    assert list(supervised.restarts) == [130.0]
+    assert owner.loop.delays == [2]